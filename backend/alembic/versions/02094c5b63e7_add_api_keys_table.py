@@ -0,0 +1,42 @@
+"""add api_keys table
+
+Revision ID: 02094c5b63e7
+Revises: e833f8b39e29
+Create Date: 2026-10-19 09:12:44.201735
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '02094c5b63e7'
+down_revision: Union[str, Sequence[str], None] = 'e833f8b39e29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create api_keys table holding SHA-256 hashes of issued API keys."""
+    op.create_table(
+        "api_keys",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("key_hash", sa.String(64), nullable=False, unique=True),
+        sa.Column("canvas_user_id", sa.Integer, nullable=False),
+        sa.Column("name", sa.String, nullable=True),  # label, e.g. "laptop"
+        sa.Column("created_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column("revoked_at", sa.DateTime, nullable=True),
+        sa.ForeignKeyConstraint(
+            ["canvas_user_id"],
+            ["users.canvas_id"],
+            name="fk_api_keys_user",
+            ondelete="CASCADE"
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Drop api_keys table."""
+    op.drop_table("api_keys")
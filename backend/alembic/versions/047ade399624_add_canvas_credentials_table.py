@@ -0,0 +1,41 @@
+"""add canvas_credentials table
+
+Revision ID: 047ade399624
+Revises: 02094c5b63e7
+Create Date: 2026-10-19 11:03:27.518042
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '047ade399624'
+down_revision: Union[str, Sequence[str], None] = '02094c5b63e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create canvas_credentials table holding each user's encrypted Canvas token."""
+    op.create_table(
+        "canvas_credentials",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("canvas_user_id", sa.Integer, nullable=False, unique=True),
+        sa.Column("encrypted_token", sa.String, nullable=False),  # Fernet token
+        sa.Column("created_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(
+            ["canvas_user_id"],
+            ["users.canvas_id"],
+            name="fk_canvas_credentials_user",
+            ondelete="CASCADE"
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Drop canvas_credentials table."""
+    op.drop_table("canvas_credentials")
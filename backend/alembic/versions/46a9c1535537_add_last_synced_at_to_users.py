@@ -0,0 +1,32 @@
+"""add last_synced_at to users
+
+Revision ID: 46a9c1535537
+Revises: fbc4432b698c
+Create Date: 2026-10-19 19:02:17.834265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '46a9c1535537'
+down_revision: Union[str, Sequence[str], None] = 'fbc4432b698c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Record when each user's Canvas data was last synced successfully."""
+    op.add_column(
+        'users',
+        sa.Column('last_synced_at', sa.DateTime, nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Drop last_synced_at from users."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('last_synced_at')
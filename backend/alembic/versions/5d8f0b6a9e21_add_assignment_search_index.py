@@ -0,0 +1,74 @@
+"""add assignment search index
+
+Revision ID: 5d8f0b6a9e21
+Revises: e4a1d7c02b93
+Create Date: 2026-10-19 23:41:07.284519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8f0b6a9e21'
+down_revision: Union[str, Sequence[str], None] = 'e4a1d7c02b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Course names are stored per user but come from the same Canvas course, so any one will do
+BACKFILL_SELECT = """
+    SELECT ca.canvas_assignment_id,
+           ca.assignment_name,
+           (SELECT MAX(a.course_name) FROM user_assignments a
+            WHERE a.canvas_assignment_id = ca.canvas_assignment_id),
+           ca.description
+    FROM course_assignments ca
+"""
+
+
+def upgrade() -> None:
+    """
+    Create the assignment_search full-text index and fill it from course_assignments.
+
+    SQLite gets an FTS5 table keyed by rowid = canvas_assignment_id.
+    Postgres gets a plain table with a generated, weighted tsvector and a
+    GIN index. Both keep the indexed text so writers can skip unchanged rows.
+    """
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("""
+            CREATE VIRTUAL TABLE assignment_search USING fts5(
+                assignment_name, course_name, description,
+                tokenize = 'porter unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        """)
+        op.execute(f"""
+            INSERT INTO assignment_search (rowid, assignment_name, course_name, description)
+            {BACKFILL_SELECT}
+        """)
+    else:
+        op.execute("""
+            CREATE TABLE assignment_search (
+                canvas_assignment_id BIGINT PRIMARY KEY,
+                assignment_name TEXT NOT NULL,
+                course_name TEXT,
+                description TEXT,
+                document tsvector GENERATED ALWAYS AS (
+                    setweight(to_tsvector('english', coalesce(assignment_name, '')), 'A') ||
+                    setweight(to_tsvector('english', coalesce(course_name, '')), 'B') ||
+                    setweight(to_tsvector('english', coalesce(description, '')), 'C')
+                ) STORED
+            )
+        """)
+        op.execute("CREATE INDEX ix_assignment_search_document ON assignment_search USING GIN (document)")
+        op.execute(f"""
+            INSERT INTO assignment_search (canvas_assignment_id, assignment_name, course_name, description)
+            {BACKFILL_SELECT}
+        """)
+
+
+def downgrade() -> None:
+    """Drop the assignment search index."""
+    op.execute("DROP TABLE assignment_search")
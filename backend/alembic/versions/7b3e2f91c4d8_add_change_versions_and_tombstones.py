@@ -0,0 +1,71 @@
+"""add change versions and tombstones
+
+Revision ID: 7b3e2f91c4d8
+Revises: 46a9c1535537
+Create Date: 2026-10-19 21:14:52.306118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e2f91c4d8'
+down_revision: Union[str, Sequence[str], None] = '46a9c1535537'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ("user_courses", "user_assignments", "user_submissions")
+
+
+def upgrade() -> None:
+    """
+    Stamp user rows with a per-user change version and record deletions.
+
+    users.change_version is the user's latest version; each write to their
+    courses, assignments or submissions takes the next one. Existing rows
+    start at version 1 so a client syncing from 0 receives everything.
+    """
+    op.add_column(
+        'users',
+        sa.Column('change_version', sa.BigInteger, nullable=False, server_default=sa.text("0"))
+    )
+    op.execute("UPDATE users SET change_version = 1")
+
+    for table in VERSIONED_TABLES:
+        op.add_column(
+            table,
+            sa.Column('change_version', sa.BigInteger, nullable=False, server_default=sa.text("0"))
+        )
+        op.execute(f"UPDATE {table} SET change_version = 1")
+        op.create_index(f"ix_{table}_change_version", table, ["canvas_user_id", "change_version"])
+
+    op.create_table(
+        "change_tombstones",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("canvas_user_id", sa.Integer, nullable=False),
+        sa.Column("entity", sa.String, nullable=False),  # course, assignment
+        sa.Column("entity_id", sa.Integer, nullable=False),  # Canvas ID of the deleted row
+        sa.Column("change_version", sa.BigInteger, nullable=False),
+        sa.Column("deleted_at", sa.DateTime, nullable=False, server_default=sa.func.current_timestamp()),
+        sa.ForeignKeyConstraint(
+            ["canvas_user_id"], ["users.canvas_id"], name="fk_change_tombstones_user", ondelete="CASCADE"
+        ),
+    )
+    op.create_index("ix_change_tombstones_version", "change_tombstones", ["canvas_user_id", "change_version"])
+
+
+def downgrade() -> None:
+    """Drop change versions and tombstones."""
+    op.drop_index("ix_change_tombstones_version", table_name="change_tombstones")
+    op.drop_table("change_tombstones")
+
+    for table in reversed(VERSIONED_TABLES):
+        op.drop_index(f"ix_{table}_change_version", table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('change_version')
+
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('change_version')
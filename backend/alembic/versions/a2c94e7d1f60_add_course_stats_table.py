@@ -0,0 +1,81 @@
+"""add course_stats table
+
+Revision ID: a2c94e7d1f60
+Revises: 5d8f0b6a9e21
+Create Date: 2026-10-20 00:18:33.640912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2c94e7d1f60'
+down_revision: Union[str, Sequence[str], None] = '5d8f0b6a9e21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Create course_stats, per-(user, course) grade and workload totals kept
+    up to date by the sync and completion writes, and fill it.
+    """
+    op.create_table(
+        "course_stats",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("canvas_user_id", sa.Integer, nullable=False),
+        sa.Column("canvas_course_id", sa.Integer, nullable=False),
+        sa.Column("assignment_count", sa.Integer, nullable=False, server_default=sa.text("0")),
+        sa.Column("points_possible", sa.Float, nullable=False, server_default=sa.text("0")),  # all graded assignments
+        sa.Column("points_graded", sa.Float, nullable=False, server_default=sa.text("0")),  # graded assignments with a score
+        sa.Column("points_earned", sa.Float, nullable=False, server_default=sa.text("0")),
+        sa.Column("submitted_count", sa.Integer, nullable=False, server_default=sa.text("0")),
+        sa.Column("completed_count", sa.Integer, nullable=False, server_default=sa.text("0")),  # submitted or locally complete
+        sa.Column("missing_count", sa.Integer, nullable=False, server_default=sa.text("0")),
+        sa.Column("late_count", sa.Integer, nullable=False, server_default=sa.text("0")),
+        sa.Column("updated_at", sa.DateTime, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.UniqueConstraint("canvas_user_id", "canvas_course_id", name="uq_course_stats_user_course"),
+        sa.ForeignKeyConstraint(
+            ["canvas_user_id", "canvas_course_id"],
+            ["user_courses.canvas_user_id", "user_courses.canvas_course_id"],
+            name="fk_course_stats_course",
+            ondelete="CASCADE"
+        ),
+    )
+
+    # Same totals as src.services.course_stats.STATS_SELECT, over every user
+    op.execute("""
+        INSERT INTO course_stats
+            (canvas_user_id, canvas_course_id, assignment_count, points_possible, points_graded,
+             points_earned, submitted_count, completed_count, missing_count, late_count)
+        SELECT
+            a.canvas_user_id,
+            a.canvas_course_id,
+            COUNT(*),
+            COALESCE(SUM(CASE WHEN ca.graded THEN ca.points_possible END), 0),
+            COALESCE(SUM(CASE WHEN ca.graded AND s.score IS NOT NULL THEN ca.points_possible END), 0),
+            COALESCE(SUM(CASE WHEN ca.graded THEN s.score END), 0),
+            SUM(CASE WHEN s.workflow_state IN ('submitted', 'pending_review', 'graded') THEN 1 ELSE 0 END),
+            SUM(CASE WHEN s.workflow_state IN ('submitted', 'pending_review', 'graded')
+                       OR s.is_locally_complete THEN 1 ELSE 0 END),
+            SUM(CASE WHEN s.missing THEN 1 ELSE 0 END),
+            SUM(CASE WHEN s.late THEN 1 ELSE 0 END)
+        FROM user_assignments a
+        INNER JOIN user_courses c
+            ON a.canvas_course_id = c.canvas_course_id
+            AND a.canvas_user_id = c.canvas_user_id
+        INNER JOIN course_assignments ca
+            ON ca.canvas_assignment_id = a.canvas_assignment_id
+        LEFT JOIN user_submissions s
+            ON a.canvas_assignment_id = s.canvas_assignment_id
+            AND a.canvas_user_id = s.canvas_user_id
+        GROUP BY a.canvas_user_id, a.canvas_course_id
+    """)
+
+
+def downgrade() -> None:
+    """Drop course_stats table."""
+    op.drop_table("course_stats")
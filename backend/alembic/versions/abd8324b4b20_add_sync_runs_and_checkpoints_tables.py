@@ -0,0 +1,62 @@
+"""add sync_runs and sync_checkpoints tables
+
+Revision ID: abd8324b4b20
+Revises: c51fdacb78f6
+Create Date: 2026-10-19 15:22:09.304417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'abd8324b4b20'
+down_revision: Union[str, Sequence[str], None] = 'c51fdacb78f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create tables for resumable, time-budgeted assignment syncs."""
+    op.create_table(
+        "sync_runs",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("run_id", sa.String(32), nullable=False, unique=True),  # the continuation token
+        sa.Column("canvas_user_id", sa.Integer, nullable=False),
+        sa.Column("status", sa.String, nullable=False),  # in_progress, complete
+        sa.Column("total_courses", sa.Integer, nullable=False),
+        sa.Column("started_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(
+            ["canvas_user_id"],
+            ["users.canvas_id"],
+            name="fk_sync_runs_user",
+            ondelete="CASCADE"
+        ),
+    )
+
+    # One row per course finished within a run; committed with that course's data
+    op.create_table(
+        "sync_checkpoints",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("run_id", sa.String(32), nullable=False),
+        sa.Column("canvas_course_id", sa.Integer, nullable=False),
+        sa.Column("assignments_synced", sa.Integer, nullable=False, server_default=sa.text("0")),
+        sa.Column("error", sa.String, nullable=True),  # set if Canvas failed for this course
+        sa.Column("completed_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.UniqueConstraint("run_id", "canvas_course_id", name="uq_sync_checkpoint_run_course"),
+        sa.ForeignKeyConstraint(
+            ["run_id"],
+            ["sync_runs.run_id"],
+            name="fk_sync_checkpoints_run",
+            ondelete="CASCADE"
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Drop resumable sync tables."""
+    op.drop_table("sync_checkpoints")
+    op.drop_table("sync_runs")
@@ -0,0 +1,127 @@
+"""add archive tables
+
+Revision ID: b8e6d2f4a913
+Revises: f3b7a15c8e42
+Create Date: 2026-10-20 02:21:45.907364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e6d2f4a913'
+down_revision: Union[str, Sequence[str], None] = 'f3b7a15c8e42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Create archived_courses, archived_assignments and archived_submissions.
+
+    They mirror user_courses, user_assignments and user_submissions for
+    courses of finished terms, which the archival job moves out of the hot
+    tables. Shared course_assignments rows stay where they are.
+    """
+    op.create_table(
+        "archived_courses",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("canvas_user_id", sa.Integer, nullable=False),
+        sa.Column("canvas_course_id", sa.Integer, nullable=False),
+        sa.Column("course_name", sa.String, nullable=False),
+        sa.Column("course_code", sa.String, nullable=False),
+        sa.Column("term_id", sa.Integer, nullable=True),
+        sa.Column("term_name", sa.String, nullable=True),
+        sa.Column("term_start_at", sa.DateTime, nullable=True),
+        sa.Column("term_end_at", sa.DateTime, nullable=True),
+        sa.Column("is_subscribed", sa.Boolean, nullable=False, server_default=sa.false()),
+        sa.Column("archived_at", sa.DateTime, nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.UniqueConstraint("canvas_user_id", "canvas_course_id", name="uq_archived_course"),
+        sa.ForeignKeyConstraint(
+            ["canvas_user_id"], ["users.canvas_id"], name="fk_archived_courses_user", ondelete="CASCADE"
+        ),
+    )
+
+    op.create_table(
+        "archived_assignments",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("canvas_user_id", sa.Integer, nullable=False),
+        sa.Column("canvas_assignment_id", sa.Integer, nullable=False),
+        sa.Column("canvas_course_id", sa.Integer, nullable=False),
+        sa.Column("course_name", sa.String, nullable=False),
+        sa.Column("due_at", sa.DateTime, nullable=True),
+        sa.Column("archived_at", sa.DateTime, nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.UniqueConstraint("canvas_user_id", "canvas_assignment_id", name="uq_archived_assignment"),
+        sa.ForeignKeyConstraint(
+            ["canvas_user_id"], ["users.canvas_id"], name="fk_archived_assignments_user", ondelete="CASCADE"
+        ),
+    )
+    op.create_index(
+        "ix_archived_assignments_course", "archived_assignments", ["canvas_user_id", "canvas_course_id"]
+    )
+
+    op.create_table(
+        "archived_submissions",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("canvas_user_id", sa.Integer, nullable=False),
+        sa.Column("canvas_assignment_id", sa.Integer, nullable=False),
+        sa.Column("canvas_submission_id", sa.Integer, nullable=True),
+        sa.Column("workflow_state", sa.String, nullable=False),
+        sa.Column("score", sa.Float, nullable=True),
+        sa.Column("grade", sa.String, nullable=True),
+        sa.Column("submitted_at", sa.DateTime, nullable=True),
+        sa.Column("late", sa.Boolean, nullable=False),
+        sa.Column("missing", sa.Boolean, nullable=False),
+        sa.Column("is_locally_complete", sa.Boolean, nullable=False, server_default=sa.false()),
+        sa.Column("locally_completed_at", sa.DateTime, nullable=True),
+        sa.Column("archived_at", sa.DateTime, nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.UniqueConstraint("canvas_user_id", "canvas_assignment_id", name="uq_archived_submission"),
+        sa.ForeignKeyConstraint(
+            ["canvas_user_id"], ["users.canvas_id"], name="fk_archived_submissions_user", ondelete="CASCADE"
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Move archived rows back into the hot tables (as inactive courses), then drop the archive tables."""
+    op.execute("""
+        INSERT INTO user_courses
+            (canvas_user_id, canvas_course_id, course_name, course_code, term_id, term_name,
+             term_start_at, term_end_at, is_active, is_subscribed)
+        SELECT canvas_user_id, canvas_course_id, course_name, course_code, term_id, term_name,
+               term_start_at, term_end_at, FALSE, is_subscribed
+        FROM archived_courses ac
+        WHERE NOT EXISTS (
+            SELECT 1 FROM user_courses c
+            WHERE c.canvas_user_id = ac.canvas_user_id AND c.canvas_course_id = ac.canvas_course_id
+        )
+    """)
+    op.execute("""
+        INSERT INTO user_assignments (canvas_user_id, canvas_assignment_id, canvas_course_id, course_name, due_at)
+        SELECT canvas_user_id, canvas_assignment_id, canvas_course_id, course_name, due_at
+        FROM archived_assignments aa
+        WHERE NOT EXISTS (
+            SELECT 1 FROM user_assignments a
+            WHERE a.canvas_user_id = aa.canvas_user_id AND a.canvas_assignment_id = aa.canvas_assignment_id
+        )
+    """)
+    op.execute("""
+        INSERT INTO user_submissions
+            (canvas_user_id, canvas_assignment_id, canvas_submission_id, workflow_state, score, grade,
+             submitted_at, late, missing, is_locally_complete, locally_completed_at)
+        SELECT canvas_user_id, canvas_assignment_id, canvas_submission_id, workflow_state, score, grade,
+               submitted_at, late, missing, is_locally_complete, locally_completed_at
+        FROM archived_submissions asub
+        WHERE NOT EXISTS (
+            SELECT 1 FROM user_submissions s
+            WHERE s.canvas_user_id = asub.canvas_user_id AND s.canvas_assignment_id = asub.canvas_assignment_id
+        )
+    """)
+
+    op.drop_table("archived_submissions")
+    op.drop_index("ix_archived_assignments_course", table_name="archived_assignments")
+    op.drop_table("archived_assignments")
+    op.drop_table("archived_courses")
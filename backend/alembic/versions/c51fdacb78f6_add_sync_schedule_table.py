@@ -0,0 +1,46 @@
+"""add sync_schedule table
+
+Revision ID: c51fdacb78f6
+Revises: 047ade399624
+Create Date: 2026-10-19 13:40:18.662913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c51fdacb78f6'
+down_revision: Union[str, Sequence[str], None] = '047ade399624'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create sync_schedule table tracking when each (user, course) is next synced."""
+    op.create_table(
+        "sync_schedule",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("canvas_user_id", sa.Integer, nullable=False),
+        sa.Column("canvas_course_id", sa.Integer, nullable=False),
+        sa.Column("next_sync_at", sa.DateTime, nullable=False),
+        sa.Column("last_synced_at", sa.DateTime, nullable=True),
+        sa.Column("change_rate", sa.Float, nullable=False, server_default=sa.text("0")),  # EMA of syncs that changed data
+        sa.Column("content_hash", sa.String, nullable=True),  # hash of the last fetched assignments
+        sa.UniqueConstraint("canvas_user_id", "canvas_course_id", name="uq_sync_schedule_user_course"),
+        sa.ForeignKeyConstraint(
+            ["canvas_user_id", "canvas_course_id"],
+            ["user_courses.canvas_user_id", "user_courses.canvas_course_id"],
+            name="fk_sync_schedule_course",
+            ondelete="CASCADE"
+        ),
+    )
+    op.create_index("ix_sync_schedule_next_sync_at", "sync_schedule", ["next_sync_at"])
+
+
+def downgrade() -> None:
+    """Drop sync_schedule table."""
+    op.drop_index("ix_sync_schedule_next_sync_at", table_name="sync_schedule")
+    op.drop_table("sync_schedule")
@@ -0,0 +1,98 @@
+"""split shared course_assignments out of user_assignments
+
+Revision ID: ddd9f0663a0f
+Revises: abd8324b4b20
+Create Date: 2026-10-19 17:05:51.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ddd9f0663a0f'
+down_revision: Union[str, Sequence[str], None] = 'abd8324b4b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Columns that are the same for every user enrolled in a course.
+# due_at stays per user: Canvas applies per-student due date overrides.
+SHARED_COLUMNS = [
+    "assignment_name",
+    "description",
+    "html_url",
+    "points_possible",
+    "grading_type",
+    "graded",
+]
+
+
+def upgrade() -> None:
+    """Move course-level assignment data into one shared row per assignment."""
+    op.create_table(
+        "course_assignments",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("canvas_assignment_id", sa.Integer, nullable=False, unique=True),
+        sa.Column("canvas_course_id", sa.Integer, nullable=False),
+        sa.Column("assignment_name", sa.String, nullable=False),
+        sa.Column("description", sa.String, nullable=True),
+        sa.Column("html_url", sa.String, nullable=False),
+        sa.Column("points_possible", sa.Float, nullable=True),
+        sa.Column("grading_type", sa.String, nullable=True),
+        sa.Column("graded", sa.Boolean, nullable=False, server_default=sa.text("0")),
+        sa.Column("updated_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_course_assignments_course", "course_assignments", ["canvas_course_id"])
+
+    # When each course's assignments were last fetched in full from Canvas
+    op.create_table(
+        "course_fetches",
+        sa.Column("canvas_course_id", sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column("fetched_at", sa.DateTime, nullable=False),
+        sa.Column("fetched_by_user_id", sa.Integer, nullable=False),
+    )
+
+    op.execute("""
+        INSERT INTO course_assignments
+        (canvas_assignment_id, canvas_course_id, assignment_name, description, html_url,
+         points_possible, grading_type, graded, updated_at)
+        SELECT canvas_assignment_id, MAX(canvas_course_id), MAX(assignment_name), MAX(description),
+               MAX(html_url), MAX(points_possible), MAX(grading_type), MAX(graded), MAX(updated_at)
+        FROM user_assignments
+        GROUP BY canvas_assignment_id
+    """)
+
+    with op.batch_alter_table("user_assignments") as batch_op:
+        for column in SHARED_COLUMNS:
+            batch_op.drop_column(column)
+
+
+def downgrade() -> None:
+    """Copy shared data back onto every user's assignment row."""
+    with op.batch_alter_table("user_assignments") as batch_op:
+        batch_op.add_column(sa.Column("assignment_name", sa.String, nullable=True))
+        batch_op.add_column(sa.Column("description", sa.String, nullable=True))
+        batch_op.add_column(sa.Column("html_url", sa.String, nullable=True))
+        batch_op.add_column(sa.Column("points_possible", sa.Float, nullable=True))
+        batch_op.add_column(sa.Column("grading_type", sa.String, nullable=True))
+        batch_op.add_column(sa.Column("graded", sa.Boolean, nullable=False, server_default=sa.text("0")))
+
+    for column in SHARED_COLUMNS:
+        op.execute(f"""
+            UPDATE user_assignments
+            SET {column} = (
+                SELECT ca.{column}
+                FROM course_assignments ca
+                WHERE ca.canvas_assignment_id = user_assignments.canvas_assignment_id
+            )
+        """)
+
+    with op.batch_alter_table("user_assignments") as batch_op:
+        batch_op.alter_column("assignment_name", nullable=False)
+        batch_op.alter_column("html_url", nullable=False)
+
+    op.drop_table("course_fetches")
+    op.drop_index("ix_course_assignments_course", table_name="course_assignments")
+    op.drop_table("course_assignments")
@@ -0,0 +1,28 @@
+"""add due_at index to user_assignments
+
+Revision ID: e4a1d7c02b93
+Revises: 7b3e2f91c4d8
+Create Date: 2026-10-19 23:02:41.518730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a1d7c02b93'
+down_revision: Union[str, Sequence[str], None] = '7b3e2f91c4d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Index due dates so the notification engine range-scans upcoming deadlines."""
+    op.create_index("ix_user_assignments_due_at", "user_assignments", ["due_at"])
+
+
+def downgrade() -> None:
+    """Drop the due_at index."""
+    op.drop_index("ix_user_assignments_due_at", table_name="user_assignments")
@@ -0,0 +1,104 @@
+"""add submission_history table
+
+Revision ID: f3b7a15c8e42
+Revises: a2c94e7d1f60
+Create Date: 2026-10-20 01:07:19.553086
+
+"""
+import json
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b7a15c8e42'
+down_revision: Union[str, Sequence[str], None] = 'a2c94e7d1f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def _epoch(value) -> Union[int, None]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def upgrade() -> None:
+    """
+    Create submission_history, an append-only log of submission changes.
+
+    Each row holds only the fields that changed since the previous row for
+    the same submission, as compact JSON with one-letter keys (see
+    src.services.submission_history). recorded_at is Unix seconds. Existing
+    submissions get a first row with all their fields.
+    """
+    op.create_table(
+        "submission_history",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("canvas_user_id", sa.Integer, nullable=False),
+        sa.Column("canvas_assignment_id", sa.Integer, nullable=False),
+        sa.Column("recorded_at", sa.BigInteger, nullable=False),  # Unix seconds
+        sa.Column("delta", sa.String, nullable=False),  # changed fields only
+        sa.ForeignKeyConstraint(
+            ["canvas_user_id"], ["users.canvas_id"], name="fk_submission_history_user", ondelete="CASCADE"
+        ),
+    )
+    op.create_index("ix_submission_history_user_time", "submission_history", ["canvas_user_id", "recorded_at"])
+    op.create_index(
+        "ix_submission_history_assignment",
+        "submission_history",
+        ["canvas_user_id", "canvas_assignment_id", "recorded_at"],
+    )
+
+    connection = op.get_bind()
+    recorded_at = int(datetime.now(timezone.utc).timestamp())
+    result = connection.execute(sa.text("""
+        SELECT canvas_user_id, canvas_assignment_id, workflow_state, score, grade, submitted_at, late, missing
+        FROM user_submissions
+        ORDER BY id
+    """))
+    while True:
+        rows = result.fetchmany(BACKFILL_BATCH_SIZE)
+        if not rows:
+            break
+        connection.execute(
+            sa.text("""
+                INSERT INTO submission_history (canvas_user_id, canvas_assignment_id, recorded_at, delta)
+                VALUES (:user_id, :assignment_id, :recorded_at, :delta)
+            """),
+            [
+                {
+                    "user_id": row.canvas_user_id,
+                    "assignment_id": row.canvas_assignment_id,
+                    "recorded_at": recorded_at,
+                    "delta": json.dumps(
+                        {
+                            "w": row.workflow_state,
+                            "s": row.score,
+                            "g": row.grade,
+                            "t": _epoch(row.submitted_at),
+                            "l": int(bool(row.late)),
+                            "m": int(bool(row.missing)),
+                        },
+                        separators=(",", ":"),
+                    ),
+                }
+                for row in rows
+            ]
+        )
+
+
+def downgrade() -> None:
+    """Drop submission_history table."""
+    op.drop_index("ix_submission_history_assignment", table_name="submission_history")
+    op.drop_index("ix_submission_history_user_time", table_name="submission_history")
+    op.drop_table("submission_history")
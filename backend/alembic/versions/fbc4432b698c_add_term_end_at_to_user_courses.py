@@ -0,0 +1,32 @@
+"""add term_end_at to user_courses
+
+Revision ID: fbc4432b698c
+Revises: ddd9f0663a0f
+Create Date: 2026-10-19 18:12:40.503117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fbc4432b698c'
+down_revision: Union[str, Sequence[str], None] = 'ddd9f0663a0f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Store the term's real end date so is_active can be derived from it."""
+    op.add_column(
+        'user_courses',
+        sa.Column('term_end_at', sa.DateTime, nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Drop term_end_at from user_courses."""
+    with op.batch_alter_table('user_courses') as batch_op:
+        batch_op.drop_column('term_end_at')
@@ -0,0 +1,2 @@
+# Benchmarks run against a throwaway SQLite database, e.g.:
+#   python -m benchmarks.dashboard_latency
@@ -0,0 +1,74 @@
+"""
+Per-request authentication overhead with many users.
+
+Compares the ApiKeyStore lookup against re-parsing ALLOWED_API_KEYS on
+every request (how verify_api_key used to work).
+
+    python -m benchmarks.auth_overhead [--users N]
+"""
+import argparse
+import os
+import time
+
+from benchmarks.common import setup_database
+
+
+def legacy_lookup(api_key: str):
+    # What every request used to do before the key store existed
+    keys = [key.strip() for key in os.getenv("ALLOWED_API_KEYS", "").split(",") if key.strip()]
+    mapping = {key: {"user_id": i + 1} for i, key in enumerate(keys)}
+    return mapping.get(api_key)
+
+
+def per_call_us(fn, arg, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(arg)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-request authentication overhead with many users")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    setup_database()
+
+    import sqlalchemy
+    from src import database as db
+    from src.auth import api_key_store, generate_api_key, hash_api_key
+
+    keys = [generate_api_key() for _ in range(args.users)]
+    with db.engine.begin() as connection:
+        connection.execute(
+            sqlalchemy.text("INSERT INTO users (canvas_id, name) VALUES (:id, :name)"),
+            [{"id": 10_000 + i, "name": f"user-{i}"} for i in range(args.users)],
+        )
+        connection.execute(
+            sqlalchemy.text("INSERT INTO api_keys (key_hash, canvas_user_id) VALUES (:key_hash, :user_id)"),
+            [{"key_hash": hash_api_key(key), "user_id": 10_000 + i} for i, key in enumerate(keys)],
+        )
+
+    # Legacy path with the same number of keys in the environment
+    os.environ["ALLOWED_API_KEYS"] = ",".join(keys)
+    legacy_us = per_call_us(legacy_lookup, keys[-1], max(1, args.iterations // 100))
+    os.environ["ALLOWED_API_KEYS"] = ""
+
+    api_key_store.invalidate()
+    start = time.perf_counter()
+    api_key_store.lookup(keys[0])
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    valid_us = per_call_us(api_key_store.lookup, keys[-1], args.iterations)
+    invalid_us = per_call_us(api_key_store.lookup, generate_api_key(), args.iterations)
+
+    print(f"{args.users} users")
+    print(f"legacy env parse per request    {legacy_us:10.2f} us")
+    print(f"key store cold load             {cold_ms:10.2f} ms (once per TTL)")
+    print(f"key store lookup (valid)        {valid_us:10.2f} us")
+    print(f"key store lookup (invalid)      {invalid_us:10.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Decoding Canvas assignment pages: json.loads + per-field dict checks vs.
+schema-driven validation straight from the response bytes.
+
+    python -m benchmarks.canvas_decoding [--assignments N] [--page-size N]
+"""
+import argparse
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import report, setup_database, time_calls
+from src.models.assignment import Assignment, Submission
+from src.utils.text import strip_html_to_plaintext
+
+REQUIRED_ASSIGNMENT_FIELDS = ["id", "course_id", "name", "html_url", "submission", "submission_types"]
+REQUIRED_SUBMISSION_FIELDS = ["id", "assignment_id", "workflow_state"]
+
+
+def build_pages(total: int, page_size: int, with_descriptions: bool) -> List[bytes]:
+    """Canvas-shaped assignment pages, including the many fields the sync ignores."""
+    now = datetime.now(timezone.utc)
+    items = []
+    for i in range(total):
+        due_at = (now + timedelta(days=i % 60)).isoformat()
+        items.append({
+            "id": 100000 + i,
+            "course_id": 42,
+            "name": f"Problem Set {i}",
+            "description": f"<p>Read <b>chapter {i}</b> and answer the questions.</p>" if with_descriptions else None,
+            "html_url": f"https://canvas.invalid/courses/42/assignments/{100000 + i}",
+            "points_possible": 10.0,
+            "due_at": due_at,
+            "lock_at": None,
+            "unlock_at": None,
+            "grading_type": "points",
+            "submission_types": ["online_upload"],
+            "has_submitted_submissions": True,
+            "published": True,
+            "muted": False,
+            "allowed_attempts": -1,
+            "rubric_settings": {"points_possible": 10},
+            "rubric": [
+                {"id": f"r{n}", "points": 2.5, "description": f"Criterion {n}", "ratings": []}
+                for n in range(4)
+            ],
+            "lock_info": {"asset_string": f"assignment_{100000 + i}"},
+            "submission": {
+                "id": 900000 + i,
+                "assignment_id": 100000 + i,
+                "user_id": 1,
+                "score": 9.5 if i % 3 else None,
+                "grade": "9.5" if i % 3 else None,
+                "submitted_at": due_at if i % 2 else None,
+                "workflow_state": "graded" if i % 3 else "unsubmitted",
+                "late": False,
+                "missing": i % 7 == 0,
+                "attempt": 1,
+                "preview_url": f"https://canvas.invalid/courses/42/assignments/{100000 + i}/submissions/1",
+            },
+        })
+    return [
+        json.dumps(items[start:start + page_size]).encode()
+        for start in range(0, total, page_size)
+    ]
+
+
+def assignment_from_dict(data: Dict[str, Any], course_name: str) -> Optional[Assignment]:
+    """The sync's old parser: per-field checks on json.loads output, then the models."""
+    if not all(data.get(field) is not None for field in REQUIRED_ASSIGNMENT_FIELDS):
+        return None
+    submission = data["submission"]
+    if not all(submission.get(field) is not None for field in REQUIRED_SUBMISSION_FIELDS):
+        return None
+
+    return Assignment(
+        id=data["id"],
+        course_id=data["course_id"],
+        course_name=course_name,
+        name=data["name"],
+        submission=Submission(
+            id=submission["id"],
+            assignment_id=submission["assignment_id"],
+            score=submission.get("score"),
+            grade=submission.get("grade"),
+            submitted_at=submission.get("submitted_at"),
+            workflow_state=submission["workflow_state"],
+            late=submission.get("late", False),
+            missing=submission.get("missing", False),
+        ),
+        graded="not_graded" not in data.get("submission_types", []),
+        html_url=data["html_url"],
+        description=strip_html_to_plaintext(data.get("description")),
+        points_possible=data.get("points_possible"),
+        due_at=data.get("due_at"),
+        grading_type=data.get("grading_type"),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Decoding Canvas assignment pages: json.loads + dict checks vs. schema validation")
+    parser.add_argument("--assignments", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_database()
+    from src.services.canvas_sync import assignment_record_from_payload, decode_assignment_page
+
+    def dict_path(pages: List[bytes]) -> list:
+        assignments = []
+        for page in pages:
+            for data in json.loads(page):
+                assignment = assignment_from_dict(data, "Course 42")
+                if assignment is not None:
+                    assignments.append(assignment)
+        return assignments
+
+    def schema_path(pages: List[bytes]) -> list:
+        assignments = []
+        for page in pages:
+            assignments.extend(assignment_record_from_payload(p, "Course 42") for p in decode_assignment_page(page))
+        return assignments
+
+    # HTML-to-text conversion costs the same on both paths and dominates
+    # when every assignment has a description, so report both cases
+    for with_descriptions in (False, True):
+        pages = build_pages(args.assignments, args.page_size, with_descriptions)
+        megabytes = sum(len(page) for page in pages) / 1e6
+        assert len(dict_path(pages)) == len(schema_path(pages)) == args.assignments
+        print(f"\n{args.assignments} assignments in {len(pages)} pages ({megabytes:.1f} MB), "
+              f"descriptions: {'yes' if with_descriptions else 'no'}")
+        report("json.loads + dict checks", time_calls(lambda: dict_path(pages), args.iterations, warmup=2))
+        report("validate_json + payloads", time_calls(lambda: schema_path(pages), args.iterations, warmup=2))
+
+
+if __name__ == "__main__":
+    main()
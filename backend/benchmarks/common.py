@@ -0,0 +1,138 @@
+"""
+Shared setup for benchmarks: a throwaway, migrated and seeded SQLite database.
+
+Call setup_database() BEFORE importing anything from src, since src.config
+reads the environment at import time.
+"""
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+API_KEYS = ["bench_key_user1", "bench_key_user2"]
+
+
+def setup_database() -> str:
+    """Point the app at a fresh temp SQLite database and migrate it to head."""
+    from alembic import command
+    from alembic.config import Config
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="canned-bench-"), "bench.db")
+    database_url = f"sqlite:///{db_path}"
+
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("CANVAS_PAT", "bench")
+    os.environ.setdefault("CANVAS_PAT_USER_ID", "1")
+    os.environ.setdefault("CANVAS_BASE_URL", "http://canvas.invalid")
+    os.environ["ALLOWED_API_KEYS"] = ",".join(API_KEYS)
+
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    command.upgrade(config, "head")
+
+    from src import database as db
+    if str(db.engine.url) != database_url:
+        # A .env file overrode DATABASE_URL; never seed a real database
+        raise RuntimeError(f"Refusing to benchmark against {db.engine.url}")
+
+    return database_url
+
+
+def seed(canvas_user_id: int = 1, courses: int = 5, assignments_per_course: int = 40) -> List[int]:
+    """Insert a user with active courses, assignments and submissions. Returns assignment ids."""
+    import sqlalchemy
+    from src import database as db
+
+    now = datetime.now(timezone.utc)
+    assignment_ids = []
+    with db.engine.begin() as connection:
+        connection.execute(
+            sqlalchemy.text("INSERT INTO users (canvas_id, name) VALUES (:id, :name)"),
+            {"id": canvas_user_id, "name": f"bench-{canvas_user_id}"},
+        )
+        for c in range(courses):
+            course_id = canvas_user_id * 1000 + c
+            connection.execute(
+                sqlalchemy.text("""
+                    INSERT INTO user_courses
+                    (canvas_user_id, canvas_course_id, course_name, course_code,
+                     term_id, term_name, term_start_at, is_active, is_subscribed)
+                    VALUES (:user_id, :course_id, :name, :code, 1, 'Bench Term', :start, 1, :subscribed)
+                """),
+                {
+                    "user_id": canvas_user_id,
+                    "course_id": course_id,
+                    "name": f"Course {course_id}",
+                    "code": f"BENCH-{course_id}",
+                    "start": now - timedelta(days=14),
+                    "subscribed": c % 2 == 0,
+                },
+            )
+            records = []
+            for a in range(assignments_per_course):
+                assignment_id = course_id * 1000 + a
+                assignment_ids.append(assignment_id)
+                records.append({
+                    "user_id": canvas_user_id,
+                    "assignment_id": assignment_id,
+                    "course_id": course_id,
+                    "course_name": f"Course {course_id}",
+                    "name": f"Assignment {assignment_id}",
+                    "description": "Read chapter " + "lorem ipsum " * 40,
+                    "html_url": f"https://canvas.invalid/courses/{course_id}/assignments/{assignment_id}",
+                    "due_at": now + timedelta(days=a - assignments_per_course // 2),
+                })
+            connection.execute(
+                sqlalchemy.text("""
+                    INSERT INTO course_assignments
+                    (canvas_assignment_id, canvas_course_id, assignment_name, graded,
+                     description, html_url, points_possible, grading_type)
+                    VALUES (:assignment_id, :course_id, :name, 1, :description, :html_url, 10, 'points')
+                    ON CONFLICT (canvas_assignment_id) DO NOTHING
+                """),
+                records,
+            )
+            connection.execute(
+                sqlalchemy.text("""
+                    INSERT INTO user_assignments
+                    (canvas_user_id, canvas_assignment_id, canvas_course_id, course_name, due_at)
+                    VALUES (:user_id, :assignment_id, :course_id, :course_name, :due_at)
+                """),
+                records,
+            )
+            connection.execute(
+                sqlalchemy.text("""
+                    INSERT INTO user_submissions
+                    (canvas_user_id, canvas_assignment_id, workflow_state, late, missing)
+                    VALUES (:user_id, :assignment_id, 'unsubmitted', 0, 0)
+                """),
+                records,
+            )
+    return assignment_ids
+
+
+def time_calls(fn: Callable[[], object], iterations: int, warmup: int = 5) -> Dict[str, float]:
+    """Run fn repeatedly and return latency stats in milliseconds."""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    return {
+        "mean": statistics.fmean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[int(len(samples) * 0.95) - 1],
+    }
+
+
+def report(label: str, stats: Dict[str, float]) -> None:
+    print(f"{label:<32} mean {stats['mean']:8.2f} ms   p50 {stats['p50']:8.2f} ms   p95 {stats['p95']:8.2f} ms")
@@ -0,0 +1,40 @@
+"""
+Page-load latency: GET /dashboard vs. /courses + /subscriptions + /assignments.
+
+    python -m benchmarks.dashboard_latency [--iterations N]
+"""
+import argparse
+
+from benchmarks.common import API_KEYS, report, seed, setup_database, time_calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Page-load latency: GET /dashboard vs. /courses + /subscriptions + /assignments")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--courses", type=int, default=6)
+    parser.add_argument("--assignments-per-course", type=int, default=40)
+    args = parser.parse_args()
+
+    setup_database()
+    seed(1, args.courses, args.assignments_per_course)
+
+    from fastapi.testclient import TestClient
+    from src.api.server import app
+
+    client = TestClient(app)
+    headers = {"X-API-Key": API_KEYS[0]}
+
+    def separate_calls():
+        for path in ("/courses", "/subscriptions", "/assignments"):
+            client.get(path, headers=headers).raise_for_status()
+
+    def dashboard_call():
+        client.get("/dashboard", headers=headers).raise_for_status()
+
+    print(f"{args.courses} courses x {args.assignments_per_course} assignments, {args.iterations} page loads")
+    report("3 separate calls", time_calls(separate_calls, args.iterations))
+    report("GET /dashboard", time_calls(dashboard_call, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
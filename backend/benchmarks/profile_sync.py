@@ -0,0 +1,267 @@
+"""
+Profile a full Canvas sync (courses, then assignments) under cProfile.
+
+Canvas is replaced by an in-process stand-in mounted on the user's HTTP
+session and async client, so the profile covers the real request, decode,
+html2text and SQLite code without network noise (add --latency-ms to
+simulate some).
+The stand-in serves either generated data or responses recorded from a
+real Canvas: a directory of JSON lists named after their endpoints, e.g.
+
+    recorded/courses.json                      (GET /api/v1/courses?include[]=term)
+    recorded/courses/<id>/assignments.json     (GET .../assignments?include[]=submission)
+    recorded/courses/<id>/students/submissions.json   (optional)
+
+Writes <output>.pstats, which flame graph tools read directly
+(`flameprof <output>.pstats > flame.svg`, `snakeviz <output>.pstats`).
+With --tracemalloc it also writes <output>-memory.txt, with the peak
+traced memory and the lines that allocated the most.
+
+    python -m benchmarks.profile_sync [--courses N] [--assignments N] [--recorded DIR]
+                                      [--warm] [--tracemalloc] [--output PREFIX]
+"""
+import argparse
+import asyncio
+import cProfile
+import json
+import pstats
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from benchmarks.common import setup_database
+
+CANVAS_USER_ID = 1
+API_PREFIX = "/api/v1"
+
+
+class StandInCanvas(BaseAdapter):
+    """
+    Transport adapter that answers Canvas list endpoints from memory, paginated like Canvas.
+
+    Also serves the async client, through the httpx transport from async_transport().
+    """
+
+    def __init__(self, responses: Dict[str, List[Any]], latency_seconds: float = 0.0):
+        super().__init__()
+        self.responses = responses
+        self.latency_seconds = latency_seconds
+        self.requests = 0
+
+    def page(self, request_url: str) -> Tuple[int, bytes, Dict[str, str]]:
+        """Status, body and headers Canvas would answer request_url with."""
+        self.requests += 1
+        url = urlparse(request_url)
+        query = parse_qs(url.query)
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("per_page", ["10"])[0])
+
+        headers = {"Content-Type": "application/json"}
+        items = self.responses.get(url.path)
+        if items is None:
+            return 404, b"[]", headers
+
+        if page * per_page < len(items):
+            headers["Link"] = f'<{url.scheme}://{url.netloc}{url.path}?page={page + 1}>; rel="next"'
+        return 200, json.dumps(items[(page - 1) * per_page:page * per_page]).encode(), headers
+
+    def send(self, request, **kwargs) -> requests.Response:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        status_code, content, headers = self.page(request.url)
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = "utf-8"
+        response.headers = CaseInsensitiveDict(headers)
+        response.status_code = status_code
+        response._content = content
+        return response
+
+    def async_transport(self) -> httpx.AsyncBaseTransport:
+        async def handle(request: httpx.Request) -> httpx.Response:
+            if self.latency_seconds:
+                await asyncio.sleep(self.latency_seconds)
+            status_code, content, headers = self.page(str(request.url))
+            return httpx.Response(status_code, content=content, headers=headers)
+
+        return httpx.MockTransport(handle)
+
+    def close(self) -> None:
+        pass
+
+
+def add_submission_lists(responses: Dict[str, List[Any]]) -> None:
+    """Derive /students/submissions for courses that only have /assignments."""
+    for path, assignments in list(responses.items()):
+        if not path.endswith("/assignments"):
+            continue
+        submissions_path = path.removesuffix("/assignments") + "/students/submissions"
+        responses.setdefault(submissions_path, [
+            dict(assignment["submission"], assignment_id=assignment["id"], cached_due_date=assignment.get("due_at"))
+            for assignment in assignments
+            if assignment.get("submission")
+        ])
+
+
+def load_recorded(directory: Path) -> Dict[str, List[Any]]:
+    responses = {
+        f"{API_PREFIX}/{path.relative_to(directory).with_suffix('').as_posix()}": json.loads(path.read_text())
+        for path in directory.rglob("*.json")
+    }
+    add_submission_lists(responses)
+    return responses
+
+
+def generate(courses: int, assignments_per_course: int, description_kb: float) -> Dict[str, List[Any]]:
+    """Canvas-shaped stand-in data with HTML descriptions of about description_kb each."""
+    now = datetime.now(timezone.utc)
+    paragraph = "<p>Read <b>section {n}</b>, then answer the <a href='https://canvas.invalid/files/{n}'>questions</a>.</p>"
+    repeat = max(1, int(description_kb * 1024 / len(paragraph)))
+    term = {
+        "id": 1,
+        "name": "Stand-in Term",
+        "start_at": (now - timedelta(days=30)).isoformat(),
+        "end_at": (now + timedelta(days=60)).isoformat(),
+    }
+    responses: Dict[str, List[Any]] = {
+        f"{API_PREFIX}/courses": [
+            {"id": 100 + c, "name": f"Course {100 + c}", "course_code": f"STAND-{100 + c}", "term": term}
+            for c in range(courses)
+        ]
+    }
+    for c in range(courses):
+        course_id = 100 + c
+        assignments = []
+        for a in range(assignments_per_course):
+            assignment_id = course_id * 1000 + a
+            due_at = (now + timedelta(days=a - assignments_per_course // 2)).isoformat()
+            graded = a % 3 == 0
+            assignments.append({
+                "id": assignment_id,
+                "course_id": course_id,
+                "name": f"Assignment {assignment_id}",
+                "description": "".join(paragraph.format(n=n) for n in range(repeat)),
+                "html_url": f"https://canvas.invalid/courses/{course_id}/assignments/{assignment_id}",
+                "points_possible": 10.0,
+                "due_at": due_at,
+                "grading_type": "points",
+                "submission_types": ["online_upload"],
+                "submission": {
+                    "id": assignment_id * 10,
+                    "assignment_id": assignment_id,
+                    "workflow_state": "graded" if graded else "unsubmitted",
+                    "score": 9.0 if graded else None,
+                    "grade": "9" if graded else None,
+                    "submitted_at": due_at if graded else None,
+                    "late": False,
+                    "missing": a % 7 == 0,
+                },
+            })
+        responses[f"{API_PREFIX}/courses/{course_id}/assignments"] = assignments
+    add_submission_lists(responses)
+    return responses
+
+
+def print_timings(label: str, result: Dict[str, Any]) -> None:
+    timings = result.get("timings")
+    if not timings:
+        return
+    phases = "  ".join(f"{phase} {ms:.1f}" for phase, ms in timings["summed_phases_ms"].items())
+    print(f"{label:<12} {timings['total_ms']:9.1f} ms   {phases}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Profile a full Canvas sync (courses, then assignments) under cProfile")
+    parser.add_argument("--courses", type=int, default=6)
+    parser.add_argument("--assignments", type=int, default=60, help="Assignments per course")
+    parser.add_argument("--description-kb", type=float, default=2.0, help="Size of each generated HTML description")
+    parser.add_argument("--recorded", type=Path, help="Directory of recorded Canvas responses to serve instead")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated Canvas latency per request")
+    parser.add_argument("--warm", action="store_true", help="Sync once unprofiled first, to profile a re-sync")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also trace memory allocations (slower)")
+    parser.add_argument("--output", default="sync-profile", help="Output file prefix")
+    parser.add_argument("--top", type=int, default=25, help="Functions to print, by cumulative time")
+    args = parser.parse_args()
+
+    setup_database()
+    import sqlalchemy
+    from src import database as db
+    from src.services.canvas_sync import sync_user_assignments, sync_user_courses
+    from src.session import canvas_sessions
+    from src.utils.canvas_async import async_canvas_clients
+    from src.utils.resilience import canvas_retry_budget
+
+    with db.engine.begin() as connection:
+        connection.execute(
+            sqlalchemy.text("INSERT INTO users (canvas_id, name) VALUES (:id, 'profile')"),
+            {"id": CANVAS_USER_ID},
+        )
+
+    responses = load_recorded(args.recorded) if args.recorded else generate(
+        args.courses, args.assignments, args.description_kb
+    )
+    canvas = StandInCanvas(responses, args.latency_ms / 1000)
+    session = canvas_sessions.get(CANVAS_USER_ID)
+    session.mount("https://", canvas)
+    session.mount("http://", canvas)
+    async_canvas_clients.transport = canvas.async_transport()
+
+    def full_sync() -> Dict[str, Any]:
+        with canvas_retry_budget():
+            return {
+                "courses": sync_user_courses(CANVAS_USER_ID),
+                "assignments": sync_user_assignments(CANVAS_USER_ID),
+            }
+
+    if args.warm:
+        full_sync()
+        canvas.requests = 0
+
+    profiler = cProfile.Profile()
+    if args.tracemalloc:
+        tracemalloc.start()
+    started_at = time.perf_counter()
+    profiler.enable()
+    results = full_sync()
+    profiler.disable()
+    elapsed = time.perf_counter() - started_at
+
+    memory_report = None
+    if args.tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        lines = [f"Peak traced memory: {peak / 1e6:.2f} MB (still allocated at the end: {current / 1e6:.2f} MB)", ""]
+        lines.append("Largest allocation sites still alive after the sync:")
+        lines.extend(str(stat) for stat in snapshot.statistics("lineno")[:args.top])
+        memory_report = Path(f"{args.output}-memory.txt")
+        memory_report.write_text("\n".join(lines) + "\n")
+
+    profile_path = Path(f"{args.output}.pstats")
+    profiler.dump_stats(profile_path)
+
+    print(f"\n{'re-sync' if args.warm else 'first sync'} of {results['assignments'].get('synced', 0)} assignments "
+          f"in {results['courses'].get('synced', 0)} courses: {elapsed * 1000:.1f} ms (profiled), "
+          f"{canvas.requests} Canvas requests")
+    print("Phase breakdown (ms, wall-clock total, then phase time summed over concurrent courses):")
+    print_timings("courses", results["courses"])
+    print_timings("assignments", results["assignments"])
+    print()
+    pstats.Stats(str(profile_path)).sort_stats("cumulative").print_stats(args.top)
+    print(f"Profile written to {profile_path}")
+    if memory_report is not None:
+        print(memory_report.read_text().splitlines()[0])
+        print(f"Memory report written to {memory_report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Completion-toggle throughput: PATCH /assignments/submissions vs. one
+PATCH /assignments/{id}/submission per assignment.
+
+    python -m benchmarks.submission_batch_throughput [--items N]
+"""
+import argparse
+import time
+
+from benchmarks.common import API_KEYS, seed, setup_database
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Completion-toggle throughput: batch PATCH vs. one PATCH per assignment")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_database()
+    assignment_ids = seed(1, courses=5, assignments_per_course=max(1, args.items // 5))[: args.items]
+
+    from fastapi.testclient import TestClient
+    from src.api.server import app
+
+    client = TestClient(app)
+    headers = {"X-API-Key": API_KEYS[0]}
+
+    def run_single(is_complete: bool) -> None:
+        for assignment_id in assignment_ids:
+            client.patch(
+                f"/assignments/{assignment_id}/submission",
+                headers=headers,
+                json={"is_locally_complete": is_complete},
+            ).raise_for_status()
+
+    def run_batch(is_complete: bool) -> None:
+        client.patch(
+            "/assignments/submissions",
+            headers=headers,
+            json={
+                "updates": [
+                    {"assignment_id": assignment_id, "is_locally_complete": is_complete}
+                    for assignment_id in assignment_ids
+                ]
+            },
+        ).raise_for_status()
+
+    print(f"{len(assignment_ids)} assignments per round, {args.rounds} rounds")
+    for label, run in (("single-item route", run_single), ("batch route", run_batch)):
+        run(True)  # warm up
+        start = time.perf_counter()
+        for i in range(args.rounds):
+            run(i % 2 == 0)
+        elapsed = time.perf_counter() - start
+        items_per_sec = len(assignment_ids) * args.rounds / elapsed
+        print(f"{label:<20} {items_per_sec:10.0f} items/s   {elapsed / args.rounds * 1000:8.1f} ms/round")
+
+
+if __name__ == "__main__":
+    main()
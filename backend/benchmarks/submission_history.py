@@ -0,0 +1,163 @@
+"""
+Submission history storage: delta rows written only on change vs. naive
+full snapshots of every submission on every sync.
+
+Simulates a term of syncs in which a small share of submissions change
+per sync (unsubmitted -> submitted -> graded, the odd regrade or late
+flag) and runs the real sync upsert, which appends submission_history.
+The same syncs are also written to two comparison tables with the same
+indexes: a full row per submission per sync, and a full row only when
+something changed. Sizes come from SQLite's dbstat table, indexes included.
+
+    python -m benchmarks.submission_history [--users N] [--syncs N] [--change-rate R]
+"""
+import argparse
+import random
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import seed, setup_database
+
+SNAPSHOT_COLUMNS = """
+    id INTEGER PRIMARY KEY,
+    canvas_user_id INTEGER NOT NULL,
+    canvas_assignment_id INTEGER NOT NULL,
+    recorded_at DATETIME NOT NULL,
+    workflow_state VARCHAR NOT NULL,
+    score FLOAT,
+    grade VARCHAR,
+    submitted_at DATETIME,
+    late BOOLEAN NOT NULL,
+    missing BOOLEAN NOT NULL
+"""
+
+
+def advance(record, now: datetime):
+    """One Canvas-side change to a submission."""
+    if record.workflow_state == "unsubmitted":
+        return replace(record, workflow_state="submitted", submitted_at=now, late=random.random() < 0.1)
+    if record.workflow_state == "submitted":
+        score = round(random.uniform(5, 10), 1)
+        return replace(record, workflow_state="graded", score=score, grade=str(score))
+    # Regrade
+    score = min(10.0, (record.score or 0) + 0.5)
+    return replace(record, score=score, grade=str(score))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Submission history storage: delta rows vs. naive full snapshots")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--syncs", type=int, default=120, help="Syncs per user (about two a day for a term)")
+    parser.add_argument("--change-rate", type=float, default=0.02, help="Share of submissions changing per sync")
+    args = parser.parse_args()
+
+    setup_database()
+    import sqlalchemy
+    from src import database as db
+    from src.services.canvas_sync import bulk_upsert_assignments
+    from src.services.sync_records import AssignmentRecord
+
+    random.seed(7)
+    start = datetime.now(timezone.utc) - timedelta(days=60)
+    records = {}
+    for user_id in range(1, args.users + 1):
+        assignment_ids = seed(canvas_user_id=user_id)
+        records[user_id] = [
+            AssignmentRecord(
+                canvas_assignment_id=assignment_id,
+                canvas_course_id=assignment_id // 1000,
+                course_name=f"Course {assignment_id // 1000}",
+                assignment_name=f"Assignment {assignment_id}",
+                graded=True,
+                html_url=f"https://canvas.invalid/courses/{assignment_id // 1000}/assignments/{assignment_id}",
+                description="Read chapter " + "lorem ipsum " * 40,
+                points_possible=10.0,
+                grading_type="points",
+                due_at=start + timedelta(days=assignment_id % 40),
+                canvas_submission_id=assignment_id * 10 + user_id,
+                workflow_state="unsubmitted",
+                score=None,
+                grade=None,
+                submitted_at=None,
+                late=False,
+                missing=False,
+            )
+            for assignment_id in assignment_ids
+        ]
+
+    with db.engine.begin() as connection:
+        for table in ("naive_snapshots", "changed_snapshots"):
+            connection.execute(sqlalchemy.text(f"CREATE TABLE {table} ({SNAPSHOT_COLUMNS})"))
+            connection.execute(sqlalchemy.text(
+                f"CREATE INDEX ix_{table}_user_time ON {table} (canvas_user_id, recorded_at)"
+            ))
+            connection.execute(sqlalchemy.text(
+                f"CREATE INDEX ix_{table}_assignment ON {table} "
+                "(canvas_user_id, canvas_assignment_id, recorded_at)"
+            ))
+        # Let the first sync insert the submissions, so history starts with
+        # a full row for each like the comparison tables do
+        connection.execute(sqlalchemy.text("DELETE FROM user_submissions"))
+
+    insert_snapshot = """
+        INSERT INTO {table}
+        (canvas_user_id, canvas_assignment_id, recorded_at, workflow_state, score, grade, submitted_at, late, missing)
+        VALUES (:canvas_user_id, :canvas_assignment_id, :recorded_at, :workflow_state, :score, :grade,
+                :submitted_at, :late, :missing)
+    """
+    fields = ("canvas_assignment_id", "workflow_state", "score", "grade", "submitted_at", "late", "missing")
+    for sync in range(args.syncs):
+        now = start + timedelta(hours=12 * sync)
+        for user_id, user_records in records.items():
+            changed = set()
+            if sync:
+                for i in random.sample(range(len(user_records)), max(1, int(len(user_records) * args.change_rate))):
+                    user_records[i] = advance(user_records[i], now)
+                    changed.add(i)
+            else:
+                changed = set(range(len(user_records)))
+
+            bulk_upsert_assignments(user_id, user_records, {r.canvas_course_id for r in user_records})
+            rows = [
+                {"canvas_user_id": user_id, "recorded_at": now, **{f: getattr(r, f) for f in fields}}
+                for r in user_records
+            ]
+            with db.engine.begin() as connection:
+                connection.execute(sqlalchemy.text(insert_snapshot.format(table="naive_snapshots")), rows)
+                connection.execute(
+                    sqlalchemy.text(insert_snapshot.format(table="changed_snapshots")),
+                    [rows[i] for i in sorted(changed)]
+                )
+
+    with db.engine.connect() as connection:
+        sizes = dict(connection.execute(sqlalchemy.text("""
+            SELECT CASE
+                       WHEN name LIKE '%naive_snapshots%' THEN 'naive_snapshots'
+                       WHEN name LIKE '%changed_snapshots%' THEN 'changed_snapshots'
+                       ELSE 'submission_history'
+                   END,
+                   SUM(pgsize)
+            FROM dbstat
+            WHERE name LIKE '%naive_snapshots%' OR name LIKE '%changed_snapshots%'
+               OR name LIKE '%submission_history%'
+            GROUP BY 1
+        """)).all())
+        counts = {
+            table: connection.execute(sqlalchemy.text(f"SELECT COUNT(*) FROM {table}")).scalar_one()
+            for table in sizes
+        }
+
+    submissions = sum(len(user_records) for user_records in records.values())
+    print(f"{submissions} submissions, {args.syncs} syncs each, {args.change_rate:.0%} changing per sync")
+    naive = sizes["naive_snapshots"]
+    for label, table in (
+        ("full row every sync", "naive_snapshots"),
+        ("full row on change", "changed_snapshots"),
+        ("delta row on change", "submission_history"),
+    ):
+        print(f"{label:<22} {counts[table]:>8} rows {sizes[table] / 1e6:8.2f} MB "
+              f"{sizes[table] / max(counts[table], 1):6.0f} B/row   {naive / sizes[table]:6.1f}x smaller than naive")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Sync pipeline CPU time and peak memory: pydantic Assignment/Submission
+models turned into dicts vs. slotted AssignmentRecords bound directly.
+
+Covers everything between a decoded Canvas page and executemany: building
+the per-assignment objects, holding them all (as fleet sync does), and
+building the parameters for the three upsert statements. The database
+writes themselves are the same on both paths and are left out.
+
+    python -m benchmarks.sync_records [--assignments N]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Callable, List
+
+from benchmarks.canvas_decoding import build_pages
+from benchmarks.common import setup_database
+
+
+def measure(label: str, run: Callable[[], object], rounds: int = 3) -> None:
+    """Best-of-rounds CPU time, then peak memory in a separate (traced, slower) run."""
+    cpu_times = []
+    for _ in range(rounds):
+        gc.collect()
+        start = time.process_time()
+        result = run()
+        cpu_times.append(time.process_time() - start)
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"{label:<28} cpu {min(cpu_times) * 1000:8.0f} ms   peak {peak / 1e6:8.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sync pipeline CPU time and peak memory: pydantic models vs. AssignmentRecords")
+    parser.add_argument("--assignments", type=int, default=50_000)
+    args = parser.parse_args()
+
+    setup_database()
+    from src.models.assignment import Assignment, Submission
+    from src.services.canvas_sync import assignment_record_from_payload, decode_assignment_page
+    from src.services.sync_records import (
+        COURSE_ASSIGNMENT_FIELDS,
+        USER_ASSIGNMENT_FIELDS,
+        USER_SUBMISSION_FIELDS,
+        bind_params,
+    )
+    from src.utils.text import strip_html_to_plaintext
+
+    # Decoding is shared by both paths, so it happens up front
+    pages = build_pages(args.assignments, 100, with_descriptions=False)
+    payloads = [payload for page in pages for payload in decode_assignment_page(page)]
+    del pages
+    user_id = 1
+
+    def build_models() -> list:
+        """The pipeline before AssignmentRecord."""
+        return [
+            Assignment(
+                id=p.id,
+                course_id=p.course_id,
+                course_name="Course 42",
+                name=p.name,
+                submission=Submission(
+                    id=p.submission.id,
+                    assignment_id=p.submission.assignment_id,
+                    score=p.submission.score,
+                    grade=p.submission.grade,
+                    submitted_at=p.submission.submitted_at,
+                    workflow_state=p.submission.workflow_state,
+                    late=p.submission.late,
+                    missing=p.submission.missing,
+                ),
+                graded="not_graded" not in p.submission_types,
+                html_url=p.html_url,
+                description=strip_html_to_plaintext(p.description),
+                points_possible=p.points_possible,
+                due_at=p.due_at,
+                grading_type=p.grading_type,
+            )
+            for p in payloads
+        ]
+
+    def model_pipeline() -> List[list]:
+        assignments = build_models()
+        course_records = [
+            {
+                "canvas_assignment_id": a.id,
+                "canvas_course_id": a.course_id,
+                "assignment_name": a.name,
+                "graded": a.graded,
+                "description": a.description,
+                "html_url": a.html_url,
+                "points_possible": a.points_possible,
+                "grading_type": a.grading_type,
+            }
+            for a in assignments
+        ]
+        assignment_records = [
+            {
+                "canvas_user_id": user_id,
+                "canvas_assignment_id": a.id,
+                "canvas_course_id": a.course_id,
+                "course_name": a.course_name,
+                "due_at": a.due_at,
+            }
+            for a in assignments
+        ]
+        submission_records = [
+            {
+                "canvas_user_id": user_id,
+                "canvas_submission_id": a.submission.id,
+                "canvas_assignment_id": a.id,
+                "workflow_state": a.submission.workflow_state,
+                "score": a.submission.score,
+                "grade": a.submission.grade,
+                "submitted_at": a.submission.submitted_at,
+                "late": a.submission.late,
+                "missing": a.submission.missing,
+            }
+            for a in assignments
+        ]
+        return [assignments, course_records, assignment_records, submission_records]
+
+    def record_pipeline() -> List[list]:
+        records = build_records()
+        return [
+            records,
+            bind_params(records, COURSE_ASSIGNMENT_FIELDS),
+            bind_params(records, USER_ASSIGNMENT_FIELDS, canvas_user_id=user_id),
+            bind_params(records, USER_SUBMISSION_FIELDS, canvas_user_id=user_id),
+        ]
+
+    def build_records() -> list:
+        return [assignment_record_from_payload(p, "Course 42") for p in payloads]
+
+    print(f"{len(payloads)} assignments")
+    measure("held objects: models", build_models)
+    measure("held objects: records", build_records)
+    measure("to params: models + dicts", model_pipeline)
+    measure("to params: records", record_pipeline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Staleness markers for read endpoints.
+
+Reads always come from the local database. While the Canvas circuit
+breaker is open (or only probing), that data can't be refreshed, so read
+responses say so with headers:
+
+- X-Data-Stale: true
+- X-Last-Synced-At: the user's last successful sync (ISO 8601, UTC)
+- Warning: 110 - "Response is Stale"
+"""
+from typing import Any, Dict
+
+from fastapi import Depends, Response
+
+from src.auth import verify_api_key
+from src.services.canvas_sync import get_last_synced_at
+from src.utils.resilience import canvas_circuit
+
+
+def data_freshness(
+    response: Response,
+    auth_info: Dict[str, Any] = Depends(verify_api_key),
+) -> Dict[str, str]:
+    """
+    Add staleness headers to the response while Canvas is unavailable.
+
+    Returns:
+        The headers that were set (empty while Canvas is healthy), for
+        endpoints that build their own Response
+    """
+    if canvas_circuit.state == "closed":
+        return {}
+
+    headers = {
+        "X-Data-Stale": "true",
+        "Warning": '110 - "Response is Stale"',
+    }
+    last_synced_at = get_last_synced_at(auth_info["user_id"])
+    if last_synced_at is not None:
+        headers["X-Last-Synced-At"] = last_synced_at.isoformat()
+
+    response.headers.update(headers)
+    return headers
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Dict, Any, List
+
+from src.api.routers.courses import normalize_courses
+from src.models.assignment import Assignment
+from src.models.course import Course
+from src.services.archival import get_archived_courses, query_archived_assignments
+from src import database as db
+from src.auth import verify_api_key
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/archive", tags=["archive"])
+
+
+@router.get("/courses", response_model=List[Course])
+def get_archive_courses(auth_info: Dict[str, Any] = Depends(verify_api_key)) -> List[Course]:
+    """
+    Get the user's courses from finished terms that have been archived.
+
+    Archived courses no longer appear in /courses or the change feed.
+    """
+    canvas_user_id = auth_info["user_id"]
+    try:
+        with db.read_snapshot() as connection:
+            return normalize_courses(get_archived_courses(canvas_user_id, connection))
+    except Exception as e:
+        logger.error(f"Database error fetching archived courses for user {canvas_user_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve archived courses")
+
+
+@router.get("/courses/{course_id}/assignments", response_model=List[Assignment])
+def get_archive_course_assignments(
+    course_id: int,
+    auth_info: Dict[str, Any] = Depends(verify_api_key),
+) -> List[Assignment]:
+    """Get an archived course's assignments with their final submissions."""
+    canvas_user_id = auth_info["user_id"]
+    try:
+        with db.read_snapshot() as connection:
+            return query_archived_assignments(canvas_user_id, course_id, connection)
+    except Exception as e:
+        logger.error(f"Database error fetching archived assignments for user {canvas_user_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve archived assignments")
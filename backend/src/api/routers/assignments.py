@@ -1,12 +1,25 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Any, Dict, List
+from fastapi import APIRouter, HTTPException, Depends, Query
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import sqlalchemy
 from src.models.assignment import Assignment
-from src.services.canvas_sync import get_assignments_for_active_courses
+from src.models.history import SubmissionTimeline
+from src.models.search import AssignmentSearchResults
+from src.services.canvas_sync import (
+    ASSIGNMENT_FIELD_COLUMNS,
+    get_assignments_for_active_courses,
+    get_assignment_fields_for_active_courses,
+    search_assignments,
+)
+from src.services.change_feed import next_change_version, release_change_version
+from src.services.course_stats import refresh_assignment_course_stats
+from src.services.submission_history import MAX_TIMELINE_PAGE_SIZE, query_submission_timeline
+from src.utils.fields import parse_fields
 from src import database as db
 from src.auth import verify_api_key
+from src.api.freshness import data_freshness
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,6 +32,23 @@ class SubmissionUpdateRequest(BaseModel):
     is_locally_complete: bool
 
 
+# Keeps the VALUES list well under SQLite's bound-parameter limit
+MAX_SUBMISSION_BATCH_SIZE = 500
+
+
+class SubmissionBatchItem(BaseModel):
+    """A single assignment's new local completion status."""
+    assignment_id: int
+    is_locally_complete: bool
+
+
+class SubmissionBatchUpdateRequest(BaseModel):
+    """Request model for updating many submission statuses at once."""
+    updates: List[SubmissionBatchItem] = Field(
+        ..., min_length=1, max_length=MAX_SUBMISSION_BATCH_SIZE
+    )
+
+
 class AssignmentServiceError(Exception):
     """Custom exception for assignment service operations."""
 
@@ -27,13 +57,188 @@ class AssignmentServiceError(Exception):
 
 @router.get("")
 def get_assignments(
+    fields: Optional[str] = Query(
+        None, description="Comma-separated assignment fields to return (e.g. id,name,due_at)"
+    ),
     auth_info: Dict[str, Any] = Depends(verify_api_key),
+    freshness: Dict[str, str] = Depends(data_freshness),
 ):
     canvas_user_id = auth_info["user_id"]
+    try:
+        selected_fields = parse_fields(fields, ASSIGNMENT_FIELD_COLUMNS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if selected_fields:
+        return get_assignment_fields_for_active_courses(canvas_user_id, selected_fields)
+
     assignments: List[Assignment] = get_assignments_for_active_courses(canvas_user_id)
     return assignments
 
 
+@router.get("/search", response_model=AssignmentSearchResults)
+def search_assignments_endpoint(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in names, courses and descriptions"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    auth_info: Dict[str, Any] = Depends(verify_api_key),
+) -> AssignmentSearchResults:
+    """
+    Search the user's assignments in active courses.
+
+    Every word must match (the last one as a prefix); results are ranked
+    with name matches first and paginated with offset/limit.
+
+    Raises:
+        HTTPException: 500 if the search fails
+    """
+    canvas_user_id = auth_info["user_id"]
+    try:
+        with db.engine.connect() as connection:
+            assignments, has_more = search_assignments(canvas_user_id, q, limit, offset, connection)
+    except Exception as e:
+        logger.error(f"Database error searching assignments for user {canvas_user_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to search assignments")
+
+    return AssignmentSearchResults(
+        query=q,
+        assignments=assignments,
+        offset=offset,
+        limit=limit,
+        next_offset=offset + limit if has_more else None,
+    )
+
+
+@router.get("/history", response_model=SubmissionTimeline)
+def get_submission_history(
+    start: Optional[datetime] = Query(None, description="Only changes at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only changes before this time"),
+    assignment_id: Optional[int] = Query(None, description="Only this assignment's changes"),
+    limit: int = Query(100, ge=1, le=MAX_TIMELINE_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    auth_info: Dict[str, Any] = Depends(verify_api_key),
+) -> SubmissionTimeline:
+    """
+    Get a timeline of the user's submission changes (scores, grades, states), newest first.
+
+    Raises:
+        HTTPException: 400 for a malformed cursor, 500 if the query fails
+    """
+    canvas_user_id = auth_info["user_id"]
+    try:
+        with db.read_snapshot() as connection:
+            changes, next_cursor = query_submission_timeline(
+                connection, canvas_user_id, start, end, assignment_id, limit, cursor
+            )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    except Exception as e:
+        logger.error(f"Database error fetching submission history for user {canvas_user_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve submission history")
+
+    return SubmissionTimeline(changes=changes, next_cursor=next_cursor)
+
+
+@router.patch("/submissions")
+def update_assignment_submissions(
+    request: SubmissionBatchUpdateRequest,
+    auth_info: Dict[str, Any] = Depends(verify_api_key),
+) -> Dict[str, Any]:
+    """
+    Update many assignments' local completion status in one transaction.
+
+    All updates are applied with a single set-based UPDATE, then the new
+    state is read back with a single SELECT. If an assignment id appears
+    more than once, the last entry wins.
+
+    Args:
+        request: Request containing (assignment_id, is_locally_complete) pairs
+
+    Returns:
+        Dict with per-item results in request order plus updated/not_found counts
+
+    Raises:
+        HTTPException: 500 if the update fails
+    """
+    canvas_user_id = auth_info["user_id"]
+    updates = {item.assignment_id: item.is_locally_complete for item in request.updates}
+
+    values = ", ".join(f"(:assignment_id_{i}, :is_complete_{i})" for i in range(len(updates)))
+    params: Dict[str, Any] = {"user_id": canvas_user_id}
+    for i, (assignment_id, is_complete) in enumerate(updates.items()):
+        params[f"assignment_id_{i}"] = assignment_id
+        params[f"is_complete_{i}"] = is_complete
+
+    try:
+        with db.engine.begin() as connection:
+            params["version"] = next_change_version(connection, canvas_user_id)
+            connection.execute(
+                sqlalchemy.text(f"""
+                    WITH updates (assignment_id, is_complete) AS (VALUES {values})
+                    UPDATE user_submissions
+                    SET is_locally_complete = updates.is_complete,
+                        locally_completed_at = CASE
+                            WHEN updates.is_complete THEN CURRENT_TIMESTAMP
+                            ELSE NULL
+                        END,
+                        change_version = :version
+                    FROM updates
+                    WHERE user_submissions.canvas_user_id = :user_id
+                      AND user_submissions.canvas_assignment_id = updates.assignment_id
+                      AND user_submissions.is_locally_complete IS DISTINCT FROM updates.is_complete
+                """),
+                params,
+            )
+            # Rows already in the requested state (or unknown) aren't stamped;
+            # if none were, there's no new version to notify about
+            if not release_change_version(connection, canvas_user_id, params["version"]):
+                refresh_assignment_course_stats(connection, canvas_user_id, list(updates))
+
+            rows = connection.execute(
+                sqlalchemy.text("""
+                    SELECT
+                        a.canvas_assignment_id as id,
+                        ca.assignment_name as name,
+                        a.course_name,
+                        a.due_at,
+                        s.workflow_state,
+                        s.is_locally_complete,
+                        s.locally_completed_at
+                    FROM user_assignments a
+                    INNER JOIN course_assignments ca
+                        ON ca.canvas_assignment_id = a.canvas_assignment_id
+                    LEFT JOIN user_submissions s
+                        ON a.canvas_assignment_id = s.canvas_assignment_id
+                        AND a.canvas_user_id = s.canvas_user_id
+                    WHERE a.canvas_user_id = :user_id
+                      AND a.canvas_assignment_id IN :assignment_ids
+                """).bindparams(sqlalchemy.bindparam("assignment_ids", expanding=True)),
+                {"user_id": canvas_user_id, "assignment_ids": list(updates)},
+            ).all()
+    except Exception as e:
+        logger.error(f"Failed to batch update submissions for user {canvas_user_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to update assignments")
+
+    found = {row.id: serialize_submission_status(row) for row in rows}
+    results = [
+        {
+            "assignment_id": assignment_id,
+            "status": "updated" if assignment_id in found else "not_found",
+            "assignment": found.get(assignment_id),
+        }
+        for assignment_id in updates
+    ]
+
+    logger.info(
+        f"Batch updated {len(found)} of {len(updates)} assignments for user {canvas_user_id}"
+    )
+    return {
+        "results": results,
+        "updated": len(found),
+        "not_found": len(updates) - len(found),
+    }
+
+
 @router.patch("/{assignment_id}/submission")
 def update_assignment_submission(
     assignment_id: int,
@@ -73,16 +278,23 @@ def update_assignment_submission(
                 raise AssignmentServiceError("Assignment not found")
 
             # Update or clear local completion status
+            params = {
+                "user_id": canvas_user_id,
+                "assignment_id": assignment_id,
+                "version": next_change_version(connection, canvas_user_id),
+            }
             if request.is_locally_complete:
                 connection.execute(
                     sqlalchemy.text("""
                         UPDATE user_submissions
                         SET is_locally_complete = 1,
-                            locally_completed_at = CURRENT_TIMESTAMP
+                            locally_completed_at = CURRENT_TIMESTAMP,
+                            change_version = :version
                         WHERE canvas_user_id = :user_id
                             AND canvas_assignment_id = :assignment_id
+                            AND is_locally_complete IS DISTINCT FROM 1
                     """),
-                    {"user_id": canvas_user_id, "assignment_id": assignment_id},
+                    params,
                 )
             else:
                 # Allow unmarking as done
@@ -90,25 +302,32 @@ def update_assignment_submission(
                     sqlalchemy.text("""
                         UPDATE user_submissions
                         SET is_locally_complete = 0,
-                            locally_completed_at = NULL
+                            locally_completed_at = NULL,
+                            change_version = :version
                         WHERE canvas_user_id = :user_id
                             AND canvas_assignment_id = :assignment_id
+                            AND is_locally_complete IS DISTINCT FROM 0
                     """),
-                    {"user_id": canvas_user_id, "assignment_id": assignment_id},
+                    params,
                 )
+            # Already in the requested state: no new version to notify about
+            if not release_change_version(connection, canvas_user_id, params["version"]):
+                refresh_assignment_course_stats(connection, canvas_user_id, [assignment_id])
 
             # Fetch updated assignment data
             result = connection.execute(
                 sqlalchemy.text("""
                     SELECT
                         a.canvas_assignment_id as id,
-                        a.assignment_name as name,
+                        ca.assignment_name as name,
                         a.course_name,
                         a.due_at,
                         s.workflow_state,
                         s.is_locally_complete,
                         s.locally_completed_at
                     FROM user_assignments a
+                    INNER JOIN course_assignments ca
+                        ON ca.canvas_assignment_id = a.canvas_assignment_id
                     LEFT JOIN user_submissions s
                         ON a.canvas_assignment_id = s.canvas_assignment_id
                         AND a.canvas_user_id = s.canvas_user_id
@@ -122,15 +341,7 @@ def update_assignment_submission(
                 f"Marked assignment {assignment_id} as done for user {canvas_user_id}"
             )
 
-            return {
-                "id": result.id,
-                "name": result.name,
-                "course_name": result.course_name,
-                "due_at": result.due_at,
-                "workflow_state": result.workflow_state,
-                "is_locally_complete": bool(result.is_locally_complete),
-                "locally_completed_at": result.locally_completed_at,
-            }
+            return serialize_submission_status(result)
             
     except AssignmentServiceError as e:
         logger.error(f"Failed to mark assignment {assignment_id} as done: {e}")
@@ -138,3 +349,16 @@ def update_assignment_submission(
             status_code=404 if "not found" in str(e).lower() else 500,
             detail="Failed to update assignment",
         )
+
+
+def serialize_submission_status(row) -> Dict[str, Any]:
+    """Shape an assignment + submission status row for PATCH responses."""
+    return {
+        "id": row.id,
+        "name": row.name,
+        "course_name": row.course_name,
+        "due_at": row.due_at,
+        "workflow_state": row.workflow_state,
+        "is_locally_complete": bool(row.is_locally_complete),
+        "locally_completed_at": row.locally_completed_at,
+    }
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.responses import Response
+from typing import Dict, Any, Optional
+
+from src.services.calendar_feed import calendar_feeds, etag_matches, feed_etag
+from src.services.change_feed import get_change_version
+from src import database as db
+from src.auth import verify_feed_api_key
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["calendar"])
+
+ICS_MEDIA_TYPE = "text/calendar; charset=utf-8"
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header allows gzip (and doesn't give it q=0)."""
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            q = params.strip().removeprefix("q=")
+            try:
+                return not params.strip() or float(q) > 0
+            except ValueError:
+                return True
+    return False
+
+
+@router.get("/calendar.ics")
+def get_calendar_feed(
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    accept_encoding: Optional[str] = Header(None, alias="Accept-Encoding"),
+    auth_info: Dict[str, Any] = Depends(verify_feed_api_key),
+) -> Response:
+    """
+    iCalendar feed of the user's deadlines in active courses.
+
+    Subscribe calendar apps to /calendar.ics?key=<API key>. Responses carry
+    an ETag; polls that send it back in If-None-Match get a 304 until the
+    user's data changes.
+    """
+    canvas_user_id = auth_info["user_id"]
+    headers = {
+        # Clients may keep the feed but must check back before reusing it
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    try:
+        with db.read_snapshot() as connection:
+            version = get_change_version(connection, canvas_user_id)
+            etag = feed_etag(canvas_user_id, version)
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={**headers, "ETag": etag})
+            feed = calendar_feeds.get_feed(canvas_user_id, connection, version)
+    except Exception as e:
+        logger.error(f"Database error building calendar for user {canvas_user_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to build calendar")
+
+    headers["ETag"] = feed.etag
+    if accepts_gzip(accept_encoding):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=feed.gzipped, media_type=ICS_MEDIA_TYPE, headers=headers)
+    return Response(content=feed.body, media_type=ICS_MEDIA_TYPE, headers=headers)
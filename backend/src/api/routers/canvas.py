@@ -1,11 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Dict, Any, Optional
+import time
+from pydantic import BaseModel, Field
 from src.services.canvas_sync import (
     sync_user_courses,
     sync_user_assignments,
     CanvasAPIError,
     CanvasSyncError,
+    CanvasUnavailableError,
+    get_last_synced_at,
 )
+from src.services.canvas_credentials import (
+    CanvasCredentialsError,
+    delete_canvas_token,
+    store_canvas_token,
+)
+from src.services.resumable_sync import (
+    InvalidContinuationToken,
+    get_sync_progress,
+    sync_user_assignments_resumable,
+)
+from src.services.events import publish_sync_progress, sync_events
+from src.session import canvas_sessions
+from src.utils.canvas_async import async_canvas_clients
+from src.utils.resilience import canvas_circuit, canvas_retry_budget
 from src.auth import verify_api_key
 import logging
 
@@ -14,17 +32,94 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/canvas", tags=["canvas"])
 
 
+class CanvasTokenRequest(BaseModel):
+    """Request model for saving the user's Canvas access token."""
+    token: str = Field(..., min_length=1)
+
+
+@router.put("/token")
+def set_canvas_token(
+    request: CanvasTokenRequest,
+    auth_info: Dict[str, Any] = Depends(verify_api_key),
+):
+    """Save (encrypted) the Canvas token used to sync this user's data."""
+    canvas_user_id = auth_info["user_id"]
+    try:
+        store_canvas_token(canvas_user_id, request.token)
+    except CanvasCredentialsError as e:
+        logger.error(f"Can't store Canvas token for user {canvas_user_id}: {e}")
+        raise HTTPException(status_code=500, detail="Canvas token storage is not configured")
+
+    # Drop the session built with the old token
+    canvas_sessions.evict(canvas_user_id)
+    async_canvas_clients.evict(canvas_user_id)
+    return {"status": "success"}
+
+
+@router.delete("/token")
+def remove_canvas_token(
+    auth_info: Dict[str, Any] = Depends(verify_api_key),
+):
+    """Delete this user's stored Canvas token."""
+    canvas_user_id = auth_info["user_id"]
+    if not delete_canvas_token(canvas_user_id):
+        raise HTTPException(status_code=404, detail="No Canvas token stored")
+
+    canvas_sessions.evict(canvas_user_id)
+    async_canvas_clients.evict(canvas_user_id)
+    return {"status": "success"}
+
+
 @router.post("/sync")
-async def sync_canvas(
+def sync_canvas(
+    time_budget: Optional[float] = Query(
+        None,
+        gt=0,
+        description="Seconds available; the sync stops early and returns a continuation_token if it runs out",
+    ),
+    continuation_token: Optional[str] = Query(
+        None, description="Resume a partial sync (skips the course list refresh)"
+    ),
     auth_info: Dict[str, Any] = Depends(verify_api_key),
 ):
+    """
+    Sync the user's courses and assignments from Canvas.
+
+    Runs in the threadpool, so open GET /events streams keep receiving its
+    progress while it runs.
+    """
     canvas_user_id = auth_info["user_id"]
+    started_at = time.monotonic()
+    publish_sync_progress(canvas_user_id, "started")
     try:
-        sync_courses_result = sync_user_courses(canvas_user_id)
-        sync_assignments_result = sync_user_assignments(canvas_user_id)
+        # All of this sync's Canvas requests share one retry budget
+        with canvas_retry_budget():
+            if continuation_token:
+                sync_courses_result = {"synced": 0, "message": "Skipped when resuming"}
+            else:
+                sync_courses_result = sync_user_courses(canvas_user_id)
+                publish_sync_progress(canvas_user_id, "courses", synced=sync_courses_result["synced"])
+
+            if time_budget is not None or continuation_token:
+                remaining_budget = None
+                if time_budget is not None:
+                    remaining_budget = max(0.0, time_budget - (time.monotonic() - started_at))
+                sync_assignments_result = sync_user_assignments_resumable(
+                    canvas_user_id, remaining_budget, continuation_token
+                )
+            else:
+                sync_assignments_result = sync_user_assignments(canvas_user_id)
 
+        publish_sync_progress(
+            canvas_user_id,
+            "finished",
+            complete=sync_assignments_result.get("complete", True),
+            assignments=sync_assignments_result["synced"],
+        )
+        # Push the changed IDs now rather than at the next poll
+        sync_events.poke()
         return {
-            "status": "success",
+            "status": "success" if sync_assignments_result.get("complete", True) else "partial",
             "courses": sync_courses_result,
             "assignments": sync_assignments_result,
             "message": (
@@ -33,16 +128,40 @@ async def sync_canvas(
             ),
         }
 
+    except InvalidContinuationToken:
+        publish_sync_progress(canvas_user_id, "failed", error="Unknown continuation token")
+        raise HTTPException(status_code=404, detail="Unknown continuation token")
+
+    except CanvasUnavailableError as e:
+        publish_sync_progress(canvas_user_id, "failed", error="Canvas unavailable")
+        # Circuit breaker is open: fail fast instead of waiting on timeouts
+        logger.warning(f"Canvas unavailable, not syncing user {canvas_user_id}: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Canvas API unavailable. Please try again later.",
+            headers={"Retry-After": str(max(1, round(e.retry_after)))},
+        )
+
     except CanvasAPIError as e:
         # Canvas API is down or unreachable
         logger.error(f"Canvas API error for user {canvas_user_id}: {e}")
+        publish_sync_progress(canvas_user_id, "failed", error="Canvas API error")
         raise HTTPException(
             status_code=502, detail="Canvas API unavailable. Please try again later."
         )
 
+    except CanvasCredentialsError as e:
+        # No token to sync with
+        logger.error(f"Canvas credentials error for user {canvas_user_id}: {e}")
+        publish_sync_progress(canvas_user_id, "failed", error="No Canvas token configured")
+        raise HTTPException(
+            status_code=400, detail="No Canvas token configured. Save one with PUT /canvas/token."
+        )
+
     except CanvasSyncError as e:
         # Internal sync/processing error
         logger.error(f"Sync error for user {canvas_user_id}: {e}")
+        publish_sync_progress(canvas_user_id, "failed", error="Sync failed")
         raise HTTPException(
             status_code=500, detail="Sync operation failed. Please contact support."
         )
@@ -50,6 +169,34 @@ async def sync_canvas(
     except Exception as e:
         # Unexpected error
         logger.error(f"Unexpected error syncing for user {canvas_user_id}: {e}")
+        publish_sync_progress(canvas_user_id, "failed", error="Unexpected error")
         raise HTTPException(
             status_code=500, detail="An unexpected error occurred during sync."
         )
+
+
+@router.get("/status")
+def get_canvas_status(
+    auth_info: Dict[str, Any] = Depends(verify_api_key),
+):
+    """Report whether Canvas is reachable and when this user last synced."""
+    state = canvas_circuit.state
+    return {
+        "canvas": "available" if state == "closed" else "unavailable",
+        "circuit_state": state,
+        "retry_after_seconds": canvas_circuit.seconds_until_retry() if state == "open" else 0.0,
+        "last_synced_at": get_last_synced_at(auth_info["user_id"]),
+    }
+
+
+@router.get("/sync/{continuation_token}")
+def get_sync_status(
+    continuation_token: str,
+    auth_info: Dict[str, Any] = Depends(verify_api_key),
+):
+    """Report progress of a time-budgeted sync run."""
+    canvas_user_id = auth_info["user_id"]
+    try:
+        return get_sync_progress(canvas_user_id, continuation_token)
+    except InvalidContinuationToken:
+        raise HTTPException(status_code=404, detail="Unknown continuation token")
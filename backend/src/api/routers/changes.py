@@ -0,0 +1,69 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Dict, Any
+
+import sqlalchemy
+from src.api.routers.courses import normalize_courses
+from src.models.changes import ChangeFeed
+from src.services.canvas_sync import query_assignments_changed_since
+from src.services.change_feed import (
+    ASSIGNMENT_ENTITY,
+    COURSE_ENTITY,
+    get_change_version,
+    query_tombstones,
+)
+from src import database as db
+from src.auth import verify_api_key
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+
+@router.get("", response_model=ChangeFeed)
+def get_changes(
+    since: int = Query(0, ge=0, description="Version from the previous response; 0 for everything"),
+    auth_info: Dict[str, Any] = Depends(verify_api_key),
+) -> ChangeFeed:
+    """
+    Get the user's courses and assignments that changed after a version.
+
+    Clients keep a local mirror by storing the returned version and passing
+    it as since next time; an unchanged mirror gets back empty lists.
+    """
+    canvas_user_id = auth_info["user_id"]
+    try:
+        with db.read_snapshot() as connection:
+            version = get_change_version(connection, canvas_user_id)
+            if since >= version:
+                return ChangeFeed(
+                    version=version,
+                    courses=[],
+                    assignments=[],
+                    deleted_course_ids=[],
+                    deleted_assignment_ids=[],
+                )
+
+            courses = connection.execute(
+                sqlalchemy.text("""
+                    SELECT canvas_course_id, course_name, course_code, term_id, term_name,
+                           term_start_at, term_end_at, is_active, is_subscribed
+                    FROM user_courses
+                    WHERE canvas_user_id = :user_id
+                      AND change_version > :since
+                """),
+                {"user_id": canvas_user_id, "since": since},
+            ).all()
+            assignments = query_assignments_changed_since(canvas_user_id, since, connection)
+            deleted = query_tombstones(canvas_user_id, since, connection)
+
+        return ChangeFeed(
+            version=version,
+            courses=normalize_courses(courses),
+            assignments=assignments,
+            deleted_course_ids=deleted[COURSE_ENTITY],
+            deleted_assignment_ids=deleted[ASSIGNMENT_ENTITY],
+        )
+    except Exception as e:
+        logger.error(f"Database error fetching changes for user {canvas_user_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve changes")
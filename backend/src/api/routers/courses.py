@@ -1,10 +1,14 @@
 from sqlite3 import Cursor
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import JSONResponse
+from typing import List, Dict, Any, Optional
 
 from sqlalchemy.engine import Connection
-from src.models.course import Course, Term
+from src.models.course import Course, CourseStats, Term
+from src.services.course_stats import get_course_stats
 from src.auth import verify_api_key
+from src.api.freshness import data_freshness
+from src.utils.fields import dump_fields, parse_fields, select_columns
 import src.database as db
 import sqlalchemy
 import logging
@@ -13,16 +17,42 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/courses", tags=["courses"])
 
+# Columns needed to serialize each public Course field
+COURSE_FIELD_COLUMNS: Dict[str, List[str]] = {
+    "id": ["canvas_course_id"],
+    "name": ["course_name"],
+    "course_code": ["course_code"],
+    "term": ["term_id", "term_name", "term_start_at", "term_end_at"],
+    "is_subscribed": ["is_subscribed"],
+    "is_active": ["is_active"],
+}
+
 
 @router.get("", response_model=List[Course])
 async def get_courses(
+    fields: Optional[str] = Query(
+        None, description="Comma-separated course fields to return (e.g. id,name)"
+    ),
     auth_info: Dict[str, Any] = Depends(verify_api_key),
-) -> List[Course]:
+    freshness: Dict[str, str] = Depends(data_freshness),
+):
     """
     Gets the user's canvas courses from the local db
     """
     canvas_user_id = auth_info["user_id"]
     try:
+        selected_fields = parse_fields(fields, COURSE_FIELD_COLUMNS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        if selected_fields:
+            # Partial objects don't fit response_model, so bypass it
+            return JSONResponse(
+                content=fetch_course_fields_from_db(canvas_user_id, selected_fields),
+                headers=freshness,
+            )
+
         denormalized_courses = fetch_courses_from_db(canvas_user_id)
         if not denormalized_courses:
             return []
@@ -34,18 +64,93 @@ async def get_courses(
         raise HTTPException(status_code=500, detail="Failed to retrieve courses")
 
 
+@router.get("/stats", response_model=List[CourseStats])
+def get_all_course_stats(
+    include_inactive: bool = Query(False, description="Include courses whose term has ended"),
+    auth_info: Dict[str, Any] = Depends(verify_api_key),
+):
+    """
+    Gets grade and workload totals for each of the user's courses.
+    """
+    canvas_user_id = auth_info["user_id"]
+    try:
+        with db.engine.connect() as connection:
+            return get_course_stats(canvas_user_id, connection, include_inactive=include_inactive)
+    except Exception as e:
+        logger.error(f"Database error fetching course stats for user {canvas_user_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve course stats")
+
+
+@router.get("/{course_id}/stats", response_model=CourseStats)
+def get_one_course_stats(
+    course_id: int,
+    auth_info: Dict[str, Any] = Depends(verify_api_key),
+):
+    """
+    Gets grade and workload totals for one of the user's courses.
+    """
+    canvas_user_id = auth_info["user_id"]
+    try:
+        with db.engine.connect() as connection:
+            stats = get_course_stats(canvas_user_id, connection, course_ids=[course_id], include_inactive=True)
+    except Exception as e:
+        logger.error(f"Database error fetching stats of course {course_id} for user {canvas_user_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve course stats")
+
+    if not stats:
+        raise HTTPException(status_code=404, detail="Course not found")
+    return stats[0]
+
+
 def fetch_courses_from_db(canvas_user_id: int):
     with db.engine.begin() as connection:
-        result = connection.execute(
-            sqlalchemy.text("""
-                SELECT canvas_course_id, course_name, course_code, term_id, term_name, term_start_at, is_active, is_subscribed
+        return get_user_courses(canvas_user_id, connection)
+
+
+def get_user_courses(canvas_user_id: int, connection: Connection):
+    """Fetches all of the user's course rows on the given connection."""
+    return connection.execute(
+        sqlalchemy.text("""
+            SELECT canvas_course_id, course_name, course_code, term_id, term_name, term_start_at, term_end_at, is_active, is_subscribed
+            FROM user_courses
+            WHERE canvas_user_id = :canvas_user_id
+        """),
+        {"canvas_user_id": canvas_user_id},
+    ).all()
+
+
+def fetch_course_fields_from_db(canvas_user_id: int, fields: List[str]) -> List[Dict[str, Any]]:
+    """Fetch only the requested course fields, as JSON-ready dicts."""
+    with db.engine.begin() as connection:
+        rows = connection.execute(
+            sqlalchemy.text(f"""
+                SELECT {select_columns(fields, COURSE_FIELD_COLUMNS)}
                 FROM user_courses
                 WHERE canvas_user_id = :canvas_user_id
             """),
             {"canvas_user_id": canvas_user_id},
         ).all()
 
-        return result
+    result = []
+    for row in rows:
+        values: Dict[str, Any] = {}
+        for field in fields:
+            if field == "term":
+                values[field] = (
+                    {
+                        "id": row.term_id,
+                        "name": row.term_name,
+                        "start_at": row.term_start_at,
+                        "end_at": row.term_end_at,
+                    }
+                    if row.term_id
+                    else None
+                )
+            else:
+                values[field] = getattr(row, COURSE_FIELD_COLUMNS[field][0])
+        result.append(dump_fields(Course, values))
+
+    return result
 
 
 def normalize_courses(courses) -> List[Course]:
@@ -56,7 +161,10 @@ def normalize_courses(courses) -> List[Course]:
         term = None
         if course.term_id:
             term = Term(
-                id=course.term_id, name=course.term_name, start_at=course.term_start_at
+                id=course.term_id,
+                name=course.term_name,
+                start_at=course.term_start_at,
+                end_at=course.term_end_at,
             )
 
         course_obj = Course(
@@ -64,7 +172,8 @@ def normalize_courses(courses) -> List[Course]:
             name=course.course_name,
             course_code=course.course_code,
             term=term,
-            is_subscribed=course.is_subscribed
+            is_subscribed=course.is_subscribed,
+            is_active=course.is_active
         )
         result.append(course_obj)
 
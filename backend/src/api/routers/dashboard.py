@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Dict, Any
+
+from src.api.routers.courses import get_user_courses, normalize_courses
+from src.api.routers.subscriptions import fetch_subscriptions_from_db, normalize_subscriptions
+from src.models.dashboard import Dashboard
+from src.services.canvas_sync import get_last_synced_at, query_assignments_for_active_courses
+from src import database as db
+from src.auth import verify_api_key
+from src.api.freshness import data_freshness
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+
+@router.get("", response_model=Dashboard)
+def get_dashboard(
+    auth_info: Dict[str, Any] = Depends(verify_api_key),
+    freshness: Dict[str, str] = Depends(data_freshness),
+) -> Dashboard:
+    """
+    Get courses, subscriptions and assignments in one response.
+
+    All three are read inside a single snapshot, so the page never shows
+    e.g. assignments from a sync the course list hasn't caught up with.
+    stale is set while Canvas is unavailable and the data can't be refreshed.
+    """
+    canvas_user_id = auth_info["user_id"]
+    try:
+        with db.read_snapshot() as connection:
+            courses = get_user_courses(canvas_user_id, connection)
+            subscriptions = fetch_subscriptions_from_db(canvas_user_id, connection)
+            assignments = query_assignments_for_active_courses(canvas_user_id, connection)
+            last_synced_at = get_last_synced_at(canvas_user_id, connection)
+
+        return Dashboard(
+            courses=normalize_courses(courses),
+            subscriptions=normalize_subscriptions(subscriptions),
+            assignments=assignments,
+            stale=bool(freshness),
+            last_synced_at=last_synced_at,
+        )
+    except Exception as e:
+        logger.error(f"Database error fetching dashboard for user {canvas_user_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve dashboard")
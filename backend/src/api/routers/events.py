@@ -0,0 +1,103 @@
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, Optional
+
+from src import database as db
+from src.auth import verify_feed_api_key
+from src.config import get_settings
+from src.services.change_feed import get_change_version, query_changed_ids
+from src.services.events import sync_events
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+settings = get_settings()
+
+# Browsers wait this long (ms) before reconnecting a dropped stream
+RECONNECT_MILLISECONDS = 5000
+
+
+@router.get("")
+async def stream_events(
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    # EventSource can't send headers, so browsers pass the key as ?key=
+    auth_info: Dict[str, Any] = Depends(verify_feed_api_key),
+):
+    """
+    Server-Sent Events stream of the user's sync progress and data changes.
+
+    Authenticates with the X-API-Key header or, for browser EventSource
+    clients, ?key=.
+
+    Events:
+        sync: {"phase": "started" | "courses" | "assignments" | "finished" | "failed", ...}
+        changes: {"version", "course_ids", "assignment_ids",
+                  "deleted_course_ids", "deleted_assignment_ids"}; fetch the
+                  rows with GET /changes?since=<your previous version>
+
+    changes events carry the change version as their id. A reconnecting
+    client that sends Last-Event-ID first gets one changes event covering
+    everything it missed.
+    """
+    canvas_user_id = auth_info["user_id"]
+    version = await asyncio.to_thread(read_change_version, canvas_user_id)
+
+    resume_from = None
+    if last_event_id is not None and last_event_id.isdigit() and int(last_event_id) < version:
+        resume_from = int(last_event_id)
+
+    return StreamingResponse(
+        event_stream(canvas_user_id, version, resume_from),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Don't let nginx buffer the stream
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+async def event_stream(canvas_user_id: int, version: int, resume_from: Optional[int]) -> AsyncIterator[str]:
+    # Subscribed only once the body starts, so a client that disconnects
+    # before then never leaves a subscription behind
+    subscription = sync_events.subscribe(canvas_user_id, version)
+    logger.info(f"Opened event stream for user {canvas_user_id} ({sync_events.subscriber_count()} open)")
+    try:
+        yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+
+        if resume_from is not None:
+            missed = await asyncio.to_thread(read_changed_ids, canvas_user_id, resume_from)
+            yield format_event({"event": "changes", "data": {"version": version, **missed}, "id": version})
+
+        while True:
+            event = await subscription.next_event(settings.EVENTS_HEARTBEAT_SECONDS)
+            if event is None:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+            else:
+                yield format_event(event)
+    finally:
+        sync_events.unsubscribe(subscription)
+
+
+def format_event(event: Dict[str, Any]) -> str:
+    lines = []
+    if event.get("id") is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['event']}")
+    lines.append(f"data: {json.dumps(event['data'], default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def read_change_version(canvas_user_id: int) -> int:
+    with db.engine.begin() as connection:
+        return get_change_version(connection, canvas_user_id)
+
+
+def read_changed_ids(canvas_user_id: int, since: int) -> Dict[str, Any]:
+    with db.read_snapshot() as connection:
+        return query_changed_ids(canvas_user_id, since, connection)
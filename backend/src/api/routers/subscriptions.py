@@ -1,13 +1,18 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import JSONResponse
+from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 import sqlalchemy
+from sqlalchemy.engine import Connection
 import logging
 
 from src.api.routers.courses import get_course_info
 from src import database as db
 from src.auth import verify_api_key
+from src.api.freshness import data_freshness
 from src.models.subscription import Subscription
+from src.services.change_feed import next_change_version
+from src.utils.fields import dump_fields, parse_fields, select_columns
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +22,14 @@ router = APIRouter(
 )
 
 
+# Columns needed to serialize each public Subscription field
+SUBSCRIPTION_FIELD_COLUMNS: Dict[str, List[str]] = {
+    "canvas_course_id": ["canvas_course_id"],
+    "course_name": ["course_name"],
+    "course_code": ["course_code"],
+}
+
+
 class ToggleSubscriptionRequest(BaseModel):
     is_subscribed: bool
 
@@ -43,13 +56,14 @@ def toggle_subscription(
             connection.execute(
                 sqlalchemy.text("""
                     UPDATE user_courses
-                    SET is_subscribed = :is_subscribed
+                    SET is_subscribed = :is_subscribed, change_version = :version
                     WHERE canvas_user_id = :canvas_user_id AND canvas_course_id = :canvas_course_id
                 """),
                 {
                     "canvas_user_id": user_id,
                     "canvas_course_id": course_id,
-                    "is_subscribed": request.is_subscribed  
+                    "is_subscribed": request.is_subscribed,
+                    "version": next_change_version(connection, user_id)
                 }
             )
             
@@ -79,7 +93,11 @@ def toggle_subscription(
 
 @router.get("", response_model=List[Subscription])
 def get_subscriptions(
+    fields: Optional[str] = Query(
+        None, description="Comma-separated subscription fields to return"
+    ),
     auth_info: Dict[str, Any] = Depends(verify_api_key),
+    freshness: Dict[str, str] = Depends(data_freshness),
 ):
     """
     Get all active course subscriptions.
@@ -87,29 +105,29 @@ def get_subscriptions(
     Returns a list of courses the user is subscribed to for notifications.
     """
     canvas_user_id = auth_info["user_id"]
+    try:
+        selected_fields = parse_fields(fields, SUBSCRIPTION_FIELD_COLUMNS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     try:
         with db.engine.begin() as connection:
-            params = {"canvas_user_id": canvas_user_id}
-            result = connection.execute(
-                sqlalchemy.text(
-                    """
-                    SELECT canvas_course_id, course_name, course_code
-                    FROM user_courses
-                    WHERE is_subscribed = TRUE AND canvas_user_id = :canvas_user_id
-                    ORDER BY course_name
-                    """
-                ),
-                params,
-            ).all()
-
-            return [
-                Subscription(
-                    canvas_course_id=sub.canvas_course_id,
-                    course_name=sub.course_name,
-                    course_code=sub.course_code,
+            result = fetch_subscriptions_from_db(canvas_user_id, connection, selected_fields)
+
+            if selected_fields:
+                # Partial objects don't fit response_model, so bypass it
+                return JSONResponse(
+                    content=[
+                        dump_fields(
+                            Subscription,
+                            {field: getattr(sub, field) for field in selected_fields},
+                        )
+                        for sub in result
+                    ],
+                    headers=freshness,
                 )
-                for sub in result
-            ]
+
+            return normalize_subscriptions(result)
 
     except Exception as e:
         logger.error(f"Database error in get_subscriptions: {e}")
@@ -118,3 +136,34 @@ def get_subscriptions(
             detail="Failed to retrieve subscriptions",
         )
 
+
+def fetch_subscriptions_from_db(
+    canvas_user_id: int, connection: Connection, fields: Optional[List[str]] = None
+):
+    """Fetches the user's subscribed courses, limited to the given fields if any."""
+    columns = select_columns(
+        fields or list(SUBSCRIPTION_FIELD_COLUMNS), SUBSCRIPTION_FIELD_COLUMNS
+    )
+    return connection.execute(
+        sqlalchemy.text(
+            f"""
+            SELECT {columns}
+            FROM user_courses
+            WHERE is_subscribed = TRUE AND canvas_user_id = :canvas_user_id
+            ORDER BY course_name
+            """
+        ),
+        {"canvas_user_id": canvas_user_id},
+    ).all()
+
+
+def normalize_subscriptions(subscriptions) -> List[Subscription]:
+    """Transform database rows into Subscription objects."""
+    return [
+        Subscription(
+            canvas_course_id=sub.canvas_course_id,
+            course_name=sub.course_name,
+            course_code=sub.course_code,
+        )
+        for sub in subscriptions
+    ]
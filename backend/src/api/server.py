@@ -1,14 +1,30 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+import time
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from src.api.routers import assignments
 from src.config import get_settings
-from src.api.routers import courses, subscriptions, canvas
+from src.api.routers import courses, subscriptions, canvas, dashboard, changes, events, archive, calendar
+from src.session import canvas_sessions
+from src.utils.canvas_async import close_canvas_loop
+from src.utils.metrics import REQUEST_LATENCY, render_metrics
 
 description = """
 im canned
 """
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close kept-alive Canvas connections on shutdown
+    close_canvas_loop()
+    canvas_sessions.close_all()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Canned",
     description=description,
     version="0.0.1",
@@ -38,6 +54,30 @@ app.add_middleware(
 
 settings = get_settings()
 
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started_at = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        # The route template, not the path, so IDs don't become label values
+        route = request.scope.get("route")
+        REQUEST_LATENCY.labels(
+            request.method, route.path if route is not None else "unmatched", status
+        ).observe(time.perf_counter() - started_at)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    """Prometheus metrics, combined across workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Canned!"}
@@ -45,4 +85,9 @@ async def root():
 app.include_router(courses.router)
 app.include_router(subscriptions.router)
 app.include_router(canvas.router)
-app.include_router(assignments.router)
\ No newline at end of file
+app.include_router(assignments.router)
+app.include_router(dashboard.router)
+app.include_router(changes.router)
+app.include_router(events.router)
+app.include_router(archive.router)
+app.include_router(calendar.router)
\ No newline at end of file
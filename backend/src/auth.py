@@ -1,58 +1,163 @@
 import os
-from typing import Dict, Any
-from fastapi import Header, HTTPException, status
+import hashlib
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from fastapi import Header, HTTPException, Query, status
 import secrets
 import logging
+import sqlalchemy
+from src import database as db
 
 logger = logging.getLogger(__name__)
 
+# Keys in ALLOWED_API_KEYS predate the api_keys table; they keep mapping
+# to the original users by position until they're moved into the table.
+LEGACY_KEY_USERS: List[Dict[str, Any]] = [
+    {"user_id": 1, "name": "Alex"},
+    {"user_id": 2, "name": "Sydney"},
+]
 
-def get_api_key_to_user_mapping() -> Dict[str, Dict[str, Any]]:
-    allowed_keys = os.getenv("ALLOWED_API_KEYS", "").strip()
-    if not allowed_keys:
-        raise ValueError("ALLOWED_API_KEYS environment variable not set")
+# Other workers only see creates/revokes after their index expires
+KEY_INDEX_TTL_SECONDS = float(os.getenv("API_KEY_CACHE_TTL_SECONDS", "300"))
+
+
+def hash_api_key(api_key: str) -> str:
+    """SHA-256 hex digest of an API key; only this is ever stored."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+class ApiKeyStore:
+    """
+    In-memory index of key hash -> user info, loaded from the api_keys table.
+
+    The index is built on first use and reused until it is invalidated
+    (on create/revoke in this process) or its TTL runs out, so requests
+    never re-read configuration or hit the database to authenticate.
+    """
+
+    def __init__(self, ttl_seconds: float = KEY_INDEX_TTL_SECONDS):
+        self._ttl_seconds = ttl_seconds
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        self._index = None
+
+    def lookup(self, api_key: str) -> Optional[Dict[str, Any]]:
+        """Return user info for a valid key, or None."""
+        return self._get_index().get(hash_api_key(api_key))
+
+    def _get_index(self) -> Dict[str, Dict[str, Any]]:
+        index = self._index
+        if index is not None and time.monotonic() - self._loaded_at < self._ttl_seconds:
+            return index
+
+        with self._lock:
+            if self._index is None or time.monotonic() - self._loaded_at >= self._ttl_seconds:
+                self._index = self._load_index()
+                self._loaded_at = time.monotonic()
+            return self._index
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        index: Dict[str, Dict[str, Any]] = _legacy_key_hashes()
 
+        with db.engine.begin() as connection:
+            rows = connection.execute(
+                sqlalchemy.text("""
+                    SELECT k.key_hash, k.canvas_user_id, u.name
+                    FROM api_keys k
+                    LEFT JOIN users u ON u.canvas_id = k.canvas_user_id
+                    WHERE k.revoked_at IS NULL
+                """)
+            ).all()
+
+        for row in rows:
+            index[row.key_hash] = {
+                "user_id": row.canvas_user_id,
+                "name": row.name or f"user {row.canvas_user_id}",
+            }
+
+        logger.info(f"Loaded {len(index)} API keys")
+        return index
+
+
+def _legacy_key_hashes() -> Dict[str, Dict[str, Any]]:
+    allowed_keys = os.getenv("ALLOWED_API_KEYS", "").strip()
     keys = [key.strip() for key in allowed_keys.split(",") if key.strip()]
-    if not keys:
-        raise ValueError("No valid API keys found in ALLOWED_API_KEYS")
 
-    if len(keys) != 2:
-        raise ValueError("Expected exactly 2 API keys")
+    if len(keys) > len(LEGACY_KEY_USERS):
+        logger.warning(
+            f"Ignoring {len(keys) - len(LEGACY_KEY_USERS)} extra ALLOWED_API_KEYS entries; "
+            "issue keys with `python -m src.cli.api_keys create` instead"
+        )
 
     return {
-        keys[0]: {"user_id": 1, "name": "Alex"},
-        keys[1]: {"user_id": 2, "name": "Sydney"},
+        hash_api_key(key): dict(user) for key, user in zip(keys, LEGACY_KEY_USERS)
     }
 
 
-async def verify_api_key(
-    x_api_key: str = Header(..., alias="X-API-Key"),
-) -> Dict[str, Any]:
+api_key_store = ApiKeyStore()
+
+
+def authenticate_api_key(api_key: Optional[str]) -> Dict[str, Any]:
+    """
+    Look up the user an API key belongs to.
+
+    Raises:
+        HTTPException: 401 for a missing or invalid key, 500 if keys can't be loaded
+    """
+    if not api_key:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or missing API key",
+        )
+
     try:
-        api_key_mapping = get_api_key_to_user_mapping()
-    except ValueError as e:
-        logger.error(f"API key configuration error: {e}")
+        user_info = api_key_store.lookup(api_key)
+    except Exception as e:
+        logger.error(f"API key store error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Authentication service unavailable",
         )
 
-    if x_api_key not in api_key_mapping:
-        logger.warning(f"Invalid API key attempt: {x_api_key[:8]}***")
+    if user_info is None:
+        logger.warning(f"Invalid API key attempt: {api_key[:8]}***")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or missing API key",
         )
 
-    user_info = api_key_mapping[x_api_key]
     logger.info(f"Authenticated user {user_info['user_id']} ({user_info['name']})")
     return user_info
 
 
+async def verify_api_key(
+    x_api_key: str = Header(..., alias="X-API-Key"),
+) -> Dict[str, Any]:
+    return authenticate_api_key(x_api_key)
+
+
+async def verify_feed_api_key(
+    key: Optional[str] = Query(None, description="API key, for clients that can't send headers"),
+    x_api_key: Optional[str] = Header(None, alias="X-API-Key"),
+) -> Dict[str, Any]:
+    """
+    Like verify_api_key, but also accepts the key as ?key=.
+
+    Only for clients that can't set headers: feeds that calendar apps
+    subscribe to by URL, and the browser EventSource behind /events. The
+    key then shows up in URLs and access logs, so keep it to read-only
+    endpoints.
+    """
+    return authenticate_api_key(x_api_key or key)
+
+
 def get_user_id_from_api_key(api_key: str) -> int | None:
     try:
-        api_key_mapping = get_api_key_to_user_mapping()
-        user_data = api_key_mapping.get(api_key)
+        user_data = api_key_store.lookup(api_key)
         if user_data:
             return user_data.get("user_id")
         return None
@@ -62,3 +167,37 @@ def get_user_id_from_api_key(api_key: str) -> int | None:
 
 def generate_api_key() -> str:
     return secrets.token_urlsafe(32)
+
+
+def create_api_key(canvas_user_id: int, name: Optional[str] = None) -> str:
+    """
+    Issue a new API key for a user.
+
+    Only the hash is stored, so the returned key can't be recovered later.
+    """
+    api_key = generate_api_key()
+    with db.engine.begin() as connection:
+        connection.execute(
+            sqlalchemy.text("""
+                INSERT INTO api_keys (key_hash, canvas_user_id, name)
+                VALUES (:key_hash, :canvas_user_id, :name)
+            """),
+            {"key_hash": hash_api_key(api_key), "canvas_user_id": canvas_user_id, "name": name},
+        )
+    api_key_store.invalidate()
+    return api_key
+
+
+def revoke_api_key(api_key: str) -> bool:
+    """Revoke an API key. Returns False if it wasn't an active key."""
+    with db.engine.begin() as connection:
+        result = connection.execute(
+            sqlalchemy.text("""
+                UPDATE api_keys
+                SET revoked_at = CURRENT_TIMESTAMP
+                WHERE key_hash = :key_hash AND revoked_at IS NULL
+            """),
+            {"key_hash": hash_api_key(api_key)},
+        )
+    api_key_store.invalidate()
+    return result.rowcount > 0
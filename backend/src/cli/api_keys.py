@@ -0,0 +1,38 @@
+"""
+Manage API keys.
+
+    python -m src.cli.api_keys create --user-id 12345 --name laptop
+    python -m src.cli.api_keys revoke <api-key>
+"""
+import argparse
+import sys
+
+from src.auth import create_api_key, revoke_api_key
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage API keys")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    create = subcommands.add_parser("create", help="Issue a new key for a user")
+    create.add_argument("--user-id", type=int, required=True, help="Canvas user ID")
+    create.add_argument("--name", help="Label for the key, e.g. the device it's for")
+
+    revoke = subcommands.add_parser("revoke", help="Revoke an existing key")
+    revoke.add_argument("api_key")
+
+    args = parser.parse_args()
+
+    if args.command == "create":
+        api_key = create_api_key(args.user_id, args.name)
+        print("Store this key now, it can't be shown again:")
+        print(api_key)
+    elif args.command == "revoke":
+        if not revoke_api_key(args.api_key):
+            print("No active key matched", file=sys.stderr)
+            sys.exit(1)
+        print("Key revoked")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Archive courses of finished terms, then ANALYZE (and VACUUM when worthwhile).
+
+    python -m src.cli.archive [--older-than-days 30] [--chunk-size 50] [--vacuum] [--once]
+
+Without --once it runs forever, archiving every --interval-hours. With
+--once it archives what's due now and exits, for cron or serverless
+schedules. VACUUM runs when enough of the SQLite file is free pages, or
+always with --vacuum.
+"""
+import argparse
+import time
+
+from src.config import get_settings
+from src.services.archival import optimize_database, run_archival
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Archive courses of finished terms")
+    parser.add_argument(
+        "--older-than-days",
+        type=float,
+        default=settings.ARCHIVE_AFTER_DAYS,
+        help="Archive inactive courses whose term ended this long ago",
+    )
+    parser.add_argument("--chunk-size", type=int, default=settings.ARCHIVE_CHUNK_SIZE, help="Courses per transaction")
+    parser.add_argument("--interval-hours", type=float, default=24)
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM even if little space would be reclaimed")
+    parser.add_argument("--once", action="store_true", help="Archive what's due now, then exit")
+    args = parser.parse_args()
+
+    while True:
+        stats = run_archival(older_than_days=args.older_than_days, chunk_size=max(1, args.chunk_size))
+        optimized = optimize_database(vacuum=True if args.vacuum else None)
+        print(
+            f"Archived {stats['courses']} courses and {stats['assignments']} assignments"
+            f"{' (vacuumed)' if optimized['vacuumed'] else ''}"
+        )
+        if args.once:
+            break
+        time.sleep(args.interval_hours * 3600)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Check (and optionally repair) the course_stats aggregates.
+
+    python -m src.cli.course_stats [--user-id ID] [--repair]
+
+Recomputes every (user, course) total from the assignment and submission
+rows and reports stored rows that disagree. With --repair, the
+disagreeing courses are recomputed in place. Exits with status 1 if
+mismatches were found (and not repaired).
+"""
+import argparse
+import sys
+
+from src import database as db
+from src.services.course_stats import find_inconsistent_course_stats, refresh_course_stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Course stats consistency check")
+    parser.add_argument("--user-id", type=int, help="Only check this Canvas user")
+    parser.add_argument("--repair", action="store_true", help="Recompute courses whose stats disagree")
+    args = parser.parse_args()
+
+    with db.engine.begin() as connection:
+        mismatches = find_inconsistent_course_stats(connection, args.user_id)
+        for mismatch in mismatches:
+            print(
+                f"User {mismatch['canvas_user_id']} course {mismatch['canvas_course_id']}: "
+                f"stored {mismatch['stored']}, expected {mismatch['expected']}"
+            )
+            if args.repair:
+                refresh_course_stats(connection, [mismatch["canvas_course_id"]], mismatch["canvas_user_id"])
+
+    print(f"{len(mismatches)} inconsistent course stats{' repaired' if args.repair and mismatches else ''}")
+    if mismatches and not args.repair:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
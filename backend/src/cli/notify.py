@@ -0,0 +1,39 @@
+"""
+Run the deadline notification engine.
+
+    python -m src.cli.notify [--batch-size 100] [--tick-seconds 60] [--once]
+
+Without --once it runs forever, sending 24hr, day_of and overdue reminders
+as assignments come due. With --once it sends whatever is due now and
+exits, for cron or serverless schedules. The sender comes from
+NOTIFICATION_SENDER ("log" logs instead of sending).
+"""
+import argparse
+import logging
+
+from src.config import get_settings
+from src.services.notifications import NotificationEngine
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Deadline notification engine")
+    parser.add_argument("--batch-size", type=int, default=settings.NOTIFICATION_BATCH_SIZE)
+    parser.add_argument(
+        "--tick-seconds",
+        type=float,
+        default=settings.NOTIFICATION_TICK_SECONDS,
+        help="Longest wait between checks for due reminders",
+    )
+    parser.add_argument("--once", action="store_true", help="Send what's due now, then exit")
+    args = parser.parse_args()
+    # The engine and the "log" sender report through logging
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    engine = NotificationEngine(batch_size=max(1, args.batch_size), tick_seconds=args.tick_seconds)
+    stats = engine.run(once=args.once)
+    print(f"Sent {stats['sent']} notifications ({stats['failed']} failed)")
+
+
+if __name__ == "__main__":
+    main()
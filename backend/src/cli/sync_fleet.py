@@ -0,0 +1,63 @@
+"""
+Sync every user's Canvas courses and assignments.
+
+    python -m src.cli.sync_fleet [--concurrency 8] [--user-id 1 --user-id 2] [--json]
+
+Run it from cron or a scheduler for periodic syncs.
+"""
+import argparse
+import json
+
+from src.config import get_settings
+from src.services.fleet_sync import run_fleet_sync
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Sync all users from Canvas")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.CANVAS_FETCH_CONCURRENCY * 2,
+        help="Max Canvas fetches in flight across all users",
+    )
+    parser.add_argument(
+        "--user-id",
+        type=int,
+        action="append",
+        dest="user_ids",
+        help="Only sync this Canvas user ID (repeatable)",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    report = run_fleet_sync(user_ids=args.user_ids, canvas_concurrency=max(1, args.concurrency))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    latency = report["latency_seconds"]
+    print(
+        f"Synced {report['succeeded']}/{report['users']} users in "
+        f"{report['elapsed_seconds']:.1f}s ({report['users_per_minute']:.1f} users/min)"
+    )
+    if report["not_connected"]:
+        print(f"Skipped {report['not_connected']} users without a Canvas token")
+    print(
+        f"Per-user latency: p50 {latency['p50']:.2f}s  p90 {latency['p90']:.2f}s  "
+        f"p99 {latency['p99']:.2f}s  max {latency['max']:.2f}s"
+    )
+    pages = report["canvas_page_latency_seconds"]
+    if pages["samples"]:
+        print(
+            f"Canvas page latency: p50 {pages['p50']:.3f}s  p95 {pages['p95']:.3f}s  "
+            f"p99 {pages['p99']:.3f}s  ({pages['samples']} pages)"
+        )
+    for result in report["results"]:
+        if result["error"]:
+            print(f"  user {result['canvas_user_id']} failed: {result['error']}")
+
+
+if __name__ == "__main__":
+    main()
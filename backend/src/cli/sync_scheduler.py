@@ -0,0 +1,43 @@
+"""
+Run the adaptive per-course sync scheduler.
+
+    python -m src.cli.sync_scheduler [--budget-per-minute 60] [--concurrency 4] [--once]
+
+Without --once it runs forever, syncing each course as it comes due.
+With --once it syncs whatever is due now (within budget) and exits, for
+cron or serverless schedules.
+"""
+import argparse
+import logging
+
+from src.config import get_settings
+from src.services.sync_scheduler import AdaptiveSyncScheduler
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Adaptive Canvas sync scheduler")
+    parser.add_argument(
+        "--budget-per-minute",
+        type=float,
+        default=60,
+        help="Canvas requests per minute shared by all users",
+    )
+    parser.add_argument("--concurrency", type=int, default=settings.CANVAS_FETCH_CONCURRENCY)
+    parser.add_argument("--reload-seconds", type=float, default=600)
+    parser.add_argument("--once", action="store_true", help="Sync what's due now, then exit")
+    args = parser.parse_args()
+    # The scheduler reports each sync through logging
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    scheduler = AdaptiveSyncScheduler(
+        budget_per_minute=args.budget_per_minute,
+        concurrency=max(1, args.concurrency),
+        reload_seconds=args.reload_seconds,
+    )
+    stats = scheduler.run(once=args.once)
+    print(f"Synced {stats['synced']} courses ({stats['failed']} failed)")
+
+
+if __name__ == "__main__":
+    main()
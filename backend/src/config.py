@@ -7,13 +7,55 @@ load_dotenv(dotenv_path="default.env", override=False)
 load_dotenv(dotenv_path=find_dotenv(".env"), override=True)
 
 class Settings:
+    # Token for the Canvas user who owns it (CANVAS_PAT_USER_ID), when they have no stored token
     CANVAS_PAT: str | None = os.getenv("CANVAS_PAT")
+    CANVAS_PAT_USER_ID: int | None = int(os.environ["CANVAS_PAT_USER_ID"]) if os.getenv("CANVAS_PAT_USER_ID") else None
     CANVAS_BASE_URL: str | None = os.getenv("CANVAS_BASE_URL")
+    CANVAS_TOKEN_ENCRYPTION_KEY: str | None = os.getenv("CANVAS_TOKEN_ENCRYPTION_KEY")
+    CANVAS_FETCH_CONCURRENCY: int = int(os.getenv("CANVAS_FETCH_CONCURRENCY", "4"))
+    CANVAS_SESSION_IDLE_SECONDS: float = float(os.getenv("CANVAS_SESSION_IDLE_SECONDS", "300"))
+    # Async (httpx) client: HTTP/2 multiplexing and connections per user
+    CANVAS_HTTP2: bool = os.getenv("CANVAS_HTTP2", "true").lower() in ("1", "true", "yes")
+    CANVAS_MAX_CONNECTIONS: int = int(os.getenv("CANVAS_MAX_CONNECTIONS", os.getenv("CANVAS_FETCH_CONCURRENCY", "4")))
+    CANVAS_REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("CANVAS_REQUEST_TIMEOUT_SECONDS", "10"))
+    # Retries per request, and retries (plus hedges) per sync
+    CANVAS_MAX_RETRIES: int = int(os.getenv("CANVAS_MAX_RETRIES", "3"))
+    CANVAS_RETRY_BUDGET: int = int(os.getenv("CANVAS_RETRY_BUDGET", "20"))
+    CANVAS_HEDGE_REQUESTS: bool = os.getenv("CANVAS_HEDGE_REQUESTS", "false").lower() in ("1", "true", "yes")
+    # Fail fast after this many consecutive Canvas failures, probing again after the reset time
+    CANVAS_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CANVAS_CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CANVAS_CIRCUIT_RESET_SECONDS: float = float(os.getenv("CANVAS_CIRCUIT_RESET_SECONDS", "30"))
+    # How long a course's shared assignment data is reused before refetching it
+    COURSE_ASSIGNMENT_CACHE_SECONDS: float = float(os.getenv("COURSE_ASSIGNMENT_CACHE_SECONDS", "900"))
+    # GET /events: how often each worker checks subscribed users for changes, and keep-alive interval
+    EVENTS_POLL_SECONDS: float = float(os.getenv("EVENTS_POLL_SECONDS", "2"))
+    EVENTS_HEARTBEAT_SECONDS: float = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+    # Deadline notifications: "log" or "package.module:SenderClass", and how reminders are timed
+    NOTIFICATION_SENDER: str = os.getenv("NOTIFICATION_SENDER", "log")
+    NOTIFICATION_BATCH_SIZE: int = int(os.getenv("NOTIFICATION_BATCH_SIZE", "100"))
+    NOTIFICATION_TICK_SECONDS: float = float(os.getenv("NOTIFICATION_TICK_SECONDS", "60"))
+    NOTIFICATION_DAY_OF_HOURS: float = float(os.getenv("NOTIFICATION_DAY_OF_HOURS", "6"))
+    NOTIFICATION_OVERDUE_HOURS: float = float(os.getenv("NOTIFICATION_OVERDUE_HOURS", "24"))
+    # Archival: move inactive courses this long past their term's end out of the hot tables
+    ARCHIVE_AFTER_DAYS: float = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+    ARCHIVE_CHUNK_SIZE: int = int(os.getenv("ARCHIVE_CHUNK_SIZE", "50"))
+    # VACUUM the SQLite file once this share of its pages is free
+    VACUUM_FREE_RATIO: float = float(os.getenv("VACUUM_FREE_RATIO", "0.2"))
+    # GET /calendar.ics: rendered feeds kept in memory per worker
+    CALENDAR_CACHE_USERS: int = int(os.getenv("CALENDAR_CACHE_USERS", "1000"))
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./canned.db")
 
     def __init__(self):
-        if not self.CANVAS_PAT:
-            raise ValueError("CANVAS_PAT is missing in the environment variables.")
+        if not self.CANVAS_PAT and not self.CANVAS_TOKEN_ENCRYPTION_KEY:
+            raise ValueError(
+                "Set CANVAS_PAT or CANVAS_TOKEN_ENCRYPTION_KEY (for per-user tokens) "
+                "in the environment variables."
+            )
+
+        if self.CANVAS_PAT and self.CANVAS_PAT_USER_ID is None:
+            raise ValueError(
+                "CANVAS_PAT_USER_ID is missing: set it to the Canvas user ID that CANVAS_PAT belongs to."
+            )
 
         if not self.CANVAS_BASE_URL:
             raise ValueError("CANVAS_BASE_URL is missing in the environment variables.")
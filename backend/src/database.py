@@ -1,4 +1,8 @@
+from contextlib import contextmanager
+from typing import Iterator
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection
 from src.config import get_settings
 
 settings = get_settings()
@@ -15,3 +19,24 @@ if connection_url.startswith("sqlite"):
 else:
     # Keep it simple - just support SQLite for now
     engine = create_engine(connection_url)
+
+
+@contextmanager
+def read_snapshot() -> Iterator[Connection]:
+    """
+    Open a connection whose reads all see one consistent snapshot.
+
+    Use for endpoints that combine several SELECTs into one response.
+    """
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as connection:
+            # pysqlite doesn't emit BEGIN until the first write, so open the
+            # read transaction ourselves; it is rolled back on close
+            connection.exec_driver_sql("BEGIN")
+            yield connection
+    else:
+        with engine.connect().execution_options(
+            isolation_level="REPEATABLE READ"
+        ) as connection:
+            with connection.begin():
+                yield connection
@@ -0,0 +1,45 @@
+"""
+Schemas for the Canvas API payloads we decode.
+
+Only the fields the sync uses are declared; everything else Canvas sends
+(rubrics, lock info, permissions, ...) is skipped while decoding. Required
+fields match what the sync has always required, so an item missing one
+fails validation instead of being checked by hand.
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, TypeAdapter
+
+
+class CanvasSubmissionPayload(BaseModel):
+    """A submission, embedded in an assignment or from /students/submissions."""
+    id: int
+    assignment_id: int
+    workflow_state: str
+    score: Optional[float] = None
+    grade: Optional[str] = None
+    submitted_at: Optional[datetime] = None
+    late: bool = False
+    missing: bool = False
+    # Due date that applies to this student (only on /students/submissions)
+    cached_due_date: Optional[datetime] = None
+
+
+class CanvasAssignmentPayload(BaseModel):
+    """An assignment from /courses/{id}/assignments?include[]=submission."""
+    id: int
+    course_id: int
+    name: str
+    html_url: str
+    submission: CanvasSubmissionPayload
+    submission_types: List[str]
+    description: Optional[str] = None
+    points_possible: Optional[float] = None
+    due_at: Optional[datetime] = None
+    grading_type: Optional[str] = None
+
+
+# Whole pages are validated straight from the response bytes
+assignment_page_adapter = TypeAdapter(List[CanvasAssignmentPayload])
+submission_page_adapter = TypeAdapter(List[CanvasSubmissionPayload])
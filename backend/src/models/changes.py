@@ -0,0 +1,24 @@
+"""
+Change feed model: everything that changed for a user after a version.
+"""
+from typing import List
+from pydantic import BaseModel
+
+from src.models.assignment import Assignment
+from src.models.course import Course
+
+
+class ChangeFeed(BaseModel):
+    """
+    Rows changed after the requested version, read from one snapshot.
+
+    Apply deletions first, then upsert the returned rows: a row deleted and
+    later re-created is returned in full alongside its older tombstone.
+    """
+    # Pass as ?since= on the next request
+    version: int
+    courses: List[Course]
+    # Includes assignments of inactive courses, with their submission
+    assignments: List[Assignment]
+    deleted_course_ids: List[int]
+    deleted_assignment_ids: List[int]
@@ -2,7 +2,7 @@
 Course-related models for Canvas API entities.
 """
 from datetime import datetime, timezone
-from pydantic import BaseModel, computed_field
+from pydantic import BaseModel
 from typing import Optional
 
 QUARTER_LENGTH_WEEKS = 10
@@ -16,7 +16,47 @@ class Term(BaseModel):
     id: int
     name: str    # "Fall Quarter 2023"
     start_at: Optional[datetime]
-    # Omitting: start_at, end_at, created_at, workflow_state, grading_period_group_id
+    end_at: Optional[datetime] = None
+    # Omitting: created_at, workflow_state, grading_period_group_id
+
+
+def is_term_active(term: Optional[Term], now: Optional[datetime] = None) -> bool:
+    """
+    Determine if a course in this term is currently active.
+
+    Uses the term's real end date when Canvas provides one. Otherwise
+    assumes a standard academic term length + buffer period from start_at:
+    - QUARTER_LENGTH_WEEKS (default: 10)
+    - SEMESTER_LENGTH_WEEKS (default: 15)
+    - BUFFER_WEEKS (default: 3)
+
+    Args:
+        term: Course term, if any
+        now: Current time (default: now in UTC)
+
+    Returns:
+        True if the course is active, False if it has (likely) completed
+    """
+    if not term or not term.start_at:
+        # No term data - treat as inactive
+        return False
+
+    now = now or datetime.now(timezone.utc)
+
+    if term.end_at:
+        end_date = term.end_at
+        if end_date.tzinfo is None:
+            end_date = end_date.replace(tzinfo=timezone.utc)
+        return now <= end_date
+
+    # Ensure start_at is timezone-aware
+    start_date = term.start_at
+    if start_date.tzinfo is None:
+        start_date = start_date.replace(tzinfo=timezone.utc)
+
+    days_since_start = (now - start_date).days
+
+    return days_since_start <= DEFAULT_TERM_LENGTH_DAYS
 
 
 class Course(BaseModel):
@@ -26,35 +66,22 @@ class Course(BaseModel):
     course_code: str = "UNKNOWN"
     term: Optional[Term] = None
     is_subscribed: bool = False
+    # Stored in user_courses; set from term dates when the course is synced
+    is_active: bool = False
+
 
-    @computed_field
-    @property
-    def is_active(self) -> bool:
-        """
-        Determine if course is currently active based on term start date.
-        
-        Assumes standard academic term length + buffer period.
-        Configure via environment variables:
-        - QUARTER_LENGTH_WEEKS (default: 10)
-        - SEMESTER_LENGTH_WEEKS (default: 15)
-        - BUFFER_WEEKS (default: 3)
-        
-        Returns:
-            True if course is likely active, False if likely completed
-        """
-        if not self.term or not self.term.start_at:
-            # No term data - assume active (safety default)
-            return False
-        
-        now = datetime.now(timezone.utc)
-        
-        # Ensure start_at is timezone-aware
-        start_date = self.term.start_at
-        if start_date.tzinfo is None:
-            start_date = start_date.replace(tzinfo=timezone.utc)
-        
-        days_since_start = (now - start_date).days
-    
-        term_length_days = DEFAULT_TERM_LENGTH_DAYS
-        
-        return days_since_start <= term_length_days
\ No newline at end of file
+class CourseStats(BaseModel):
+    """A user's grade and workload totals for one course."""
+    course_id: int
+    assignment_count: int = 0
+    # Points of all graded assignments, and of those that have a score
+    points_possible: float = 0
+    points_graded: float = 0
+    points_earned: float = 0
+    submitted_count: int = 0
+    # Submitted in Canvas or marked complete locally
+    completed_count: int = 0
+    missing_count: int = 0
+    late_count: int = 0
+    # Unfinished assignments due in the next 7 days
+    due_this_week: int = 0
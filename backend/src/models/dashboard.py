@@ -0,0 +1,20 @@
+"""
+Dashboard model combining the data the frontend loads on page load.
+"""
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+from src.models.assignment import Assignment
+from src.models.course import Course
+from src.models.subscription import Subscription
+
+
+class Dashboard(BaseModel):
+    """Courses, subscriptions and active-course assignments from one snapshot."""
+    courses: List[Course]
+    subscriptions: List[Subscription]
+    assignments: List[Assignment]
+    # True while Canvas is unavailable, so the data can't be refreshed
+    stale: bool = False
+    last_synced_at: Optional[datetime] = None
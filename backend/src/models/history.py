@@ -0,0 +1,23 @@
+"""
+Submission history models: how a submission's grade and state changed over time.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+
+class SubmissionChange(BaseModel):
+    """One sync's changes to a submission."""
+    assignment_id: int
+    recorded_at: datetime
+    # New values of the fields that changed (all fields on a submission's first entry)
+    changes: Dict[str, Any]
+    # Values of the same fields before the change; empty on the first entry
+    previous: Dict[str, Any]
+
+
+class SubmissionTimeline(BaseModel):
+    """A page of submission changes, newest first."""
+    changes: List[SubmissionChange]
+    # Pass as ?cursor= for the next page; None on the last page
+    next_cursor: Optional[str] = None
@@ -0,0 +1,17 @@
+"""
+Assignment search results.
+"""
+from typing import List, Optional
+from pydantic import BaseModel
+
+from src.models.assignment import Assignment
+
+
+class AssignmentSearchResults(BaseModel):
+    """One page of search matches, best match first."""
+    query: str
+    assignments: List[Assignment]
+    offset: int
+    limit: int
+    # Pass as ?offset= for the next page; None on the last page
+    next_offset: Optional[int] = None
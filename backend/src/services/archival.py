@@ -0,0 +1,232 @@
+"""
+Archival of finished terms, to keep the hot tables sized to current terms.
+
+Courses that have been inactive since their term ended ARCHIVE_AFTER_DAYS
+ago are moved, with their assignments and submissions, from
+user_courses / user_assignments / user_submissions into the archived_*
+tables. Each chunk of courses moves in its own transaction, so a run
+never holds the write lock for long and can stop at any chunk.
+
+Archived rows leave the change feed as deletions (tombstones), so client
+mirrors drop them too; history views read them back on demand from the
+archive tables (GET /archive/...). Shared course_assignments rows and
+submission_history stay where they are.
+
+After archiving, optimize_database refreshes planner statistics and
+reclaims the freed pages when enough of the file is free.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import sqlalchemy
+from sqlalchemy.engine import Connection
+
+from src import database as db
+from src.config import get_settings
+from src.models.assignment import Assignment
+from src.services.canvas_sync import ASSIGNMENT_ROW_COLUMNS, assignment_from_row
+from src.services.change_feed import (
+    ASSIGNMENT_ENTITY,
+    COURSE_ENTITY,
+    next_change_version,
+    record_tombstones,
+)
+from src.utils.dates import to_db
+
+settings = get_settings()
+
+HOT_TABLES = ("user_courses", "user_assignments", "user_submissions")
+
+
+def find_archivable_courses(connection: Connection, cutoff: datetime, limit: int) -> List[Tuple[int, int]]:
+    """
+    (canvas_user_id, canvas_course_id) of inactive courses whose term ended before cutoff.
+
+    Courses without an end date count from their term's start instead.
+    """
+    rows = connection.execute(
+        sqlalchemy.text("""
+            SELECT canvas_user_id, canvas_course_id
+            FROM user_courses
+            WHERE is_active = 0
+              AND COALESCE(term_end_at, term_start_at) < :cutoff
+            ORDER BY canvas_user_id, canvas_course_id
+            LIMIT :limit
+        """),
+        {"cutoff": to_db(cutoff), "limit": limit}
+    ).all()
+    return [(row.canvas_user_id, row.canvas_course_id) for row in rows]
+
+
+def archive_user_courses(connection: Connection, canvas_user_id: int, course_ids: List[int]) -> Dict[str, int]:
+    """
+    Move one user's courses, with their assignments and submissions, to the archive tables.
+
+    Runs in the caller's transaction. A course archived before (and since
+    re-synced) replaces its older archived copy.
+
+    Returns:
+        Dict with counts of archived courses and assignments
+    """
+    params = {"user_id": canvas_user_id, "course_ids": course_ids}
+
+    def execute(sql: str):
+        return connection.execute(
+            sqlalchemy.text(sql).bindparams(sqlalchemy.bindparam("course_ids", expanding=True)),
+            params
+        )
+
+    assignment_ids = execute("""
+        SELECT canvas_assignment_id FROM user_assignments
+        WHERE canvas_user_id = :user_id AND canvas_course_id IN :course_ids
+    """).scalars().all()
+
+    execute("""
+        DELETE FROM archived_submissions
+        WHERE canvas_user_id = :user_id
+          AND canvas_assignment_id IN (
+              SELECT canvas_assignment_id FROM archived_assignments
+              WHERE canvas_user_id = :user_id AND canvas_course_id IN :course_ids
+          )
+    """)
+    for table in ("archived_assignments", "archived_courses"):
+        execute(f"DELETE FROM {table} WHERE canvas_user_id = :user_id AND canvas_course_id IN :course_ids")
+
+    execute("""
+        INSERT INTO archived_courses
+            (canvas_user_id, canvas_course_id, course_name, course_code, term_id, term_name,
+             term_start_at, term_end_at, is_subscribed)
+        SELECT canvas_user_id, canvas_course_id, course_name, course_code, term_id, term_name,
+               term_start_at, term_end_at, is_subscribed
+        FROM user_courses
+        WHERE canvas_user_id = :user_id AND canvas_course_id IN :course_ids
+    """)
+    execute("""
+        INSERT INTO archived_assignments (canvas_user_id, canvas_assignment_id, canvas_course_id, course_name, due_at)
+        SELECT canvas_user_id, canvas_assignment_id, canvas_course_id, course_name, due_at
+        FROM user_assignments
+        WHERE canvas_user_id = :user_id AND canvas_course_id IN :course_ids
+    """)
+    execute("""
+        INSERT INTO archived_submissions
+            (canvas_user_id, canvas_assignment_id, canvas_submission_id, workflow_state, score, grade,
+             submitted_at, late, missing, is_locally_complete, locally_completed_at)
+        SELECT s.canvas_user_id, s.canvas_assignment_id, s.canvas_submission_id, s.workflow_state, s.score,
+               s.grade, s.submitted_at, s.late, s.missing, s.is_locally_complete, s.locally_completed_at
+        FROM user_submissions s
+        INNER JOIN user_assignments a
+            ON a.canvas_assignment_id = s.canvas_assignment_id
+            AND a.canvas_user_id = s.canvas_user_id
+        WHERE a.canvas_user_id = :user_id AND a.canvas_course_id IN :course_ids
+    """)
+
+    # Children first: SQLite only cascades when foreign keys are enabled
+    execute("""
+        DELETE FROM user_submissions
+        WHERE canvas_user_id = :user_id
+          AND canvas_assignment_id IN (
+              SELECT canvas_assignment_id FROM user_assignments
+              WHERE canvas_user_id = :user_id AND canvas_course_id IN :course_ids
+          )
+    """)
+    for table in ("user_assignments", "course_stats", "sync_schedule", "user_courses"):
+        execute(f"DELETE FROM {table} WHERE canvas_user_id = :user_id AND canvas_course_id IN :course_ids")
+
+    version = next_change_version(connection, canvas_user_id)
+    record_tombstones(connection, canvas_user_id, ASSIGNMENT_ENTITY, assignment_ids, version)
+    record_tombstones(connection, canvas_user_id, COURSE_ENTITY, course_ids, version)
+    return {"courses": len(course_ids), "assignments": len(assignment_ids)}
+
+
+def run_archival(
+    older_than_days: float = settings.ARCHIVE_AFTER_DAYS,
+    chunk_size: int = settings.ARCHIVE_CHUNK_SIZE,
+    now: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """
+    Archive every course whose term ended more than older_than_days ago.
+
+    Each chunk of up to chunk_size courses is one transaction.
+
+    Returns:
+        Dict with counts of archived courses and assignments
+    """
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=older_than_days)
+    totals = {"courses": 0, "assignments": 0}
+    while True:
+        with db.engine.begin() as connection:
+            courses = find_archivable_courses(connection, cutoff, chunk_size)
+            by_user: Dict[int, List[int]] = {}
+            for canvas_user_id, course_id in courses:
+                by_user.setdefault(canvas_user_id, []).append(course_id)
+            for canvas_user_id, course_ids in by_user.items():
+                counts = archive_user_courses(connection, canvas_user_id, course_ids)
+                for key, count in counts.items():
+                    totals[key] += count
+        if len(courses) < chunk_size:
+            break
+    return totals
+
+
+def optimize_database(vacuum: Optional[bool] = None) -> Dict[str, bool]:
+    """
+    Refresh planner statistics, and VACUUM if enough of the database is free space.
+
+    Args:
+        vacuum: Force (True) or skip (False) the VACUUM; by default it runs
+            when at least VACUUM_FREE_RATIO of the SQLite file is free pages.
+            On Postgres, VACUUM only reclaims dead rows for reuse and is cheap,
+            so it always runs unless skipped.
+
+    Returns:
+        Dict saying whether ANALYZE and VACUUM ran
+    """
+    # VACUUM can't run inside a transaction
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if connection.dialect.name == "sqlite":
+            if vacuum is None:
+                page_count = connection.exec_driver_sql("PRAGMA page_count").scalar() or 0
+                free_pages = connection.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+                vacuum = page_count > 0 and free_pages / page_count >= settings.VACUUM_FREE_RATIO
+            if vacuum:
+                connection.exec_driver_sql("VACUUM")
+            connection.exec_driver_sql("ANALYZE")
+        else:
+            vacuum = vacuum is not False
+            tables = ", ".join(HOT_TABLES)
+            connection.exec_driver_sql(f"VACUUM (ANALYZE) {tables}" if vacuum else f"ANALYZE {tables}")
+    return {"analyzed": True, "vacuumed": bool(vacuum)}
+
+
+def get_archived_courses(canvas_user_id: int, connection: Connection):
+    """Fetches the user's archived course rows, newest term first, shaped like user_courses rows."""
+    return connection.execute(
+        sqlalchemy.text("""
+            SELECT canvas_course_id, course_name, course_code, term_id, term_name,
+                   term_start_at, term_end_at, FALSE AS is_active, is_subscribed
+            FROM archived_courses
+            WHERE canvas_user_id = :user_id
+            ORDER BY term_start_at DESC, canvas_course_id
+        """),
+        {"user_id": canvas_user_id}
+    ).all()
+
+
+def query_archived_assignments(canvas_user_id: int, course_id: int, connection: Connection) -> List[Assignment]:
+    """Read an archived course's assignments with their submissions, by due date."""
+    rows = connection.execute(
+        sqlalchemy.text(f"""
+            SELECT {ASSIGNMENT_ROW_COLUMNS}
+            FROM archived_assignments a
+            INNER JOIN course_assignments ca
+                ON ca.canvas_assignment_id = a.canvas_assignment_id
+            LEFT JOIN archived_submissions s
+                ON a.canvas_assignment_id = s.canvas_assignment_id
+                AND a.canvas_user_id = s.canvas_user_id
+            WHERE a.canvas_user_id = :user_id
+              AND a.canvas_course_id = :course_id
+            ORDER BY a.due_at, a.canvas_assignment_id
+        """),
+        {"user_id": canvas_user_id, "course_id": course_id}
+    ).all()
+    return [assignment_from_row(row) for row in rows]
@@ -0,0 +1,256 @@
+"""
+Per-user iCalendar (ICS) feed of assignment deadlines, cached by change version.
+
+Calendar apps poll subscribed feeds often, and almost every poll finds
+nothing new. Each feed is therefore cached in memory under the user's
+change version (users.change_version, bumped by every write to their
+courses, assignments and submissions):
+
+- A poll whose ETag matches the current version costs one primary-key
+  lookup and gets a 304.
+- A version change re-renders only the assignments that changed since the
+  cached version (and drops deleted ones via their tombstones); the other
+  events are reused as rendered text.
+- The body and its gzip encoding are built once per version.
+
+The ETag is weak: DTSTAMP records when an event was rendered, so workers
+can serve byte-different but equivalent bodies for one version.
+"""
+import gzip
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, Optional, Tuple
+
+import sqlalchemy
+from sqlalchemy.engine import Connection
+
+from src.config import get_settings
+from src.models.assignment import Assignment
+from src.services.canvas_sync import query_assignments_changed_since
+from src.services.change_feed import ASSIGNMENT_ENTITY, get_change_version, query_tombstones
+from src.services.notifications import DONE_WORKFLOW_STATES
+from src.utils.dates import as_utc
+from src.utils.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PRODUCT_ID = "-//Canned//Assignment Deadlines//EN"
+
+
+def feed_etag(canvas_user_id: int, version: int) -> str:
+    return f'W/"{canvas_user_id}.{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison)."""
+    if not if_none_match:
+        return False
+    tag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == tag:
+            return True
+    return False
+
+
+def _escape(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Fold a content line to 75 octets per line, as RFC 5545 requires."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    start = 0
+    limit = 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Don't split a multi-byte character
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode("utf-8"))
+        start = end
+        # Continuation lines start with a space, which counts toward the limit
+        limit = 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _format_time(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_event(canvas_user_id: int, assignment: Assignment, due_at: datetime, stamp: datetime) -> str:
+    """One VEVENT for an assignment's deadline (due_at, since only dated assignments get one)."""
+    done = (
+        assignment.submission.is_locally_complete
+        or assignment.submission.workflow_state in DONE_WORKFLOW_STATES
+    )
+    summary = f"{assignment.name} ({assignment.course_name})"
+    if done:
+        summary = f"[Done] {summary}"
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:assignment-{assignment.id}-{canvas_user_id}@canned",
+        f"DTSTAMP:{_format_time(stamp)}",
+        # No DTEND: a deadline is a point in time
+        f"DTSTART:{_format_time(as_utc(due_at))}",
+        f"SUMMARY:{_escape(summary)}",
+        f"DESCRIPTION:{_escape(assignment.html_url)}",
+        f"URL:{assignment.html_url}",
+        f"CATEGORIES:{_escape(assignment.course_name)}",
+        "TRANSP:TRANSPARENT",
+        "END:VEVENT",
+    ]
+    return "".join(_fold(line) for line in lines)
+
+
+@dataclass
+class CalendarFeed:
+    """A user's rendered feed at one change version."""
+    canvas_user_id: int
+    version: int
+    # Assignment ID -> (course ID, rendered VEVENT), for every dated assignment
+    events: Dict[int, Tuple[int, str]]
+    active_course_ids: FrozenSet[int]
+    body: bytes = b""
+    _gzipped: Optional[bytes] = field(default=None, repr=False)
+
+    @property
+    def etag(self) -> str:
+        return feed_etag(self.canvas_user_id, self.version)
+
+    @property
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            # mtime=0 keeps the encoding identical across workers
+            self._gzipped = gzip.compress(self.body, mtime=0)
+        return self._gzipped
+
+
+def assemble_feed(feed: CalendarFeed) -> None:
+    """Join the events of the feed's active courses into its body."""
+    events = [
+        text for _, (course_id, text) in sorted(feed.events.items())
+        if course_id in feed.active_course_ids
+    ]
+    feed.body = (
+        "BEGIN:VCALENDAR\r\n"
+        "VERSION:2.0\r\n"
+        f"PRODID:{PRODUCT_ID}\r\n"
+        "CALSCALE:GREGORIAN\r\n"
+        "METHOD:PUBLISH\r\n"
+        "X-WR-CALNAME:Canned deadlines\r\n"
+        + "".join(events)
+        + "END:VCALENDAR\r\n"
+    ).encode("utf-8")
+    feed._gzipped = None
+
+
+class CalendarFeedCache:
+    """
+    LRU cache of rendered feeds, one per user.
+
+    Feeds are replaced, never mutated, so a request can keep serving the
+    feed it looked up while another thread builds the next version.
+    """
+
+    def __init__(self, max_users: int = settings.CALENDAR_CACHE_USERS):
+        self._max_users = max_users
+        self._feeds: "OrderedDict[int, CalendarFeed]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, canvas_user_id: int) -> Optional[CalendarFeed]:
+        with self._lock:
+            feed = self._feeds.get(canvas_user_id)
+            if feed is not None:
+                self._feeds.move_to_end(canvas_user_id)
+            return feed
+
+    def put(self, feed: CalendarFeed) -> None:
+        with self._lock:
+            current = self._feeds.get(feed.canvas_user_id)
+            # A slower request may finish building an older version last
+            if current is not None and current.version > feed.version:
+                return
+            self._feeds[feed.canvas_user_id] = feed
+            self._feeds.move_to_end(feed.canvas_user_id)
+            while len(self._feeds) > self._max_users:
+                self._feeds.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._feeds.clear()
+
+    def get_feed(self, canvas_user_id: int, connection: Connection, version: Optional[int] = None) -> CalendarFeed:
+        """
+        The user's feed at their current change version, updated incrementally if stale.
+
+        Args:
+            connection: Read snapshot, so the version and rows agree
+            version: The user's change version, if the caller already read it
+        """
+        if version is None:
+            version = get_change_version(connection, canvas_user_id)
+        cached = self.get(canvas_user_id)
+        if cached is not None and cached.version == version:
+            record_cache("calendar_feed", hit=True)
+            return cached
+        record_cache("calendar_feed", hit=False)
+
+        incremental = cached is not None and cached.version < version
+        # Rows untouched since change versions were introduced are at version 0
+        since = -1
+        events: Dict[int, Tuple[int, str]] = {}
+        if cached is not None and incremental:
+            since = cached.version
+            events = dict(cached.events)
+        stamp = datetime.now(timezone.utc)
+
+        if incremental:
+            deleted = query_tombstones(canvas_user_id, since, connection)[ASSIGNMENT_ENTITY]
+            for assignment_id in deleted:
+                events.pop(assignment_id, None)
+        for assignment in query_assignments_changed_since(canvas_user_id, since, connection):
+            if assignment.due_at is None:
+                events.pop(assignment.id, None)
+            else:
+                events[assignment.id] = (
+                    assignment.course_id, render_event(canvas_user_id, assignment, assignment.due_at, stamp)
+                )
+
+        active_course_ids = frozenset(connection.execute(
+            sqlalchemy.text("""
+                SELECT canvas_course_id FROM user_courses
+                WHERE canvas_user_id = :user_id AND is_active = 1
+            """),
+            {"user_id": canvas_user_id}
+        ).scalars().all())
+
+        feed = CalendarFeed(
+            canvas_user_id=canvas_user_id,
+            version=version,
+            events=events,
+            active_course_ids=active_course_ids,
+        )
+        assemble_feed(feed)
+        self.put(feed)
+        logger.info(
+            f"Rendered calendar for user {canvas_user_id} at version {version} "
+            f"({len(events)} events, {f'changes since {since}' if incremental else 'full render'})"
+        )
+        return feed
+
+
+calendar_feeds = CalendarFeedCache()
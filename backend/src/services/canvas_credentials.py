@@ -0,0 +1,90 @@
+"""
+Per-user Canvas API tokens, stored encrypted in the database.
+
+Tokens are encrypted with Fernet using CANVAS_TOKEN_ENCRYPTION_KEY
+(generate one with `Fernet.generate_key()`). For single-user deployments,
+the user named by CANVAS_PAT_USER_ID (the Canvas user the PAT belongs to)
+falls back to CANVAS_PAT when they have no stored token. Nobody else does:
+syncing with another user's token would write that user's courses and
+submissions into their rows.
+"""
+from typing import Optional
+
+import sqlalchemy
+from cryptography.fernet import Fernet, InvalidToken
+
+from src import database as db
+from src.config import get_settings
+
+settings = get_settings()
+
+
+class CanvasCredentialsError(Exception):
+    """No usable Canvas token for a user."""
+    pass
+
+
+def _fernet() -> Fernet:
+    if not settings.CANVAS_TOKEN_ENCRYPTION_KEY:
+        raise CanvasCredentialsError("CANVAS_TOKEN_ENCRYPTION_KEY is not configured")
+    return Fernet(settings.CANVAS_TOKEN_ENCRYPTION_KEY)
+
+
+def store_canvas_token(canvas_user_id: int, token: str) -> None:
+    """Encrypt and save (or replace) a user's Canvas token."""
+    encrypted_token = _fernet().encrypt(token.encode("utf-8")).decode("ascii")
+    with db.engine.begin() as connection:
+        connection.execute(
+            sqlalchemy.text("""
+                INSERT INTO canvas_credentials (canvas_user_id, encrypted_token)
+                VALUES (:canvas_user_id, :encrypted_token)
+                ON CONFLICT (canvas_user_id) DO UPDATE
+                SET encrypted_token = excluded.encrypted_token,
+                    updated_at = CURRENT_TIMESTAMP
+            """),
+            {"canvas_user_id": canvas_user_id, "encrypted_token": encrypted_token},
+        )
+
+
+def delete_canvas_token(canvas_user_id: int) -> bool:
+    """Remove a user's stored token. Returns False if none was stored."""
+    with db.engine.begin() as connection:
+        result = connection.execute(
+            sqlalchemy.text("""
+                DELETE FROM canvas_credentials
+                WHERE canvas_user_id = :canvas_user_id
+            """),
+            {"canvas_user_id": canvas_user_id},
+        )
+    return result.rowcount > 0
+
+
+def get_canvas_token(canvas_user_id: int) -> str:
+    """
+    Get the Canvas token to sync as this user.
+
+    Raises:
+        CanvasCredentialsError: If the user has no token (and isn't the
+            CANVAS_PAT owner) or the stored token can't be decrypted
+    """
+    with db.engine.begin() as connection:
+        encrypted_token: Optional[str] = connection.execute(
+            sqlalchemy.text("""
+                SELECT encrypted_token
+                FROM canvas_credentials
+                WHERE canvas_user_id = :canvas_user_id
+            """),
+            {"canvas_user_id": canvas_user_id},
+        ).scalar()
+
+    if encrypted_token is None:
+        if settings.CANVAS_PAT and canvas_user_id == settings.CANVAS_PAT_USER_ID:
+            return settings.CANVAS_PAT
+        raise CanvasCredentialsError(f"No Canvas token stored for user {canvas_user_id}")
+
+    try:
+        return _fernet().decrypt(encrypted_token.encode("ascii")).decode("utf-8")
+    except InvalidToken:
+        raise CanvasCredentialsError(
+            f"Stored Canvas token for user {canvas_user_id} can't be decrypted"
+        )
@@ -4,25 +4,76 @@ Canvas synchronization service for fetching and processing Canvas data.
 This service handles the transformation of raw Canvas API data into
 structured objects that the application can use.
 """
-from typing import List, Optional, Dict, Any
+import asyncio
+import json
+import logging
+from contextlib import contextmanager
+from operator import attrgetter
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, List, Optional, Dict, Any, Tuple
 import requests
-from src.utils.canvas import fetch_canvas_courses, fetch_canvas_assignments_for_class
+from pydantic import TypeAdapter, ValidationError
+from src.config import get_settings
+from src.utils import canvas_async
+from src.utils.canvas import (
+    fetch_canvas_courses,
+    fetch_canvas_assignments_for_class,
+    fetch_canvas_submissions_for_class,
+)
+from src.utils.dates import as_utc, to_db
+from src.utils.resilience import CircuitOpenError
 from src.utils.text import strip_html_to_plaintext
-from src.models.course import Course, Term
+from src.utils.fields import dump_fields, select_columns
+from src.utils.metrics import collect_sync_timings, observe_phase, record_cache, record_upsert, timing_course
+from src.services.canvas_credentials import CanvasCredentialsError
+from src.services.events import publish_sync_progress
+from src.services.change_feed import (
+    ASSIGNMENT_ENTITY,
+    next_change_version,
+    record_tombstones,
+    release_change_version,
+    touch_assignment_viewers,
+)
+from src.services.course_stats import refresh_changed_course_stats, refresh_course_stats
+from src.services.submission_history import record_submission_changes
+from src.services.search import build_search_query, match_subquery, update_search_index
+from src.models.course import Course, Term, is_term_active
 from src.models.assignment import Submission, Assignment
+from src.services.sync_records import (
+    COURSE_ASSIGNMENT_FIELDS,
+    USER_ASSIGNMENT_FIELDS,
+    USER_SUBMISSION_FIELDS,
+    AssignmentRecord,
+    bind_params,
+)
+from src.models.canvas import (
+    CanvasAssignmentPayload,
+    CanvasSubmissionPayload,
+    assignment_page_adapter,
+    submission_page_adapter,
+)
 import sqlalchemy
+from sqlalchemy.engine import Connection
 from src import database as db
 
+logger = logging.getLogger(__name__)
+
 class CanvasAPIError(Exception):
     """Canvas API request failed."""
     pass
 
+class CanvasUnavailableError(CanvasAPIError):
+    """Canvas circuit breaker is open; requests fail fast without being sent."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 class CanvasSyncError(Exception):
     """Data processing failed."""
     pass
 
 # TODO: normalize the course_name into actual name and course-tag in db schema(gen chem vs CHEM-124)
-# TODO: when term ends, remove rows? or just label as disabled?
 def sync_user_assignments(canvas_user_id: int) -> Dict[str, Any]:
     """
     Sync user's assignments from Canvas API to database.
@@ -31,88 +82,250 @@ def sync_user_assignments(canvas_user_id: int) -> Dict[str, Any]:
         canvas_user_id: Canvas user ID
         
     Returns:
-        Dict with sync statistics (synced count, total)
+        Dict with sync statistics (synced count, total) and the time spent
+        per phase, overall and per course (timings; courses run concurrently,
+        so the summed phase times can exceed the total)
         
     Raises:
         CanvasSyncError: If sync operation fails
     """
     try:
-        assignments = sync_assignments_for_active_courses(canvas_user_id)
-        if not assignments:
-            print("No assignments found to sync")
-            return {"synced": 0, "message": "No assignments found"}
+        with collect_sync_timings() as timings:
+            assignments, course_ids = sync_assignments_for_active_courses(canvas_user_id)
+            if not course_ids:
+                record_user_synced(canvas_user_id)
+                print("No assignments found to sync")
+                return {"synced": 0, "message": "No assignments found", "timings": timings.as_dict()}
 
-        synced_count = bulk_upsert_assignments(canvas_user_id, assignments)
+            # Still run for empty courses, so assignments removed from them are deleted
+            synced_count = bulk_upsert_assignments(canvas_user_id, assignments, course_ids)
+            record_user_synced(canvas_user_id)
         print(f"Successfully synced {synced_count} assignments")
-        return {"synced": synced_count, "total": len(assignments)}
-    except (CanvasAPIError, CanvasSyncError):
+        return {"synced": synced_count, "total": len(assignments), "timings": timings.as_dict()}
+    except (CanvasAPIError, CanvasSyncError, CanvasCredentialsError):
         raise
     except Exception as e:
         print(f"Canvas sync failed: {e}")
         raise CanvasSyncError("Sync failed")
     
-def bulk_upsert_assignments(canvas_user_id: int, assignments: List[Assignment]) -> int:
-    assignment_records = [
-        {
-            "canvas_user_id": canvas_user_id,
-            "canvas_assignment_id": assignment.id,
-            "canvas_course_id": assignment.course_id,
-            "course_name": assignment.course_name,
-            "assignment_name": assignment.name,
-            "graded": assignment.graded,
-            "description": assignment.description,
-            "html_url": assignment.html_url,
-            "points_possible": assignment.points_possible,
-            "due_at": assignment.due_at,
-            "grading_type": assignment.grading_type
-        }
-        for assignment in assignments
-    ]
-    submission_records = [
-        {
-            "canvas_user_id": canvas_user_id,
-            "canvas_submission_id": assignment.submission.id,
-            "canvas_assignment_id": assignment.id,
-            "workflow_state": assignment.submission.workflow_state,
-            "score": assignment.submission.score,
-            "grade": assignment.submission.grade,
-            "submitted_at": assignment.submission.submitted_at,
-            "late": assignment.submission.late,
-            "missing": assignment.submission.missing
-        }
-        for assignment in assignments
-    ]
-
+def record_user_synced(canvas_user_id: int, synced_at: Optional[datetime] = None) -> None:
+    """Stamp the user's last successful Canvas sync (by default, now)."""
     with db.engine.begin() as connection:
-        # Upsert assignments
         connection.execute(
             sqlalchemy.text("""
-                INSERT OR REPLACE INTO user_assignments 
-                (canvas_user_id, canvas_assignment_id, canvas_course_id, course_name,
-                 assignment_name, graded, description, html_url, points_possible, 
-                 due_at, grading_type)
-                VALUES (:canvas_user_id, :canvas_assignment_id, :canvas_course_id, :course_name,
-                        :assignment_name, :graded, :description, :html_url, :points_possible,
-                        :due_at, :grading_type)
+                UPDATE users SET last_synced_at = :now
+                WHERE canvas_id = :user_id
             """),
-            assignment_records
-        )
-        
-        # Upsert submissions
-        connection.execute(
-            sqlalchemy.text("""
-                INSERT OR REPLACE INTO user_submissions 
-                (canvas_user_id, canvas_submission_id, canvas_assignment_id,
-                 workflow_state, score, grade, submitted_at, late, missing)
-                VALUES (:canvas_user_id, :canvas_submission_id, :canvas_assignment_id,
-                        :workflow_state, :score, :grade, :submitted_at, :late, :missing)
-            """),
-            submission_records
+            {"user_id": canvas_user_id, "now": to_db(synced_at or datetime.now(timezone.utc))}
         )
 
+
+def get_last_synced_at(canvas_user_id: int, connection: Optional[Connection] = None) -> Optional[datetime]:
+    """When the user's Canvas data was last synced successfully (UTC), if ever."""
+    if connection is None:
+        with db.engine.begin() as connection:
+            return get_last_synced_at(canvas_user_id, connection)
+
+    last_synced_at = connection.execute(
+        sqlalchemy.text("SELECT last_synced_at FROM users WHERE canvas_id = :user_id"),
+        {"user_id": canvas_user_id}
+    ).scalar()
+    return as_utc(last_synced_at)
+
+
+def bulk_upsert_assignments(
+    canvas_user_id: int, assignments: List[AssignmentRecord], course_ids: Iterable[int]
+) -> int:
+    with db.engine.begin() as connection:
+        return upsert_assignments(canvas_user_id, assignments, course_ids, connection)
+
+
+@observe_phase("upsert")
+def upsert_assignments(
+    canvas_user_id: int, assignments: List[AssignmentRecord], course_ids: Iterable[int], connection: Connection
+) -> int:
+    """
+    Upsert assignments and their submissions on an existing connection.
+
+    Course-level assignment data is shared across users and normally stored
+    by fetch_assignments_for_course; it's only inserted here if missing.
+    The search index is brought up to date either way.
+
+    Rows whose values change are stamped with a new change version; local
+    columns (is_locally_complete) are left alone. Each fetched course's
+    list is complete, so the user's stored assignments in course_ids that
+    Canvas no longer returns are deleted, leaving tombstones. Submission
+    changes are appended to submission_history, and stats of the courses
+    that changed are refreshed.
+
+    Args:
+        course_ids: Courses whose assignment lists were fetched successfully,
+            including ones that came back empty
+    """
+    course_ids = set(course_ids)
+    if not assignments and not course_ids:
+        return 0
+
+    version = next_change_version(connection, canvas_user_id)
+    synced_count = write_assignment_rows(canvas_user_id, assignments, version, connection) if assignments else 0
+    deleted = delete_missing_assignments(canvas_user_id, assignments, course_ids, version, connection)
+    if release_change_version(connection, canvas_user_id, version):
+        # Nothing changed, so there are no stats to refresh either
+        return synced_count
+    # Deleted rows carry no version stamp, so their courses are named explicitly
+    refresh_changed_course_stats(connection, canvas_user_id, version, set(deleted.values()))
+    return synced_count
+
+
+def write_assignment_rows(
+    canvas_user_id: int, assignments: List[AssignmentRecord], version: int, connection: Connection
+) -> int:
+    """Upsert a non-empty list of assignments with their submissions, stamping changes with version."""
+    course_records = bind_params(assignments, COURSE_ASSIGNMENT_FIELDS)
+    assignment_records = bind_params(
+        assignments, USER_ASSIGNMENT_FIELDS, canvas_user_id=canvas_user_id, change_version=version
+    )
+    submission_records = bind_params(
+        assignments, USER_SUBMISSION_FIELDS, canvas_user_id=canvas_user_id, change_version=version
+    )
+
+    connection.execute(
+        sqlalchemy.text("""
+            INSERT INTO course_assignments
+            (canvas_assignment_id, canvas_course_id, assignment_name, graded,
+             description, html_url, points_possible, grading_type)
+            VALUES (:canvas_assignment_id, :canvas_course_id, :assignment_name, :graded,
+                    :description, :html_url, :points_possible, :grading_type)
+            ON CONFLICT (canvas_assignment_id) DO NOTHING
+        """),
+        course_records
+    )
+    update_search_index(connection, assignments)
+
+    assignment_ids = [assignment.canvas_assignment_id for assignment in assignments]
+    stored_assignments = count_stored_rows(connection, "user_assignments", canvas_user_id, assignment_ids)
+    stored_submissions = count_stored_rows(connection, "user_submissions", canvas_user_id, assignment_ids)
+
+    # Upsert the user's own view of each assignment (due dates can be overridden per student)
+    result = connection.execute(
+        sqlalchemy.text("""
+            INSERT INTO user_assignments 
+            (canvas_user_id, canvas_assignment_id, canvas_course_id, course_name, due_at, change_version)
+            VALUES (:canvas_user_id, :canvas_assignment_id, :canvas_course_id, :course_name, :due_at, :change_version)
+            ON CONFLICT (canvas_user_id, canvas_assignment_id) DO UPDATE
+            SET canvas_course_id = excluded.canvas_course_id,
+                course_name = excluded.course_name,
+                due_at = excluded.due_at,
+                updated_at = CURRENT_TIMESTAMP,
+                change_version = excluded.change_version
+            WHERE user_assignments.canvas_course_id IS DISTINCT FROM excluded.canvas_course_id
+               OR user_assignments.course_name IS DISTINCT FROM excluded.course_name
+               OR user_assignments.due_at IS DISTINCT FROM excluded.due_at
+        """),
+        assignment_records
+    )
+    record_upsert("user_assignments", len(assignment_records), stored_assignments, result.rowcount)
+
+    # Upsert submissions, keeping the values they replace in the history
+    record_submission_changes(connection, canvas_user_id, assignments)
+    result = connection.execute(
+        sqlalchemy.text("""
+            INSERT INTO user_submissions 
+            (canvas_user_id, canvas_submission_id, canvas_assignment_id,
+             workflow_state, score, grade, submitted_at, late, missing, change_version)
+            VALUES (:canvas_user_id, :canvas_submission_id, :canvas_assignment_id,
+                    :workflow_state, :score, :grade, :submitted_at, :late, :missing, :change_version)
+            ON CONFLICT (canvas_user_id, canvas_assignment_id) DO UPDATE
+            SET canvas_submission_id = excluded.canvas_submission_id,
+                workflow_state = excluded.workflow_state,
+                score = excluded.score,
+                grade = excluded.grade,
+                submitted_at = excluded.submitted_at,
+                late = excluded.late,
+                missing = excluded.missing,
+                updated_at = CURRENT_TIMESTAMP,
+                change_version = excluded.change_version
+            WHERE user_submissions.canvas_submission_id IS DISTINCT FROM excluded.canvas_submission_id
+               OR user_submissions.workflow_state IS DISTINCT FROM excluded.workflow_state
+               OR user_submissions.score IS DISTINCT FROM excluded.score
+               OR user_submissions.grade IS DISTINCT FROM excluded.grade
+               OR user_submissions.submitted_at IS DISTINCT FROM excluded.submitted_at
+               OR user_submissions.late IS DISTINCT FROM excluded.late
+               OR user_submissions.missing IS DISTINCT FROM excluded.missing
+        """),
+        submission_records
+    )
+    record_upsert("user_submissions", len(submission_records), stored_submissions, result.rowcount)
     return len(assignment_records)
 
 
+def count_stored_rows(connection: Connection, table: str, canvas_user_id: int, assignment_ids: List[int]) -> int:
+    """How many of the user's assignments already have a row in table (for upsert metrics)."""
+    return connection.execute(
+        sqlalchemy.text(f"""
+            SELECT COUNT(*) FROM {table}
+            WHERE canvas_user_id = :user_id
+              AND canvas_assignment_id IN :assignment_ids
+        """).bindparams(sqlalchemy.bindparam("assignment_ids", expanding=True)),
+        {"user_id": canvas_user_id, "assignment_ids": assignment_ids}
+    ).scalar_one()
+
+
+def delete_missing_assignments(
+    canvas_user_id: int,
+    assignments: List[AssignmentRecord],
+    course_ids: Iterable[int],
+    version: int,
+    connection: Connection,
+) -> Dict[int, int]:
+    """
+    Delete the user's stored assignments that Canvas no longer lists.
+
+    Only course_ids (the courses fetched successfully) are checked, since
+    each of their lists is complete; a course that failed to fetch must not
+    be in it. A fetched course with no assignments left loses all of them.
+
+    Returns:
+        Course ID of each deleted assignment, by assignment ID
+    """
+    course_ids = list(course_ids)
+    if not course_ids:
+        return {}
+    fetched_ids = {assignment.canvas_assignment_id for assignment in assignments}
+    stored = connection.execute(
+        sqlalchemy.text("""
+            SELECT canvas_assignment_id, canvas_course_id FROM user_assignments
+            WHERE canvas_user_id = :user_id
+              AND canvas_course_id IN :course_ids
+        """).bindparams(sqlalchemy.bindparam("course_ids", expanding=True)),
+        {"user_id": canvas_user_id, "course_ids": course_ids}
+    ).all()
+
+    missing = {
+        row.canvas_assignment_id: row.canvas_course_id
+        for row in stored
+        if row.canvas_assignment_id not in fetched_ids
+    }
+    if not missing:
+        return {}
+    missing_ids = list(missing)
+
+    params = {"user_id": canvas_user_id, "assignment_ids": missing_ids}
+    # Submissions first: SQLite only cascades when foreign keys are enabled
+    for table in ("user_submissions", "user_assignments"):
+        connection.execute(
+            sqlalchemy.text(f"""
+                DELETE FROM {table}
+                WHERE canvas_user_id = :user_id
+                  AND canvas_assignment_id IN :assignment_ids
+            """).bindparams(sqlalchemy.bindparam("assignment_ids", expanding=True)),
+            params
+        )
+    record_tombstones(connection, canvas_user_id, ASSIGNMENT_ENTITY, missing_ids, version)
+    logger.info(f"Deleted {len(missing_ids)} assignments no longer in Canvas for user {canvas_user_id}")
+    return missing
+
+
 def get_assignments_for_active_courses(canvas_user_id: int) -> List[Assignment]:
     """
     Get assignments for all active courses from database cache.
@@ -131,75 +344,12 @@ def get_assignments_for_active_courses(canvas_user_id: int) -> List[Assignment]:
     """
     try:
         with db.engine.begin() as connection:
-            # Query assignments with their submissions for active courses
-            results = connection.execute(
-                sqlalchemy.text("""
-                    SELECT 
-                        a.canvas_assignment_id,
-                        a.canvas_course_id,
-                        a.course_name,
-                        a.assignment_name,
-                        a.graded,
-                        a.description,
-                        a.html_url,
-                        a.points_possible,
-                        a.due_at,
-                        a.grading_type,
-                        s.canvas_submission_id,
-                        s.workflow_state,
-                        s.score,
-                        s.grade,
-                        s.submitted_at,
-                        s.late,
-                        s.missing,
-                        s.is_locally_complete
-                    FROM user_assignments a
-                    INNER JOIN user_courses c 
-                        ON a.canvas_course_id = c.canvas_course_id 
-                        AND a.canvas_user_id = c.canvas_user_id
-                    LEFT JOIN user_submissions s 
-                        ON a.canvas_assignment_id = s.canvas_assignment_id
-                        AND a.canvas_user_id = s.canvas_user_id
-                    WHERE a.canvas_user_id = :user_id
-                      AND c.is_active = 1
-                """),
-                {"user_id": canvas_user_id}
-            ).all()
+            assignments = query_assignments_for_active_courses(canvas_user_id, connection)
         
-        if not results:
+        if not assignments:
             print(f"No assignments found in database for user {canvas_user_id}")
             return []
         
-        # Convert database rows to Assignment objects
-        assignments = []
-        for row in results:
-            submission = Submission(
-                id=row.canvas_submission_id,
-                assignment_id=row.canvas_assignment_id,
-                score=row.score,
-                grade=row.grade,
-                submitted_at=row.submitted_at,
-                workflow_state=row.workflow_state or "unsubmitted",
-                late=row.late or False,
-                missing=row.missing or False,
-                is_locally_complete=bool(row.is_locally_complete or False)
-            )
-            
-            assignment = Assignment(
-                id=row.canvas_assignment_id,
-                course_id=row.canvas_course_id,
-                course_name=row.course_name,
-                name=row.assignment_name,
-                submission=submission,
-                graded=row.graded,
-                html_url=row.html_url,
-                description=row.description,
-                points_possible=row.points_possible,
-                due_at=row.due_at,
-                grading_type=row.grading_type
-            )
-            assignments.append(assignment)
-        
         print(f"Retrieved {len(assignments)} assignments from database for user {canvas_user_id}")
         return assignments
         
@@ -207,24 +357,343 @@ def get_assignments_for_active_courses(canvas_user_id: int) -> List[Assignment]:
         print(f"Failed to fetch assignments from database for user {canvas_user_id}: {e}")
         raise CanvasSyncError("Failed to fetch assignments from database")
 
-def _fetch_assignments_for_course(course_id: int, course_name: str) -> List[Assignment]:
+
+def query_assignments_for_active_courses(canvas_user_id: int, connection: Connection) -> List[Assignment]:
+    """
+    Read assignments for all active courses on an existing connection.
+    
+    Lets callers combine this read with others in one transaction.
+    """
+    # Query assignments with their submissions for active courses
+    results = connection.execute(
+        sqlalchemy.text(f"""
+            SELECT {ASSIGNMENT_ROW_COLUMNS}
+            FROM user_assignments a
+            INNER JOIN course_assignments ca
+                ON ca.canvas_assignment_id = a.canvas_assignment_id
+            INNER JOIN user_courses c 
+                ON a.canvas_course_id = c.canvas_course_id 
+                AND a.canvas_user_id = c.canvas_user_id
+            LEFT JOIN user_submissions s 
+                ON a.canvas_assignment_id = s.canvas_assignment_id
+                AND a.canvas_user_id = s.canvas_user_id
+            WHERE a.canvas_user_id = :user_id
+              AND c.is_active = 1
+        """),
+        {"user_id": canvas_user_id}
+    ).all()
+
+    return [assignment_from_row(row) for row in results]
+
+
+def query_assignments_changed_since(canvas_user_id: int, since: int, connection: Connection) -> List[Assignment]:
+    """
+    Read the user's assignments whose own row or submission changed after version since.
+
+    Unlike query_assignments_for_active_courses this includes inactive
+    courses, so a client mirror sees assignments of courses that end.
+    """
+    results = connection.execute(
+        sqlalchemy.text(f"""
+            SELECT {ASSIGNMENT_ROW_COLUMNS}
+            FROM user_assignments a
+            INNER JOIN course_assignments ca
+                ON ca.canvas_assignment_id = a.canvas_assignment_id
+            LEFT JOIN user_submissions s
+                ON a.canvas_assignment_id = s.canvas_assignment_id
+                AND a.canvas_user_id = s.canvas_user_id
+            WHERE a.canvas_user_id = :user_id
+              AND (a.change_version > :since OR s.change_version > :since)
+        """),
+        {"user_id": canvas_user_id, "since": since}
+    ).all()
+
+    return [assignment_from_row(row) for row in results]
+
+
+def search_assignments(
+    canvas_user_id: int, query: str, limit: int, offset: int, connection: Connection
+) -> Tuple[List[Assignment], bool]:
+    """
+    Find the user's assignments in active courses matching query, best match first.
+
+    Ties go to the assignment due soonest.
+
+    Args:
+        canvas_user_id: User whose assignments to search
+        query: Search text as typed by the user
+        limit: Page size
+        offset: Matches to skip
+
+    Returns:
+        The page of assignments, and whether more matches follow
+    """
+    dialect = connection.dialect.name
+    match = build_search_query(query, dialect)
+    if match is None:
+        return [], False
+
+    results = connection.execute(
+        sqlalchemy.text(f"""
+            WITH matches AS ({match_subquery(dialect)})
+            SELECT {ASSIGNMENT_ROW_COLUMNS}
+            FROM matches m
+            INNER JOIN user_assignments a
+                ON a.canvas_assignment_id = m.canvas_assignment_id
+                AND a.canvas_user_id = :user_id
+            INNER JOIN course_assignments ca
+                ON ca.canvas_assignment_id = a.canvas_assignment_id
+            INNER JOIN user_courses c
+                ON a.canvas_course_id = c.canvas_course_id
+                AND a.canvas_user_id = c.canvas_user_id
+            LEFT JOIN user_submissions s
+                ON a.canvas_assignment_id = s.canvas_assignment_id
+                AND a.canvas_user_id = s.canvas_user_id
+            WHERE c.is_active = 1
+            ORDER BY m.score DESC, a.due_at, a.canvas_assignment_id
+            LIMIT :limit OFFSET :offset
+        """),
+        # One extra row tells whether there's another page
+        {"match": match, "user_id": canvas_user_id, "limit": limit + 1, "offset": offset}
+    ).all()
+
+    return [assignment_from_row(row) for row in results[:limit]], len(results) > limit
+
+
+# Columns read by assignment_from_row
+ASSIGNMENT_ROW_COLUMNS = """
+    a.canvas_assignment_id,
+    a.canvas_course_id,
+    a.course_name,
+    ca.assignment_name,
+    ca.graded,
+    ca.description,
+    ca.html_url,
+    ca.points_possible,
+    a.due_at,
+    ca.grading_type,
+    s.canvas_submission_id,
+    s.workflow_state,
+    s.score,
+    s.grade,
+    s.submitted_at,
+    s.late,
+    s.missing,
+    s.is_locally_complete
+"""
+
+
+def assignment_from_row(row) -> Assignment:
+    """Convert a database row (ASSIGNMENT_ROW_COLUMNS) to an Assignment object."""
+    submission = Submission(
+        id=row.canvas_submission_id,
+        assignment_id=row.canvas_assignment_id,
+        score=row.score,
+        grade=row.grade,
+        submitted_at=row.submitted_at,
+        workflow_state=row.workflow_state or "unsubmitted",
+        late=row.late or False,
+        missing=row.missing or False,
+        is_locally_complete=bool(row.is_locally_complete or False)
+    )
+
+    return Assignment(
+        id=row.canvas_assignment_id,
+        course_id=row.canvas_course_id,
+        course_name=row.course_name,
+        name=row.assignment_name,
+        submission=submission,
+        graded=row.graded,
+        html_url=row.html_url,
+        description=row.description,
+        points_possible=row.points_possible,
+        due_at=row.due_at,
+        grading_type=row.grading_type
+    )
+
+# Columns needed to serialize each public Assignment field
+ASSIGNMENT_FIELD_COLUMNS: Dict[str, List[str]] = {
+    "id": ["a.canvas_assignment_id"],
+    "course_id": ["a.canvas_course_id"],
+    "course_name": ["a.course_name"],
+    "name": ["ca.assignment_name"],
+    "submission": [
+        "a.canvas_assignment_id",
+        "s.canvas_submission_id",
+        "s.workflow_state",
+        "s.score",
+        "s.grade",
+        "s.submitted_at",
+        "s.late",
+        "s.missing",
+        "s.is_locally_complete",
+    ],
+    "graded": ["ca.graded"],
+    "description": ["ca.description"],
+    "points_possible": ["ca.points_possible"],
+    "grading_type": ["ca.grading_type"],
+    "due_at": ["a.due_at"],
+    "html_url": ["ca.html_url"],
+}
+
+
+def _sparse_assignment_values(row, fields: List[str]) -> Dict[str, Any]:
+    values: Dict[str, Any] = {}
+    for field in fields:
+        if field == "submission":
+            values[field] = {
+                "id": row.canvas_submission_id,
+                "assignment_id": row.canvas_assignment_id,
+                "score": row.score,
+                "grade": row.grade,
+                "submitted_at": row.submitted_at,
+                "workflow_state": row.workflow_state or "unsubmitted",
+                "late": row.late or False,
+                "missing": row.missing or False,
+                "is_locally_complete": bool(row.is_locally_complete or False),
+            }
+        else:
+            column = ASSIGNMENT_FIELD_COLUMNS[field][0].split(".", 1)[1]
+            values[field] = getattr(row, column)
+    return values
+
+
+def get_assignment_fields_for_active_courses(
+    canvas_user_id: int, fields: List[str]
+) -> List[Dict[str, Any]]:
+    """
+    Get a subset of assignment fields for all active courses from database cache.
+
+    Only the columns backing the requested fields are selected, and the
+    shared course_assignments and submissions tables are only joined when
+    a requested field lives there.
+
+    Args:
+        canvas_user_id: Canvas user ID
+        fields: Assignment field names (keys of ASSIGNMENT_FIELD_COLUMNS)
+
+    Returns:
+        List of JSON-ready dicts containing only the requested fields
+
+    Raises:
+        CanvasSyncError: If database query fails
+    """
+    course_join = ""
+    if any(ASSIGNMENT_FIELD_COLUMNS[field][0].startswith("ca.") for field in fields):
+        course_join = """
+                    INNER JOIN course_assignments ca
+                        ON ca.canvas_assignment_id = a.canvas_assignment_id"""
+
+    submission_join = ""
+    if "submission" in fields:
+        submission_join = """
+                    LEFT JOIN user_submissions s
+                        ON a.canvas_assignment_id = s.canvas_assignment_id
+                        AND a.canvas_user_id = s.canvas_user_id"""
+
+    try:
+        with db.engine.begin() as connection:
+            results = connection.execute(
+                sqlalchemy.text(f"""
+                    SELECT
+                        {select_columns(fields, ASSIGNMENT_FIELD_COLUMNS)}
+                    FROM user_assignments a{course_join}
+                    INNER JOIN user_courses c
+                        ON a.canvas_course_id = c.canvas_course_id
+                        AND a.canvas_user_id = c.canvas_user_id{submission_join}
+                    WHERE a.canvas_user_id = :user_id
+                      AND c.is_active = 1
+                """),
+                {"user_id": canvas_user_id}
+            ).all()
+
+        return [
+            dump_fields(Assignment, _sparse_assignment_values(row, fields))
+            for row in results
+        ]
+
+    except Exception as e:
+        logger.error(f"Failed to fetch assignment fields from database for user {canvas_user_id}: {e}")
+        raise CanvasSyncError("Failed to fetch assignments from database")
+
+def fetch_assignments_for_course(canvas_user_id: int, course_id: int, course_name: str) -> List[AssignmentRecord]:
     """
-    Fetch assignments for a single course from Canvas API (internal helper).
+    Fetch assignments for a single course from Canvas API.
+
+    Course-level assignment data (name, description, URL, points) is shared
+    by everyone in the course. If another user fetched this course within
+    COURSE_ASSIGNMENT_CACHE_SECONDS, only this user's submissions are
+    fetched and combined with the shared rows; otherwise the full
+    assignment list is fetched and stored for the next user.
     
     Args:
+        canvas_user_id: Canvas user ID whose token is used
         course_id: Canvas course ID
         course_name: Course name for assignment objects
         
     Returns:
-        List of Assignment objects from Canvas API
+        List of assignment records from Canvas API
         
     Raises:
         CanvasAPIError: If Canvas API request fails
         CanvasSyncError: If data processing fails
     """
+    with course_fetch_errors(course_id):
+        shared = get_fresh_course_assignments(course_id)
+        if shared is not None:
+            submissions, response_status = fetch_canvas_submissions_for_class(
+                canvas_user_id, course_id, decode=decode_submission_page
+            )
+            assignments = combine_shared_assignments(shared, submissions, course_name)
+            if assignments is not None:
+                record_cache("course_assignments", hit=True)
+                return assignments
+            logger.info(f"Shared assignments for course {course_id} are missing new assignments, refetching")
+        record_cache("course_assignments", hit=False)
+
+        payloads, response_status = fetch_canvas_assignments_for_class(
+            canvas_user_id, course_id, decode=decode_assignment_page
+        )
+        return assignments_from_payloads(canvas_user_id, course_id, course_name, payloads)
+
+
+async def fetch_assignments_for_course_async(
+    canvas_user_id: int, course_id: int, course_name: str
+) -> List[AssignmentRecord]:
+    """
+    Same as fetch_assignments_for_course, over the user's async Canvas client.
+
+    Database and html2text work runs in worker threads, so other courses'
+    requests keep going over the user's connection meanwhile.
+    """
+    with course_fetch_errors(course_id):
+        shared = await asyncio.to_thread(get_fresh_course_assignments, course_id)
+        if shared is not None:
+            submissions, response_status = await canvas_async.fetch_canvas_submissions_for_class(
+                canvas_user_id, course_id, decode=decode_submission_page
+            )
+            assignments = combine_shared_assignments(shared, submissions, course_name)
+            if assignments is not None:
+                record_cache("course_assignments", hit=True)
+                return assignments
+            logger.info(f"Shared assignments for course {course_id} are missing new assignments, refetching")
+        record_cache("course_assignments", hit=False)
+
+        payloads, response_status = await canvas_async.fetch_canvas_assignments_for_class(
+            canvas_user_id, course_id, decode=decode_assignment_page
+        )
+        return await asyncio.to_thread(assignments_from_payloads, canvas_user_id, course_id, course_name, payloads)
+
+
+@contextmanager
+def course_fetch_errors(course_id: int) -> Iterator[None]:
+    """Turn errors from fetching a course's assignments into sync errors."""
     try:
-        assignments, response_status = fetch_canvas_assignments_for_class(course_id)
-        return process_raw_assignments(assignments, course_name)
+        yield
+    except CanvasCredentialsError:
+        raise
+    except CircuitOpenError as e:
+        raise CanvasUnavailableError("Canvas is unavailable", e.retry_after)
     except requests.exceptions.RequestException as e:
         print(f"Canvas API request failed for course {course_id}: {e}")
         raise CanvasAPIError("Failed to get assignments from Canvas")
@@ -232,146 +701,310 @@ def _fetch_assignments_for_course(course_id: int, course_name: str) -> List[Assi
         print(f"Unexpected error processing assignments for course {course_id}: {e}")
         raise CanvasSyncError("Failed to process assignments")
 
-def sync_assignments_for_active_courses(canvas_user_id: int) -> List[Assignment]:
+
+def assignments_from_payloads(
+    canvas_user_id: int, course_id: int, course_name: str, payloads: List[CanvasAssignmentPayload]
+) -> List[AssignmentRecord]:
+    """Build assignment records from a full fetch and share them with the course's other users."""
+    # Converting descriptions with html2text is most of the work here
+    with observe_phase("html_clean"):
+        assignments = [assignment_record_from_payload(payload, course_name) for payload in payloads]
+    store_course_assignments(canvas_user_id, course_id, assignments)
+    return assignments
+
+
+def get_fresh_course_assignments(course_id: int) -> Optional[Dict[int, Any]]:
+    """
+    Read a course's shared assignment rows if they were fetched recently.
+
+    Returns:
+        Rows keyed by assignment ID, or None if the course has never been
+        fetched or its last fetch is older than the cache window
+    """
+    max_age = timedelta(seconds=get_settings().COURSE_ASSIGNMENT_CACHE_SECONDS)
+    with db.engine.begin() as connection:
+        fetched_at = connection.execute(
+            sqlalchemy.text("""
+                SELECT fetched_at FROM course_fetches
+                WHERE canvas_course_id = :course_id
+            """),
+            {"course_id": course_id}
+        ).scalar()
+        if fetched_at is None or as_utc(fetched_at) < datetime.now(timezone.utc) - max_age:
+            return None
+
+        rows = connection.execute(
+            sqlalchemy.text("""
+                SELECT canvas_assignment_id, canvas_course_id, assignment_name, graded,
+                       description, html_url, points_possible, grading_type
+                FROM course_assignments
+                WHERE canvas_course_id = :course_id
+            """),
+            {"course_id": course_id}
+        ).all()
+    return {row.canvas_assignment_id: row for row in rows}
+
+
+def combine_shared_assignments(
+    shared: Dict[int, Any], submissions: List[CanvasSubmissionPayload], course_name: str
+) -> Optional[List[AssignmentRecord]]:
+    """
+    Build a user's assignments from shared course rows and their own submissions.
+
+    Canvas returns a submission for every assignment the user can see, so the
+    submissions also decide which shared assignments apply to this user.
+
+    Returns:
+        Assignment records, or None if a submission points at an assignment
+        that isn't in the shared rows yet (the caller should refetch)
+    """
+    assignments = []
+    for payload in submissions:
+        row = shared.get(payload.assignment_id)
+        if row is None:
+            return None
+
+        assignments.append(AssignmentRecord(
+            canvas_assignment_id=row.canvas_assignment_id,
+            canvas_course_id=row.canvas_course_id,
+            course_name=course_name,
+            assignment_name=row.assignment_name,
+            graded=bool(row.graded),
+            html_url=row.html_url,
+            description=row.description,
+            points_possible=row.points_possible,
+            grading_type=row.grading_type,
+            due_at=payload.cached_due_date,
+            canvas_submission_id=payload.id,
+            workflow_state=payload.workflow_state,
+            score=payload.score,
+            grade=payload.grade,
+            submitted_at=payload.submitted_at,
+            late=payload.late,
+            missing=payload.missing
+        ))
+    return assignments
+
+
+@observe_phase("upsert")
+def store_course_assignments(canvas_user_id: int, course_id: int, assignments: List[AssignmentRecord]) -> None:
+    """
+    Save freshly fetched course-level assignment data for other users to reuse.
+
+    Other users' copies of assignments whose shared data changed get a new
+    change version, since their own syncs won't see anything new. New and
+    changed assignments are (re)indexed for search.
+    """
+    with db.engine.begin() as connection:
+        if assignments:
+            changed_ids = changed_course_assignment_ids(course_id, assignments, connection)
+            connection.execute(
+                sqlalchemy.text("""
+                    INSERT INTO course_assignments
+                    (canvas_assignment_id, canvas_course_id, assignment_name, graded,
+                     description, html_url, points_possible, grading_type)
+                    VALUES (:canvas_assignment_id, :canvas_course_id, :assignment_name, :graded,
+                            :description, :html_url, :points_possible, :grading_type)
+                    ON CONFLICT (canvas_assignment_id) DO UPDATE
+                    SET canvas_course_id = excluded.canvas_course_id,
+                        assignment_name = excluded.assignment_name,
+                        graded = excluded.graded,
+                        description = excluded.description,
+                        html_url = excluded.html_url,
+                        points_possible = excluded.points_possible,
+                        grading_type = excluded.grading_type,
+                        updated_at = CURRENT_TIMESTAMP
+                """),
+                bind_params(assignments, COURSE_ASSIGNMENT_FIELDS)
+            )
+            touch_assignment_viewers(connection, changed_ids)
+            if changed_ids:
+                # Points and graded flags are shared, so every user's totals can move
+                refresh_course_stats(connection, [course_id])
+            update_search_index(connection, assignments)
+        connection.execute(
+            sqlalchemy.text("""
+                INSERT INTO course_fetches (canvas_course_id, fetched_at, fetched_by_user_id)
+                VALUES (:course_id, :fetched_at, :user_id)
+                ON CONFLICT (canvas_course_id) DO UPDATE
+                SET fetched_at = excluded.fetched_at,
+                    fetched_by_user_id = excluded.fetched_by_user_id
+            """),
+            {"course_id": course_id, "fetched_at": to_db(datetime.now(timezone.utc)), "user_id": canvas_user_id}
+        )
+
+
+def changed_course_assignment_ids(
+    course_id: int, assignments: List[AssignmentRecord], connection: Connection
+) -> List[int]:
+    """IDs of stored course assignments whose shared data differs from assignments."""
+    rows = connection.execute(
+        sqlalchemy.text(f"""
+            SELECT {", ".join(COURSE_ASSIGNMENT_FIELDS)}
+            FROM course_assignments
+            WHERE canvas_course_id = :course_id
+        """),
+        {"course_id": course_id}
+    ).all()
+    stored = {row.canvas_assignment_id: tuple(row) for row in rows}
+
+    values = attrgetter(*COURSE_ASSIGNMENT_FIELDS)
+    return [
+        assignment.canvas_assignment_id
+        for assignment in assignments
+        if assignment.canvas_assignment_id in stored
+        and stored[assignment.canvas_assignment_id] != values(assignment)
+    ]
+
+
+def get_active_courses(canvas_user_id: int):
+    """Read the (canvas_course_id, course_name) rows of the user's active courses."""
+    with db.engine.begin() as connection:
+        return connection.execute(
+            sqlalchemy.text("""
+                SELECT canvas_course_id, course_name
+                FROM user_courses
+                WHERE canvas_user_id = :user_id
+                  AND is_active = 1
+            """),
+            {"user_id": canvas_user_id}
+        ).all()
+
+
+def sync_assignments_for_active_courses(canvas_user_id: int) -> Tuple[List[AssignmentRecord], List[int]]:
     """
     Fetch assignments for all active courses from Canvas API.
     
     This function ONLY syncs from Canvas API. Use get_assignments_for_active_courses()
-    to read from database cache.
+    to read from database cache. Up to CANVAS_FETCH_CONCURRENCY courses are
+    fetched at once, over the user's async Canvas client.
     
     Args:
         canvas_user_id: Canvas user ID
         
     Returns:
-        List of Assignment objects fetched from Canvas API
+        Assignment records fetched from Canvas API, and the IDs of the
+        courses fetched successfully (courses that failed are skipped)
         
     Raises:
         CanvasSyncError: If sync operation fails
     """
     try:
-        with db.engine.begin() as connection:
-            active_courses = connection.execute(
-                sqlalchemy.text("""
-                    SELECT canvas_course_id, course_name
-                    FROM user_courses
-                    WHERE canvas_user_id = :user_id
-                      AND is_active = 1
-                """),
-                {"user_id": canvas_user_id}
-            ).all()
+        active_courses = get_active_courses(canvas_user_id)
         
         if not active_courses:
             print(f"No active courses found for user {canvas_user_id}")
-            return []
+            return [], []
         
         # Fetch assignments from Canvas API for each active course
+        results = canvas_async.run_in_canvas_loop(fetch_courses_concurrently(canvas_user_id, active_courses))
         all_assignments = []
-        for course in active_courses:
-            try:
-                course_id = course.canvas_course_id
-                course_name = course.course_name
-                assignments = _fetch_assignments_for_course(course_id, course_name)
-                all_assignments.extend(assignments)
-            except CanvasAPIError as e:
-                print(f"Failed to fetch assignments for course {course_id}: {e}")
+        fetched_course_ids = []
+        for course, result in zip(active_courses, results):
+            if isinstance(result, CanvasUnavailableError):
+                # Every other course failed the same way
+                raise result
+            if isinstance(result, CanvasAPIError):
+                print(f"Failed to fetch assignments for course {course.canvas_course_id}: {result}")
                 continue
+            if isinstance(result, BaseException):
+                raise result
+            all_assignments.extend(result)
+            fetched_course_ids.append(course.canvas_course_id)
         
-        return all_assignments
+        return all_assignments, fetched_course_ids
         
+    except CanvasCredentialsError:
+        raise
     except Exception as e:
         print(f"Unexpected error fetching assignments for user {canvas_user_id}: {e}")
         raise CanvasSyncError("Failed to fetch assignments for active courses")
 
-def process_raw_assignments(raw_assignments: List[Dict[str, Any]], course_name: str) -> List[Assignment]:
-    assignment_objects = []
+async def fetch_courses_concurrently(canvas_user_id: int, active_courses) -> list:
+    """Fetch each course's assignments; results (or exceptions) are in course order."""
+    semaphore = asyncio.Semaphore(get_settings().CANVAS_FETCH_CONCURRENCY)
+    done = 0
 
-    for assignment_data in raw_assignments:
-        assignment_obj = create_assignment_from_data(assignment_data, course_name)
-        if assignment_obj:
-            assignment_objects.append(assignment_obj)
-    
-    return assignment_objects
+    async def fetch(course) -> List[AssignmentRecord]:
+        nonlocal done
+        async with semaphore:
+            try:
+                with timing_course(course.canvas_course_id):
+                    return await fetch_assignments_for_course_async(
+                        canvas_user_id, course.canvas_course_id, course.course_name
+                    )
+            finally:
+                done += 1
+                publish_sync_progress(
+                    canvas_user_id, "assignments", course_id=course.canvas_course_id,
+                    done=done, total=len(active_courses)
+                )
 
+    return await asyncio.gather(*(fetch(course) for course in active_courses), return_exceptions=True)
 
-def is_valid_submission_data(submission_data: Dict[str, Any]) -> bool:
-    required_fields = ["id", "assignment_id", "workflow_state"]
-    return all(submission_data.get(field) is not None for field in required_fields)
 
+def _decode_page(content: bytes, adapter: TypeAdapter, item_model: type, kind: str) -> list:
+    """
+    Decode and validate one page of a Canvas list response.
 
-def create_submission_from_data(submission_data: Dict[str, Any]) -> Optional[Submission]:
-    if not submission_data:
-        return None
-        
-    if not is_valid_submission_data(submission_data):
-        print(f"Skipping submission {submission_data.get('id', 'UNKNOWN_ID')} - missing required fields")
-        return None
-    
+    The whole page is parsed and validated in one pass straight from the
+    response bytes. If any item is invalid, the page is decoded again item
+    by item so only the bad items are skipped, as they always have been.
+    """
     try:
-        return Submission(
-            id=submission_data["id"],
-            assignment_id=submission_data["assignment_id"],
-            score=submission_data.get("score"),
-            grade=submission_data.get("grade"),
-            submitted_at=submission_data.get("submitted_at"),
-            workflow_state=submission_data["workflow_state"],
-            late=submission_data.get("late", False),
-            missing=submission_data.get("missing", False)
-        )
-    except Exception as e:
-        print(f"Error creating submission object: {e}")
-        return None
+        return adapter.validate_json(content)
+    except ValidationError:
+        pass
+
+    items = []
+    for raw_item in json.loads(content):
+        try:
+            items.append(item_model.model_validate(raw_item))
+        except ValidationError as e:
+            item_id = raw_item.get("id", "UNKNOWN_ID") if isinstance(raw_item, dict) else "UNKNOWN_ID"
+            logger.warning(f"Skipping {kind} {item_id} - {e.error_count()} invalid field(s)")
+    return items
+
 
+def decode_assignment_page(content: bytes) -> List[CanvasAssignmentPayload]:
+    return _decode_page(content, assignment_page_adapter, CanvasAssignmentPayload, "assignment")
 
-def is_valid_assignment_data(assignment_data: Dict[str, Any]) -> bool:
-    required_fields = ["id", "course_id", "name", "html_url", "submission", "submission_types"]
-    return all(assignment_data.get(field) is not None for field in required_fields)
 
+def decode_submission_page(content: bytes) -> List[CanvasSubmissionPayload]:
+    return _decode_page(content, submission_page_adapter, CanvasSubmissionPayload, "submission")
 
-def create_assignment_from_data(assignment_data: Dict[str, Any], course_name: str) -> Optional[Assignment]:
+
+def assignment_record_from_payload(payload: CanvasAssignmentPayload, course_name: str) -> AssignmentRecord:
     """
-    Create an Assignment object from Canvas API assignment data.
-    
+    Create an assignment record from a decoded Canvas assignment.
+
     Args:
-        assignment_data: Raw assignment data from Canvas API
+        payload: Assignment decoded by decode_assignment_page
         course_name: Name of the course (e.g., "General Chemistry")
-        
+
     Returns:
-        Assignment object or None if validation fails
+        AssignmentRecord ready to be written by upsert_assignments
     """
-    if not assignment_data:
-        return None
-
-    if not is_valid_assignment_data(assignment_data):
-        print(f"Skipping assignment {assignment_data.get('id', 'UNKNOWN_ID')} - missing required fields")
-        return None
-    
-    try:
-        submission_obj = create_submission_from_data(assignment_data["submission"])
-
-        if not submission_obj:
-            return None
-        
-        submission_types: List[str] = assignment_data.get("submission_types", [])
-        graded = "not_graded" not in submission_types
-
-        description = assignment_data.get("description")
-        cleaned_description = strip_html_to_plaintext(description)
-        return Assignment(
-            id=assignment_data["id"],
-            course_id=assignment_data["course_id"],
-            course_name=course_name,
-            name=assignment_data["name"],
-            submission=submission_obj,
-            graded=graded,
-            html_url=assignment_data["html_url"],
-            description=cleaned_description,
-            points_possible=assignment_data.get("points_possible"),
-            due_at=assignment_data.get("due_at"),
-            grading_type=assignment_data.get("grading_type")
-        )
-    except Exception as e:
-        print(f"Error creating assignment object for {assignment_data.get('id', 'unknown')}: {e}")
-        return None
+    submission = payload.submission
+    return AssignmentRecord(
+        canvas_assignment_id=payload.id,
+        canvas_course_id=payload.course_id,
+        course_name=course_name,
+        assignment_name=payload.name,
+        graded="not_graded" not in payload.submission_types,
+        html_url=payload.html_url,
+        description=strip_html_to_plaintext(payload.description),
+        points_possible=payload.points_possible,
+        grading_type=payload.grading_type,
+        due_at=payload.due_at,
+        canvas_submission_id=submission.id,
+        workflow_state=submission.workflow_state,
+        score=submission.score,
+        grade=submission.grade,
+        submitted_at=submission.submitted_at,
+        late=submission.late,
+        missing=submission.missing
+    )
 
 
 def sync_user_courses(canvas_user_id: int) -> Dict[str, Any]:
@@ -382,61 +1015,193 @@ def sync_user_courses(canvas_user_id: int) -> Dict[str, Any]:
         canvas_user_id: Canvas user ID
         
     Returns:
-        Dict with sync statistics (synced count, total)
+        Dict with sync statistics (synced count, total) and the time spent
+        per phase (timings)
         
     Raises:
         CanvasSyncError: If sync operation fails
     """
     try:
-        courses = get_courses()
-        
-        if not courses:
-            print("No courses found to sync")
-            return {"synced": 0, "message": "No courses found"}
-        
-        synced_count = bulk_upsert_courses(canvas_user_id, courses)
+        with collect_sync_timings() as timings:
+            courses = get_courses(canvas_user_id)
+
+            if not courses:
+                # Canvas only returns active enrollments, so every stored course has ended
+                deactivate_missing_courses(canvas_user_id, [])
+                print("No courses found to sync")
+                return {"synced": 0, "message": "No courses found", "timings": timings.as_dict()}
+
+            synced_count = bulk_upsert_courses(canvas_user_id, courses)
             
         print(f"Successfully synced {synced_count} courses")
-        return {"synced": synced_count, "total": len(courses)}
+        return {"synced": synced_count, "total": len(courses), "timings": timings.as_dict()}
             
-    except (CanvasAPIError, CanvasSyncError):
+    except (CanvasAPIError, CanvasSyncError, CanvasCredentialsError):
         raise
     except Exception as e:
         print(f"Canvas sync failed: {e}")
         raise CanvasSyncError("Sync failed")
 
 
+@observe_phase("upsert")
 def bulk_upsert_courses(canvas_user_id: int, courses: List[Course]) -> int:
-    course_records = [
-        {
-            "canvas_user_id": canvas_user_id,
-            "canvas_course_id": course.id,
-            "course_name": course.name,
-            "course_code": course.course_code,
-            "term_id": course.term.id if course.term else None,
-            "term_name": course.term.name if course.term else None,
-            "term_start_at": course.term.start_at if course.term else None,
-            "is_active": course.is_active
-        }
-        for course in courses
-    ]
-    
+    """
+    Upsert the user's courses and deactivate stored courses Canvas no longer returns.
+
+    Local columns (is_subscribed) are left alone on existing rows. Rows
+    whose values change are stamped with a new change version.
+    """
     with db.engine.begin() as connection:
-        # Build and execute bulk INSERT OR REPLACE for user_courses table
-        connection.execute(
+        version = next_change_version(connection, canvas_user_id)
+        course_records = [
+            {
+                "canvas_user_id": canvas_user_id,
+                "canvas_course_id": course.id,
+                "course_name": course.name,
+                "course_code": course.course_code,
+                "term_id": course.term.id if course.term else None,
+                "term_name": course.term.name if course.term else None,
+                "term_start_at": course.term.start_at if course.term else None,
+                "term_end_at": course.term.end_at if course.term else None,
+                "is_active": course.is_active,
+                "change_version": version
+            }
+            for course in courses
+        ]
+
+        stored = connection.execute(
+            sqlalchemy.text("""
+                SELECT COUNT(*) FROM user_courses
+                WHERE canvas_user_id = :user_id
+                  AND canvas_course_id IN :course_ids
+            """).bindparams(sqlalchemy.bindparam("course_ids", expanding=True)),
+            {"user_id": canvas_user_id, "course_ids": [course.id for course in courses]}
+        ).scalar_one()
+        result = connection.execute(
             sqlalchemy.text("""
-                INSERT OR REPLACE INTO user_courses 
+                INSERT INTO user_courses 
                 (canvas_user_id, canvas_course_id, course_name, course_code, 
-                    term_id, term_name, term_start_at, is_active)
+                    term_id, term_name, term_start_at, term_end_at, is_active, change_version)
                 VALUES (:canvas_user_id, :canvas_course_id, :course_name, :course_code,
-                        :term_id, :term_name, :term_start_at, :is_active)
+                        :term_id, :term_name, :term_start_at, :term_end_at, :is_active, :change_version)
+                ON CONFLICT (canvas_user_id, canvas_course_id) DO UPDATE
+                SET course_name = excluded.course_name,
+                    course_code = excluded.course_code,
+                    term_id = excluded.term_id,
+                    term_name = excluded.term_name,
+                    term_start_at = excluded.term_start_at,
+                    term_end_at = excluded.term_end_at,
+                    is_active = excluded.is_active,
+                    change_version = excluded.change_version
+                WHERE user_courses.course_name IS DISTINCT FROM excluded.course_name
+                   OR user_courses.course_code IS DISTINCT FROM excluded.course_code
+                   OR user_courses.term_id IS DISTINCT FROM excluded.term_id
+                   OR user_courses.term_name IS DISTINCT FROM excluded.term_name
+                   OR user_courses.term_start_at IS DISTINCT FROM excluded.term_start_at
+                   OR user_courses.term_end_at IS DISTINCT FROM excluded.term_end_at
+                   OR user_courses.is_active IS DISTINCT FROM excluded.is_active
             """),
             course_records  # Pass all records at once
         )
+        record_upsert("user_courses", len(course_records), stored, result.rowcount)
+        deactivate_missing_courses(canvas_user_id, [course.id for course in courses], connection, version)
+        release_change_version(connection, canvas_user_id, version)
         
     return len(course_records)
 
 
+def deactivate_missing_courses(
+    canvas_user_id: int,
+    course_ids: List[int],
+    connection: Optional[Connection] = None,
+    version: Optional[int] = None,
+) -> int:
+    """
+    Mark the user's stored courses that aren't in course_ids as inactive.
+
+    Courses are fetched with enrollment_state=active, so a course missing
+    from the fetch has concluded (or the user dropped it).
+
+    Args:
+        version: Change version to stamp (default: reserve a new one)
+    """
+    if connection is None:
+        with db.engine.begin() as connection:
+            return deactivate_missing_courses(canvas_user_id, course_ids, connection, version)
+
+    reserved = version is None
+    if version is None:
+        version = next_change_version(connection, canvas_user_id)
+
+    statement = sqlalchemy.text("""
+        UPDATE user_courses
+        SET is_active = 0, change_version = :version
+        WHERE canvas_user_id = :user_id
+          AND is_active = 1
+          AND canvas_course_id NOT IN :course_ids
+    """).bindparams(sqlalchemy.bindparam("course_ids", expanding=True))
+    if not course_ids:
+        statement = sqlalchemy.text("""
+            UPDATE user_courses
+            SET is_active = 0, change_version = :version
+            WHERE canvas_user_id = :user_id
+              AND is_active = 1
+        """)
+    result = connection.execute(
+        statement, {"user_id": canvas_user_id, "course_ids": course_ids, "version": version}
+    )
+    if reserved and not result.rowcount:
+        release_change_version(connection, canvas_user_id, version)
+    return result.rowcount
+
+
+def refresh_course_activity(canvas_user_id: Optional[int] = None) -> int:
+    """
+    Recompute stored is_active flags from the stored term dates.
+
+    Lets courses expire at their term's end between course syncs (the
+    scheduler only syncs assignments). Courses are never reactivated here;
+    only a course sync, which sees the live enrollment, does that.
+
+    Args:
+        canvas_user_id: Only refresh this user's courses (default: everyone)
+
+    Returns:
+        Number of courses marked inactive
+    """
+    user_filter = "AND canvas_user_id = :user_id" if canvas_user_id is not None else ""
+    now = datetime.now(timezone.utc)
+    with db.engine.begin() as connection:
+        rows = connection.execute(
+            sqlalchemy.text(f"""
+                SELECT id, canvas_user_id, term_id, term_name, term_start_at, term_end_at
+                FROM user_courses
+                WHERE is_active = 1 {user_filter}
+                ORDER BY canvas_user_id
+            """),
+            {"user_id": canvas_user_id}
+        ).all()
+
+        ended = [
+            row
+            for row in rows
+            if row.term_id is not None and not is_term_active(
+                Term(id=row.term_id, name=row.term_name, start_at=row.term_start_at, end_at=row.term_end_at),
+                now,
+            )
+        ]
+        versions: Dict[int, int] = {}
+        for row in ended:
+            if row.canvas_user_id not in versions:
+                versions[row.canvas_user_id] = next_change_version(connection, row.canvas_user_id)
+        if ended:
+            connection.execute(
+                sqlalchemy.text("UPDATE user_courses SET is_active = 0, change_version = :version WHERE id = :id"),
+                [{"id": row.id, "version": versions[row.canvas_user_id]} for row in ended]
+            )
+    return len(ended)
+
+
 def is_valid_course_data(course_data: Dict[str, Any]) -> bool:
     """
     Validate that course data has required fields.
@@ -470,7 +1235,8 @@ def create_term_from_data(term_data: Dict[str, Any]) -> Optional[Term]:
         return Term(
             id=term_data["id"],
             name=term_data["name"],
-            start_at=term_data["start_at"]
+            start_at=term_data["start_at"],
+            end_at=term_data.get("end_at")
         )
     except Exception as e:
         print(f"Error creating term object: {e}")
@@ -496,7 +1262,8 @@ def create_course_from_data(course_data: Dict[str, Any]) -> Optional[Course]:
             id=course_data["id"],
             name=course_data["name"],
             course_code=course_data.get("course_code", "UNKNOWN"),
-            term=term_obj
+            term=term_obj,
+            is_active=is_term_active(term_obj)
         )
     except Exception as e:
         print(f"Error creating course object for {course_data.get('id', 'unknown')}: {e}")
@@ -519,13 +1286,16 @@ def process_raw_courses(raw_courses: List[Dict[str, Any]]) -> List[Course]:
     return course_objects
 
 
-def get_courses() -> List[Course]:
+def get_courses(canvas_user_id: int) -> List[Course]:
     """
     Fetch user's Canvas courses from Canvas API.
     
     This function fetches from Canvas API. To read from database cache,
     query user_courses table directly.
     
+    Args:
+        canvas_user_id: Canvas user ID whose token is used
+        
     Returns:
         List of Course objects from Canvas API
         
@@ -534,10 +1304,14 @@ def get_courses() -> List[Course]:
         CanvasSyncError: If data processing fails
     """
     try:
-        raw_courses, response_status = fetch_canvas_courses()
+        raw_courses, response_status = fetch_canvas_courses(canvas_user_id)
         
         # Process into structured objects
         return process_raw_courses(raw_courses)
+    except CanvasCredentialsError:
+        raise
+    except CircuitOpenError as e:
+        raise CanvasUnavailableError("Canvas is unavailable", e.retry_after)
     except requests.exceptions.RequestException as e:
         raise CanvasAPIError("Failed to get courses from Canvas")
     except Exception as e:
@@ -0,0 +1,228 @@
+"""
+Per-user change versions, so clients can mirror their data incrementally.
+
+Every write to a user's courses, assignments or submissions takes the next
+value of users.change_version and stamps it on the rows it changes.
+Deleted rows leave a tombstone carrying the version of the deletion. A
+client that remembers the highest version it has seen asks for everything
+newer (GET /changes?since=N) instead of downloading its data again.
+
+Syncs reserve a version before they know whether anything changed; one
+that changed nothing hands it back (release_change_version), so a no-op
+sync doesn't move the version and wake every stream and feed watching it.
+"""
+from typing import Any, Dict, Iterable, List
+
+import sqlalchemy
+from sqlalchemy.engine import Connection
+
+from src import database as db
+
+COURSE_ENTITY = "course"
+ASSIGNMENT_ENTITY = "assignment"
+VERSIONED_TABLES = ("user_courses", "user_assignments", "user_submissions")
+
+
+def next_change_version(connection: Connection, canvas_user_id: int) -> int:
+    """
+    Reserve the user's next change version in the caller's transaction.
+
+    Bumping users.change_version write-locks the user's row until commit,
+    so a user's writes commit in version order. A client that has seen
+    version N can therefore never later miss a commit stamped N or lower.
+
+    A user without a users row (one who only has an API key) gets one.
+    """
+    return connection.execute(
+        sqlalchemy.text("""
+            INSERT INTO users (canvas_id, name, change_version)
+            VALUES (:user_id, :name, 1)
+            ON CONFLICT (canvas_id) DO UPDATE
+            SET change_version = users.change_version + 1
+            RETURNING change_version
+        """),
+        {"user_id": canvas_user_id, "name": f"Canvas user {canvas_user_id}"}
+    ).scalar_one()
+
+
+def release_change_version(connection: Connection, canvas_user_id: int, version: int) -> bool:
+    """
+    Hand back a version from next_change_version if nothing was stamped with it.
+
+    The caller still holds the user's row lock from reserving it, so no
+    later version can exist yet. The version doesn't move, and no stream
+    or feed wakes up for a write that changed nothing.
+
+    Returns:
+        True if the version was released
+    """
+    stamped = " UNION ALL ".join(
+        f"SELECT 1 FROM {table} WHERE canvas_user_id = :user_id AND change_version = :version"
+        for table in VERSIONED_TABLES + ("change_tombstones",)
+    )
+    if connection.execute(
+        sqlalchemy.text(f"SELECT EXISTS ({stamped})"),
+        {"user_id": canvas_user_id, "version": version}
+    ).scalar():
+        return False
+
+    connection.execute(
+        sqlalchemy.text("""
+            UPDATE users SET change_version = change_version - 1
+            WHERE canvas_id = :user_id
+              AND change_version = :version
+        """),
+        {"user_id": canvas_user_id, "version": version}
+    )
+    return True
+
+
+def get_change_version(connection: Connection, canvas_user_id: int) -> int:
+    """The user's latest change version (0 if they have none yet)."""
+    version = connection.execute(
+        sqlalchemy.text("SELECT change_version FROM users WHERE canvas_id = :user_id"),
+        {"user_id": canvas_user_id}
+    ).scalar()
+    return version or 0
+
+
+def record_tombstones(
+    connection: Connection, canvas_user_id: int, entity: str, entity_ids: Iterable[int], version: int
+) -> None:
+    """Remember that the user's rows with these Canvas IDs were deleted at version."""
+    records = [
+        {"user_id": canvas_user_id, "entity": entity, "entity_id": entity_id, "version": version}
+        for entity_id in entity_ids
+    ]
+    if records:
+        connection.execute(
+            sqlalchemy.text("""
+                INSERT INTO change_tombstones (canvas_user_id, entity, entity_id, change_version)
+                VALUES (:user_id, :entity, :entity_id, :version)
+            """),
+            records
+        )
+
+
+def touch_assignment_viewers(connection: Connection, assignment_ids: List[int]) -> int:
+    """
+    Give every user's copy of these assignments a new change version.
+
+    Used when shared course-level assignment data changes: the rows of
+    users who didn't sync it themselves still need to show up as changed.
+    Users are locked in ID order so concurrent calls can't deadlock.
+
+    Returns:
+        Number of users touched
+    """
+    if not assignment_ids:
+        return 0
+
+    user_ids = connection.execute(
+        sqlalchemy.text("""
+            SELECT DISTINCT canvas_user_id FROM user_assignments
+            WHERE canvas_assignment_id IN :assignment_ids
+            ORDER BY canvas_user_id
+        """).bindparams(sqlalchemy.bindparam("assignment_ids", expanding=True)),
+        {"assignment_ids": assignment_ids}
+    ).scalars().all()
+
+    for user_id in user_ids:
+        connection.execute(
+            sqlalchemy.text("""
+                UPDATE user_assignments SET change_version = :version
+                WHERE canvas_user_id = :user_id
+                  AND canvas_assignment_id IN :assignment_ids
+            """).bindparams(sqlalchemy.bindparam("assignment_ids", expanding=True)),
+            {
+                "version": next_change_version(connection, user_id),
+                "user_id": user_id,
+                "assignment_ids": assignment_ids,
+            }
+        )
+    return len(user_ids)
+
+
+def query_tombstones(canvas_user_id: int, since: int, connection: Connection) -> Dict[str, List[int]]:
+    """Canvas IDs of the user's rows deleted after version since, by entity."""
+    rows = connection.execute(
+        sqlalchemy.text("""
+            SELECT entity, entity_id
+            FROM change_tombstones
+            WHERE canvas_user_id = :user_id
+              AND change_version > :since
+            ORDER BY change_version
+        """),
+        {"user_id": canvas_user_id, "since": since}
+    ).all()
+
+    deleted: Dict[str, List[Any]] = {COURSE_ENTITY: [], ASSIGNMENT_ENTITY: []}
+    for row in rows:
+        deleted.setdefault(row.entity, []).append(row.entity_id)
+    return deleted
+
+
+def query_changed_ids(canvas_user_id: int, since: int, connection: Connection) -> Dict[str, List[int]]:
+    """IDs (not full rows) of the user's courses and assignments changed or deleted after since."""
+    course_ids = connection.execute(
+        sqlalchemy.text("""
+            SELECT canvas_course_id FROM user_courses
+            WHERE canvas_user_id = :user_id AND change_version > :since
+        """),
+        {"user_id": canvas_user_id, "since": since}
+    ).scalars().all()
+    assignment_ids = connection.execute(
+        sqlalchemy.text("""
+            SELECT a.canvas_assignment_id
+            FROM user_assignments a
+            LEFT JOIN user_submissions s
+                ON a.canvas_assignment_id = s.canvas_assignment_id
+                AND a.canvas_user_id = s.canvas_user_id
+            WHERE a.canvas_user_id = :user_id
+              AND (a.change_version > :since OR s.change_version > :since)
+        """),
+        {"user_id": canvas_user_id, "since": since}
+    ).scalars().all()
+    deleted = query_tombstones(canvas_user_id, since, connection)
+    return {
+        "course_ids": list(course_ids),
+        "assignment_ids": list(assignment_ids),
+        "deleted_course_ids": deleted[COURSE_ENTITY],
+        "deleted_assignment_ids": deleted[ASSIGNMENT_ENTITY],
+    }
+
+
+def find_changes(versions: Dict[int, int], chunk_size: int = 500) -> List[Dict[str, Any]]:
+    """
+    Find which of these users changed after the version given for each.
+
+    One query reads every user's current version; changed IDs are only
+    looked up for users whose version moved.
+
+    Args:
+        versions: canvas_user_id -> last version the caller knows about
+
+    Returns:
+        One dict per changed user: canvas_user_id, version and the changed
+        IDs (see query_changed_ids)
+    """
+    user_ids = list(versions)
+    changes = []
+    with db.read_snapshot() as connection:
+        for start in range(0, len(user_ids), chunk_size):
+            rows = connection.execute(
+                sqlalchemy.text("""
+                    SELECT canvas_id, change_version FROM users
+                    WHERE canvas_id IN :user_ids
+                """).bindparams(sqlalchemy.bindparam("user_ids", expanding=True)),
+                {"user_ids": user_ids[start:start + chunk_size]}
+            ).all()
+            for row in rows:
+                since = versions[row.canvas_id]
+                if row.change_version > since:
+                    changes.append({
+                        "canvas_user_id": row.canvas_id,
+                        "version": row.change_version,
+                        **query_changed_ids(row.canvas_id, since, connection),
+                    })
+    return changes
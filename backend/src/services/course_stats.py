@@ -0,0 +1,270 @@
+"""
+Per-(user, course) grade and workload totals in the course_stats table.
+
+Points earned against points possible, and submitted, completed, missing
+and late counts, are kept up to date by the writes that change them
+(sync upserts, shared course data changes and completion toggles), in
+the same transaction. Each write refreshes only the (user, course)
+groups it touched, reading just those groups' rows, so summary views
+never add up every assignment.
+
+Work due this week depends on the clock rather than on writes, so it is
+counted when stats are read, with a range scan on the due_at index.
+
+find_inconsistent_course_stats recomputes everything from scratch and
+reports rows that disagree (python -m src.cli.course_stats).
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import sqlalchemy
+from sqlalchemy.engine import Connection
+
+from src.models.course import CourseStats
+from src.utils.dates import to_db
+
+STATS_COLUMNS = (
+    "assignment_count",
+    "points_possible",
+    "points_graded",
+    "points_earned",
+    "submitted_count",
+    "completed_count",
+    "missing_count",
+    "late_count",
+)
+
+# Totals per (user, course); {where} narrows which groups are computed
+STATS_SELECT = """
+    SELECT
+        a.canvas_user_id,
+        a.canvas_course_id,
+        COUNT(*) AS assignment_count,
+        COALESCE(SUM(CASE WHEN ca.graded THEN ca.points_possible END), 0) AS points_possible,
+        COALESCE(SUM(CASE WHEN ca.graded AND s.score IS NOT NULL THEN ca.points_possible END), 0) AS points_graded,
+        COALESCE(SUM(CASE WHEN ca.graded THEN s.score END), 0) AS points_earned,
+        SUM(CASE WHEN s.workflow_state IN ('submitted', 'pending_review', 'graded') THEN 1 ELSE 0 END) AS submitted_count,
+        SUM(CASE WHEN s.workflow_state IN ('submitted', 'pending_review', 'graded')
+                   OR s.is_locally_complete THEN 1 ELSE 0 END) AS completed_count,
+        SUM(CASE WHEN s.missing THEN 1 ELSE 0 END) AS missing_count,
+        SUM(CASE WHEN s.late THEN 1 ELSE 0 END) AS late_count
+    FROM user_assignments a
+    INNER JOIN user_courses c
+        ON a.canvas_course_id = c.canvas_course_id
+        AND a.canvas_user_id = c.canvas_user_id
+    INNER JOIN course_assignments ca
+        ON ca.canvas_assignment_id = a.canvas_assignment_id
+    LEFT JOIN user_submissions s
+        ON a.canvas_assignment_id = s.canvas_assignment_id
+        AND a.canvas_user_id = s.canvas_user_id
+    WHERE {where}
+    GROUP BY a.canvas_user_id, a.canvas_course_id
+"""
+
+
+def refresh_course_stats(
+    connection: Connection, course_ids: Iterable[int], canvas_user_id: Optional[int] = None
+) -> None:
+    """
+    Recompute the stats of these courses in the caller's transaction.
+
+    Args:
+        course_ids: Courses whose assignments or submissions changed
+        canvas_user_id: Only this user's stats; None for every user of the
+            courses (used when shared course data changes)
+    """
+    course_ids = list(course_ids)
+    if not course_ids:
+        return
+
+    where = "a.canvas_course_id IN :course_ids"
+    params: Dict[str, Any] = {"course_ids": course_ids}
+    if canvas_user_id is not None:
+        where += " AND a.canvas_user_id = :user_id"
+        params["user_id"] = canvas_user_id
+
+    # Delete first so a course whose last assignment went away drops to no row
+    connection.execute(
+        sqlalchemy.text(f"""
+            DELETE FROM course_stats
+            WHERE canvas_course_id IN :course_ids
+            {"AND canvas_user_id = :user_id" if canvas_user_id is not None else ""}
+        """).bindparams(sqlalchemy.bindparam("course_ids", expanding=True)),
+        params
+    )
+    columns = ", ".join(STATS_COLUMNS)
+    connection.execute(
+        sqlalchemy.text(f"""
+            INSERT INTO course_stats (canvas_user_id, canvas_course_id, {columns})
+            SELECT canvas_user_id, canvas_course_id, {columns}
+            FROM ({STATS_SELECT.format(where=where)}) totals
+        """).bindparams(sqlalchemy.bindparam("course_ids", expanding=True)),
+        params
+    )
+
+
+def refresh_changed_course_stats(
+    connection: Connection, canvas_user_id: int, version: int, course_ids: Iterable[int] = ()
+) -> None:
+    """
+    Refresh the user's courses with assignments or submissions stamped
+    with change version, plus course_ids (e.g. courses with deletions).
+    """
+    changed = connection.execute(
+        sqlalchemy.text("""
+            SELECT canvas_course_id FROM user_assignments
+            WHERE canvas_user_id = :user_id AND change_version = :version
+            UNION
+            SELECT a.canvas_course_id
+            FROM user_submissions s
+            INNER JOIN user_assignments a
+                ON a.canvas_assignment_id = s.canvas_assignment_id
+                AND a.canvas_user_id = s.canvas_user_id
+            WHERE s.canvas_user_id = :user_id AND s.change_version = :version
+        """),
+        {"user_id": canvas_user_id, "version": version}
+    ).scalars().all()
+    refresh_course_stats(connection, set(changed) | set(course_ids), canvas_user_id)
+
+
+def refresh_assignment_course_stats(
+    connection: Connection, canvas_user_id: int, assignment_ids: List[int]
+) -> None:
+    """Refresh the user's stats for the courses these assignments belong to."""
+    if not assignment_ids:
+        return
+    course_ids = connection.execute(
+        sqlalchemy.text("""
+            SELECT DISTINCT canvas_course_id FROM user_assignments
+            WHERE canvas_user_id = :user_id
+              AND canvas_assignment_id IN :assignment_ids
+        """).bindparams(sqlalchemy.bindparam("assignment_ids", expanding=True)),
+        {"user_id": canvas_user_id, "assignment_ids": assignment_ids}
+    ).scalars().all()
+    refresh_course_stats(connection, course_ids, canvas_user_id)
+
+
+def get_course_stats(
+    canvas_user_id: int,
+    connection: Connection,
+    course_ids: Optional[List[int]] = None,
+    include_inactive: bool = False,
+    now: Optional[datetime] = None,
+) -> List[CourseStats]:
+    """
+    Read the user's course stats, with work due in the next 7 days counted live.
+
+    Args:
+        course_ids: Only these courses (default: all of the user's courses)
+        include_inactive: Include courses whose term has ended
+
+    Returns:
+        One CourseStats per course, zeros for courses without assignments
+    """
+    where = "c.canvas_user_id = :user_id"
+    params: Dict[str, Any] = {"user_id": canvas_user_id}
+    if course_ids is not None:
+        where += " AND c.canvas_course_id IN :course_ids"
+        params["course_ids"] = course_ids
+    if not include_inactive:
+        where += " AND c.is_active = 1"
+
+    statement = sqlalchemy.text(f"""
+        SELECT c.canvas_course_id, {", ".join(f"cs.{column}" for column in STATS_COLUMNS)}
+        FROM user_courses c
+        LEFT JOIN course_stats cs
+            ON cs.canvas_user_id = c.canvas_user_id
+            AND cs.canvas_course_id = c.canvas_course_id
+        WHERE {where}
+        ORDER BY c.canvas_course_id
+    """)
+    if course_ids is not None:
+        statement = statement.bindparams(sqlalchemy.bindparam("course_ids", expanding=True))
+    rows = connection.execute(statement, params).all()
+
+    due_this_week = count_due_this_week(canvas_user_id, connection, now)
+    return [
+        CourseStats(
+            course_id=row.canvas_course_id,
+            **{column: getattr(row, column) or 0 for column in STATS_COLUMNS},
+            due_this_week=due_this_week.get(row.canvas_course_id, 0),
+        )
+        for row in rows
+    ]
+
+
+def count_due_this_week(
+    canvas_user_id: int, connection: Connection, now: Optional[datetime] = None
+) -> Dict[int, int]:
+    """Unfinished assignments due in the next 7 days, per course."""
+    now = now or datetime.now(timezone.utc)
+    rows = connection.execute(
+        sqlalchemy.text("""
+            SELECT a.canvas_course_id, COUNT(*) AS due_count
+            FROM user_assignments a
+            LEFT JOIN user_submissions s
+                ON a.canvas_assignment_id = s.canvas_assignment_id
+                AND a.canvas_user_id = s.canvas_user_id
+            WHERE a.canvas_user_id = :user_id
+              AND a.due_at >= :start AND a.due_at < :end
+              AND NOT (COALESCE(s.workflow_state, 'unsubmitted') IN ('submitted', 'pending_review', 'graded')
+                       OR COALESCE(s.is_locally_complete, 0) = 1)
+            GROUP BY a.canvas_course_id
+        """),
+        {"user_id": canvas_user_id, "start": to_db(now), "end": to_db(now + timedelta(days=7))}
+    ).all()
+    return {row.canvas_course_id: row.due_count for row in rows}
+
+
+def find_inconsistent_course_stats(
+    connection: Connection, canvas_user_id: Optional[int] = None, tolerance: float = 1e-6
+) -> List[Dict[str, Any]]:
+    """
+    Recompute course stats from scratch and compare them with the stored rows.
+
+    Args:
+        canvas_user_id: Only check this user (default: everyone)
+        tolerance: Allowed difference in point sums (float addition order varies)
+
+    Returns:
+        One dict per disagreeing (user, course): canvas_user_id,
+        canvas_course_id, stored and expected (column -> value, None if
+        the row is missing)
+    """
+    user_filter = "canvas_user_id = :user_id" if canvas_user_id is not None else "1 = 1"
+    params = {"user_id": canvas_user_id}
+    expected_rows = connection.execute(
+        sqlalchemy.text(STATS_SELECT.format(
+            where="a.canvas_user_id = :user_id" if canvas_user_id is not None else "1 = 1"
+        )),
+        params
+    ).all()
+    stored_rows = connection.execute(
+        sqlalchemy.text(f"""
+            SELECT canvas_user_id, canvas_course_id, {", ".join(STATS_COLUMNS)}
+            FROM course_stats
+            WHERE {user_filter}
+        """),
+        params
+    ).all()
+
+    def totals(row) -> Dict[str, Any]:
+        return {column: getattr(row, column) for column in STATS_COLUMNS}
+
+    expected = {(row.canvas_user_id, row.canvas_course_id): totals(row) for row in expected_rows}
+    stored = {(row.canvas_user_id, row.canvas_course_id): totals(row) for row in stored_rows}
+
+    mismatches = []
+    for key in sorted(expected.keys() | stored.keys()):
+        want, have = expected.get(key), stored.get(key)
+        if want is not None and have is not None and all(
+            abs((want[column] or 0) - (have[column] or 0)) <= tolerance for column in STATS_COLUMNS
+        ):
+            continue
+        mismatches.append({
+            "canvas_user_id": key[0],
+            "canvas_course_id": key[1],
+            "stored": have,
+            "expected": want,
+        })
+    return mismatches
@@ -0,0 +1,153 @@
+"""
+Per-user event streams for GET /events: sync progress and data changes.
+
+Each open stream is an EventSubscription, a small queue on the API
+worker's event loop. An idle stream costs one parked coroutine, with no
+thread and no database polling of its own. publish() is thread-safe, so
+the sync service can report progress from threadpool workers.
+
+Data changes are found by one watcher task per worker. It polls the
+change versions of every subscribed user with a single query (see
+change_feed.find_changes), so writes made by other processes, such as the
+scheduler, fleet sync or other API workers, are pushed too.
+"""
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Optional, Set
+
+from src.config import get_settings
+from src.services.change_feed import find_changes
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class EventSubscription:
+    def __init__(self, canvas_user_id: int, loop: asyncio.AbstractEventLoop, max_queued: int):
+        self.canvas_user_id = canvas_user_id
+        self.loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+
+    def put(self, event: Dict[str, Any]) -> None:
+        """Queue an event (on the subscription's loop)."""
+        if self._queue.full():
+            # Slow client: drop the oldest event instead of blocking publishers
+            self._queue.get_nowait()
+        self._queue.put_nowait(event)
+
+    async def next_event(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """The next event, or None if nothing arrives within timeout seconds."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    def __init__(self, poll_seconds: float, max_queued: int = 256):
+        self._poll_seconds = poll_seconds
+        self._max_queued = max_queued
+        self._subscribers: Dict[int, Set[EventSubscription]] = {}
+        # canvas_user_id -> latest change version already pushed to their streams
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._watcher: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def subscribe(self, canvas_user_id: int, version: int) -> EventSubscription:
+        """
+        Open a stream for a user. Call from the event loop.
+
+        Args:
+            canvas_user_id: User to stream events for
+            version: The user's change version when the stream opened;
+                changes after it are pushed
+        """
+        loop = asyncio.get_running_loop()
+        subscription = EventSubscription(canvas_user_id, loop, self._max_queued)
+        with self._lock:
+            self._subscribers.setdefault(canvas_user_id, set()).add(subscription)
+            self._versions.setdefault(canvas_user_id, version)
+
+        if self._watcher is None or self._watcher.done() or self._loop is not loop:
+            self._loop = loop
+            self._wake = wake = asyncio.Event()
+            self._watcher = loop.create_task(self._watch(wake))
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.canvas_user_id)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.canvas_user_id]
+                self._versions.pop(subscription.canvas_user_id, None)
+
+    def publish(
+        self, canvas_user_id: int, event: str, data: Dict[str, Any], event_id: Optional[int] = None
+    ) -> None:
+        """
+        Send an event to all of a user's open streams.
+
+        Safe to call from any thread; without open streams it does nothing.
+        """
+        with self._lock:
+            subscriptions = list(self._subscribers.get(canvas_user_id, ()))
+        message = {"event": event, "data": data, "id": event_id}
+        for subscription in subscriptions:
+            if not subscription.loop.is_closed():
+                subscription.loop.call_soon_threadsafe(subscription.put, message)
+
+    def poke(self) -> None:
+        """Check for changes now instead of at the next poll. Safe from any thread."""
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscribers.values())
+
+    async def _watch(self, wake: asyncio.Event) -> None:
+        """Push a changes event whenever a subscribed user's change version moves."""
+        while True:
+            with self._lock:
+                versions = dict(self._versions)
+            if not versions:
+                # Restarted by the next subscribe()
+                return
+
+            try:
+                changes = await asyncio.to_thread(find_changes, versions)
+            except Exception as e:
+                logger.error(f"Event watcher failed to check for changes: {e}")
+                changes = []
+            for change in changes:
+                self._push_change(change)
+
+            try:
+                await asyncio.wait_for(wake.wait(), self._poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+
+    def _push_change(self, change: Dict[str, Any]) -> None:
+        canvas_user_id = change.pop("canvas_user_id")
+        with self._lock:
+            if canvas_user_id not in self._versions:
+                return
+            self._versions[canvas_user_id] = max(self._versions[canvas_user_id], change["version"])
+        # The version doubles as the SSE event id, so reconnects resume from it
+        self.publish(canvas_user_id, "changes", change, event_id=change["version"])
+
+
+sync_events = EventBroker(poll_seconds=settings.EVENTS_POLL_SECONDS)
+
+
+def publish_sync_progress(canvas_user_id: int, phase: str, **data: Any) -> None:
+    """Report a sync phase (started, courses, assignments, finished, failed) to the user's streams."""
+    sync_events.publish(canvas_user_id, "sync", {"phase": phase, **data})
@@ -0,0 +1,313 @@
+"""
+Fleet sync: sync every user's courses and assignments in one run.
+
+Each user's sync is split into jobs: one course-list fetch, then one
+assignment fetch per active course, then a database upsert. Canvas jobs
+from all users go through a weighted fair queue, so a user with 40
+courses gets the same share of Canvas slots as a user with 4 instead of
+holding every slot until they're done. At most `canvas_concurrency`
+Canvas jobs run at once across the whole fleet; upserts run on their
+own single thread (SQLite has one writer anyway). Each user's Canvas
+jobs share one retry budget.
+
+Only users with a Canvas token to sync with are in the fleet: a stored
+token, or CANVAS_PAT for the user it belongs to. A user whose token is
+missing when their sync starts is reported as not connected, not failed.
+"""
+import heapq
+import itertools
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import sqlalchemy
+
+from src import database as db
+from src.services.canvas_sync import (
+    CanvasAPIError,
+    CanvasUnavailableError,
+    bulk_upsert_assignments,
+    fetch_assignments_for_course,
+    get_active_courses,
+    record_user_synced,
+    sync_user_courses,
+)
+from src.services.canvas_credentials import CanvasCredentialsError
+from src.services.sync_records import AssignmentRecord
+from src.config import get_settings
+from src.utils.resilience import RetryBudget, canvas_latency, run_with_retry_budget
+
+logger = logging.getLogger(__name__)
+
+
+class FairQueue:
+    """
+    Weighted fair queue over per-user flows (start-time fair queuing).
+
+    Each job gets a virtual finish time of
+    max(virtual now, the flow's last finish) + cost / weight, and jobs are
+    served in finish-time order. Flows with equal weight therefore take
+    turns, however many jobs each one has queued.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, float, Any]] = []
+        self._last_finish: Dict[int, float] = {}
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, flow: int, job: Any, cost: float = 1.0, weight: float = 1.0) -> None:
+        start = max(self._virtual_time, self._last_finish.get(flow, 0.0))
+        finish = start + cost / weight
+        self._last_finish[flow] = finish
+        heapq.heappush(self._heap, (finish, next(self._sequence), start, job))
+
+    def pop(self) -> Any:
+        _, _, start, job = heapq.heappop(self._heap)
+        self._virtual_time = start
+        return job
+
+
+@dataclass
+class UserSyncState:
+    canvas_user_id: int
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    courses_synced: int = 0
+    pending_courses: int = 0
+    failed_courses: int = 0
+    assignments: List[AssignmentRecord] = field(default_factory=list)
+    fetched_course_ids: List[int] = field(default_factory=list)
+    assignments_synced: int = 0
+    error: Optional[str] = None
+    not_connected: bool = False
+    retry_budget: RetryBudget = field(
+        default_factory=lambda: RetryBudget(get_settings().CANVAS_RETRY_BUDGET)
+    )
+
+    @property
+    def latency(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+def get_all_user_ids() -> List[int]:
+    """IDs of users who have connected Canvas: a stored token, or the CANVAS_PAT owner."""
+    settings = get_settings()
+    pat_user_id = settings.CANVAS_PAT_USER_ID if settings.CANVAS_PAT else None
+    with db.engine.begin() as connection:
+        return list(
+            connection.execute(
+                sqlalchemy.text("""
+                    SELECT u.canvas_id
+                    FROM users u
+                    WHERE EXISTS (
+                        SELECT 1 FROM canvas_credentials c
+                        WHERE c.canvas_user_id = u.canvas_id
+                    )
+                    OR u.canvas_id = :pat_user_id
+                    ORDER BY u.canvas_id
+                """),
+                {"pat_user_id": pat_user_id}
+            ).scalars()
+        )
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_fleet_sync(
+    user_ids: Optional[List[int]] = None,
+    canvas_concurrency: int = 8,
+    weights: Optional[Dict[int, float]] = None,
+) -> Dict[str, Any]:
+    """
+    Sync courses and assignments for many users.
+
+    Args:
+        user_ids: Canvas user IDs to sync (default: every user with a Canvas token)
+        canvas_concurrency: Max Canvas jobs in flight across all users
+        weights: Optional per-user share of Canvas slots (default 1.0 each)
+
+    Returns:
+        Dict with per-user results, users/minute, per-user latency percentiles
+        and Canvas page latency percentiles. Users without a Canvas token count
+        as not_connected rather than failed.
+    """
+    if user_ids is None:
+        user_ids = get_all_user_ids()
+    weights = weights or {}
+
+    states = {user_id: UserSyncState(user_id) for user_id in user_ids}
+    queue = FairQueue()
+    for user_id in user_ids:
+        queue.push(user_id, ("courses", user_id, None), weight=weights.get(user_id, 1.0))
+
+    fleet_started_at = time.perf_counter()
+    canvas_pool = ThreadPoolExecutor(max_workers=canvas_concurrency, thread_name_prefix="canvas")
+    db_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upsert")
+    in_flight: Dict[Future, Tuple[str, int, Any]] = {}
+    canvas_in_flight = 0
+
+    def submit(pool: ThreadPoolExecutor, job: Tuple[str, int, Any], fn: Callable, *args) -> None:
+        in_flight[pool.submit(fn, *args)] = job
+
+    def finish_user(state: UserSyncState, error: Optional[str] = None) -> None:
+        state.error = error
+        state.assignments = []
+        state.fetched_course_ids = []
+        state.finished_at = time.perf_counter()
+
+    try:
+        while queue or in_flight:
+            # Fill free Canvas slots in fair-queue order
+            while queue and canvas_in_flight < canvas_concurrency:
+                kind, user_id, course = queue.pop()
+                state = states[user_id]
+                if state.started_at is None:
+                    state.started_at = time.perf_counter()
+                if kind == "courses":
+                    submit(
+                        canvas_pool,
+                        (kind, user_id, course),
+                        run_with_retry_budget,
+                        state.retry_budget,
+                        sync_user_courses,
+                        user_id,
+                    )
+                else:
+                    submit(
+                        canvas_pool,
+                        (kind, user_id, course),
+                        run_with_retry_budget,
+                        state.retry_budget,
+                        fetch_assignments_for_course,
+                        user_id,
+                        course.canvas_course_id,
+                        course.course_name,
+                    )
+                canvas_in_flight += 1
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, user_id, course = in_flight.pop(future)
+                state = states[user_id]
+                if kind != "upsert":
+                    canvas_in_flight -= 1
+
+                if kind == "courses":
+                    try:
+                        state.courses_synced = future.result()["synced"]
+                        active_courses = get_active_courses(user_id)
+                    except CanvasCredentialsError:
+                        state.not_connected = True
+                        finish_user(state)
+                        continue
+                    except Exception as e:
+                        logger.error(f"Fleet sync: course sync failed for user {user_id}: {e}")
+                        finish_user(state, str(e))
+                        continue
+
+                    if not active_courses:
+                        record_user_synced(user_id)
+                        finish_user(state)
+                        continue
+
+                    state.pending_courses = len(active_courses)
+                    for active_course in active_courses:
+                        queue.push(
+                            user_id,
+                            ("assignments", user_id, active_course),
+                            weight=weights.get(user_id, 1.0),
+                        )
+
+                elif kind == "assignments":
+                    state.pending_courses -= 1
+                    try:
+                        state.assignments.extend(future.result())
+                        state.fetched_course_ids.append(course.canvas_course_id)
+                    except CanvasUnavailableError as e:
+                        # Circuit is open: the user's sync fails, not just this course
+                        if state.error is None:
+                            state.error = str(e)
+                    except CanvasAPIError as e:
+                        # Same as a single-user sync: skip the course, keep going
+                        logger.warning(f"Fleet sync: failed to fetch course {course.canvas_course_id} for user {user_id}: {e}")
+                        state.failed_courses += 1
+                    except Exception as e:
+                        logger.error(f"Fleet sync: assignment sync failed for user {user_id}: {e}")
+                        if state.error is None:
+                            state.error = str(e)
+
+                    if state.pending_courses == 0:
+                        if state.error is not None:
+                            finish_user(state, state.error)
+                        elif state.fetched_course_ids:
+                            # Empty courses too, so their removed assignments are deleted
+                            submit(
+                                db_pool,
+                                ("upsert", user_id, None),
+                                bulk_upsert_assignments,
+                                user_id,
+                                state.assignments,
+                                state.fetched_course_ids,
+                            )
+                        else:
+                            record_user_synced(user_id)
+                            finish_user(state)
+
+                else:
+                    try:
+                        state.assignments_synced = future.result()
+                        record_user_synced(user_id)
+                        finish_user(state)
+                    except Exception as e:
+                        logger.error(f"Fleet sync: upsert failed for user {user_id}: {e}")
+                        finish_user(state, str(e))
+    finally:
+        canvas_pool.shutdown(wait=True)
+        db_pool.shutdown(wait=True)
+
+    elapsed = time.perf_counter() - fleet_started_at
+    latencies = sorted(state.latency for state in states.values())
+    succeeded = [state for state in states.values() if state.error is None and not state.not_connected]
+    not_connected = [state for state in states.values() if state.not_connected]
+
+    return {
+        "users": len(states),
+        "succeeded": len(succeeded),
+        "not_connected": len(not_connected),
+        "failed": len(states) - len(succeeded) - len(not_connected),
+        "elapsed_seconds": elapsed,
+        "users_per_minute": len(states) / elapsed * 60 if elapsed > 0 else 0.0,
+        "latency_seconds": {
+            "p50": _percentile(latencies, 50),
+            "p90": _percentile(latencies, 90),
+            "p99": _percentile(latencies, 99),
+            "max": latencies[-1] if latencies else 0.0,
+        },
+        "canvas_page_latency_seconds": canvas_latency.snapshot(),
+        "results": [
+            {
+                "canvas_user_id": state.canvas_user_id,
+                "courses_synced": state.courses_synced,
+                "assignments_synced": state.assignments_synced,
+                "failed_courses": state.failed_courses,
+                "canvas_retries": state.retry_budget.spent,
+                "latency_seconds": state.latency,
+                "not_connected": state.not_connected,
+                "error": state.error,
+            }
+            for state in states.values()
+        ],
+    }
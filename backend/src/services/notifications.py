@@ -0,0 +1,364 @@
+"""
+Deadline notifications: 24hr, day_of and overdue reminders.
+
+Each notification type is a window of due times relative to now (see
+NOTIFICATION_WINDOWS). A tick reads the assignments due inside each window
+with a range scan on the user_assignments.due_at index, so its cost grows
+with the number of reminders due, not with the size of the table. Only
+assignments of active, subscribed courses that aren't submitted or
+marked complete are considered.
+
+A send is claimed by inserting its notifications_sent row first; the
+unique (user, assignment, type) constraint lets exactly one engine win
+each claim, so several engines can run at once without double-sending.
+Claimed notifications go to the configured NotificationSender in batches;
+claims whose delivery fails are released and retried on a later tick.
+"""
+import importlib
+import logging
+from abc import ABC, abstractmethod
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import sqlalchemy
+from sqlalchemy.engine import Connection
+
+from src import database as db
+from src.config import get_settings
+from src.utils.dates import as_utc, to_db
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Submissions in these states need no reminder
+DONE_WORKFLOW_STATES = ("submitted", "pending_review", "graded")
+
+
+@dataclass(frozen=True)
+class NotificationWindow:
+    """Assignments due in (now + start, now + end] get this notification type."""
+    notification_type: str
+    start: timedelta
+    end: timedelta
+
+
+# The 24hr window ends where day_of starts, so an assignment that shows up
+# due in two hours gets one day_of reminder rather than both
+NOTIFICATION_WINDOWS: Tuple[NotificationWindow, ...] = (
+    NotificationWindow("day_of", timedelta(0), timedelta(hours=settings.NOTIFICATION_DAY_OF_HOURS)),
+    NotificationWindow("24hr", timedelta(hours=settings.NOTIFICATION_DAY_OF_HOURS), timedelta(hours=24)),
+    NotificationWindow("overdue", -timedelta(hours=settings.NOTIFICATION_OVERDUE_HOURS), timedelta(0)),
+)
+
+
+@dataclass(slots=True)
+class Notification:
+    canvas_user_id: int
+    canvas_course_id: int
+    canvas_assignment_id: int
+    assignment_title: str
+    course_name: Optional[str]
+    html_url: Optional[str]
+    due_at: datetime
+    notification_type: str
+    phone_number: Optional[str]
+
+    @property
+    def key(self) -> Tuple[int, int, str]:
+        return (self.canvas_user_id, self.canvas_assignment_id, self.notification_type)
+
+
+class NotificationSender(ABC):
+    """
+    Delivers notifications. Subclass it for a real channel (SMS, push,
+    email) and select it with NOTIFICATION_SENDER="package.module:Class".
+    """
+
+    @abstractmethod
+    def send(self, notifications: List[Notification]) -> List[Notification]:
+        """
+        Deliver a batch of notifications.
+
+        Returns:
+            The notifications that could not be delivered; they are retried
+            later. Raising marks the whole batch as failed.
+        """
+
+
+class LogNotificationSender(NotificationSender):
+    """Local stand-in that logs each notification instead of sending it."""
+
+    def send(self, notifications: List[Notification]) -> List[Notification]:
+        for notification in notifications:
+            logger.info(f"Notify user {notification.canvas_user_id}: {format_notification(notification)}")
+        return []
+
+
+SENDERS = {"log": LogNotificationSender}
+
+
+def get_sender(name: str) -> NotificationSender:
+    """
+    Build the sender named by NOTIFICATION_SENDER.
+
+    Args:
+        name: A built-in sender name ("log") or "package.module:ClassName"
+
+    Raises:
+        ValueError: If the name doesn't resolve to a NotificationSender
+    """
+    if name in SENDERS:
+        return SENDERS[name]()
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown notification sender {name!r}")
+    sender_class = getattr(importlib.import_module(module_name), class_name, None)
+    if not (isinstance(sender_class, type) and issubclass(sender_class, NotificationSender)):
+        raise ValueError(f"{name!r} is not a NotificationSender")
+    return sender_class()
+
+
+def format_notification(notification: Notification) -> str:
+    """Short human-readable reminder text."""
+    due = notification.due_at.strftime("%b %d %H:%M UTC")
+    course = f" ({notification.course_name})" if notification.course_name else ""
+    if notification.notification_type == "overdue":
+        return f"{notification.assignment_title}{course} was due {due} and isn't submitted"
+    if notification.notification_type == "day_of":
+        return f"{notification.assignment_title}{course} is due today, {due}"
+    return f"{notification.assignment_title}{course} is due tomorrow, {due}"
+
+
+def find_due_notifications(
+    window: NotificationWindow, now: datetime, limit: int, connection: Connection
+) -> List[Notification]:
+    """
+    Read up to limit unsent notifications of the window's type, soonest due first.
+
+    The due_at range is the leading condition so the query walks
+    ix_user_assignments_due_at instead of every user's assignments.
+    """
+    rows = connection.execute(
+        sqlalchemy.text("""
+            SELECT
+                a.canvas_user_id,
+                a.canvas_course_id,
+                a.canvas_assignment_id,
+                a.course_name,
+                a.due_at,
+                ca.assignment_name,
+                ca.html_url,
+                u.phone_number
+            FROM user_assignments a
+            INNER JOIN user_courses c
+                ON a.canvas_course_id = c.canvas_course_id
+                AND a.canvas_user_id = c.canvas_user_id
+            INNER JOIN course_assignments ca
+                ON ca.canvas_assignment_id = a.canvas_assignment_id
+            INNER JOIN users u
+                ON u.canvas_id = a.canvas_user_id
+            LEFT JOIN user_submissions s
+                ON a.canvas_assignment_id = s.canvas_assignment_id
+                AND a.canvas_user_id = s.canvas_user_id
+            WHERE a.due_at > :start AND a.due_at <= :end
+              AND c.is_active = 1
+              AND c.is_subscribed = 1
+              AND COALESCE(s.is_locally_complete, 0) = 0
+              AND COALESCE(s.workflow_state, 'unsubmitted') NOT IN :done_states
+              AND NOT EXISTS (
+                  SELECT 1 FROM notifications_sent n
+                  WHERE n.canvas_user_id = a.canvas_user_id
+                    AND n.canvas_assignment_id = a.canvas_assignment_id
+                    AND n.notification_type = :notification_type
+              )
+            ORDER BY a.due_at
+            LIMIT :limit
+        """).bindparams(sqlalchemy.bindparam("done_states", expanding=True)),
+        {
+            "start": to_db(now + window.start),
+            "end": to_db(now + window.end),
+            "done_states": list(DONE_WORKFLOW_STATES),
+            "notification_type": window.notification_type,
+            "limit": limit,
+        }
+    ).all()
+
+    return [
+        Notification(
+            canvas_user_id=row.canvas_user_id,
+            canvas_course_id=row.canvas_course_id,
+            canvas_assignment_id=row.canvas_assignment_id,
+            assignment_title=row.assignment_name,
+            course_name=row.course_name,
+            html_url=row.html_url,
+            due_at=as_utc(row.due_at),
+            notification_type=window.notification_type,
+            phone_number=row.phone_number,
+        )
+        for row in rows
+    ]
+
+
+def claim_notifications(notifications: List[Notification], connection: Connection) -> List[Notification]:
+    """
+    Insert notifications_sent rows for these notifications, skipping any
+    another engine already claimed.
+
+    Returns:
+        The notifications this call claimed and should now deliver
+    """
+    if not notifications:
+        return []
+
+    values = ", ".join(
+        f"(:user_id_{i}, :course_id_{i}, :assignment_id_{i}, :title_{i}, :type_{i})"
+        for i in range(len(notifications))
+    )
+    params = {}
+    for i, notification in enumerate(notifications):
+        params[f"user_id_{i}"] = notification.canvas_user_id
+        params[f"course_id_{i}"] = notification.canvas_course_id
+        params[f"assignment_id_{i}"] = notification.canvas_assignment_id
+        params[f"title_{i}"] = notification.assignment_title
+        params[f"type_{i}"] = notification.notification_type
+
+    claimed = connection.execute(
+        sqlalchemy.text(f"""
+            INSERT INTO notifications_sent
+                (canvas_user_id, canvas_course_id, canvas_assignment_id, assignment_title, notification_type)
+            VALUES {values}
+            ON CONFLICT (canvas_user_id, canvas_assignment_id, notification_type) DO NOTHING
+            RETURNING canvas_user_id, canvas_assignment_id, notification_type
+        """),
+        params
+    ).all()
+
+    claimed_keys = {tuple(row) for row in claimed}
+    return [notification for notification in notifications if notification.key in claimed_keys]
+
+
+def release_claims(notifications: List[Notification], connection: Connection) -> None:
+    """Delete the notifications_sent rows of undelivered notifications so they're retried."""
+    if notifications:
+        connection.execute(
+            sqlalchemy.text("""
+                DELETE FROM notifications_sent
+                WHERE canvas_user_id = :user_id
+                  AND canvas_assignment_id = :assignment_id
+                  AND notification_type = :notification_type
+            """),
+            [
+                {
+                    "user_id": notification.canvas_user_id,
+                    "assignment_id": notification.canvas_assignment_id,
+                    "notification_type": notification.notification_type,
+                }
+                for notification in notifications
+            ]
+        )
+
+
+class NotificationEngine:
+    def __init__(
+        self,
+        sender: Optional[NotificationSender] = None,
+        batch_size: int = settings.NOTIFICATION_BATCH_SIZE,
+        tick_seconds: float = settings.NOTIFICATION_TICK_SECONDS,
+        windows: Tuple[NotificationWindow, ...] = NOTIFICATION_WINDOWS,
+    ):
+        self.sender = sender or get_sender(settings.NOTIFICATION_SENDER)
+        self.batch_size = batch_size
+        self.tick_seconds = tick_seconds
+        self.windows = windows
+
+    def tick(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Send every notification that is due now.
+
+        Returns:
+            Dict with counts of sent and failed notifications
+        """
+        now = now or datetime.now(timezone.utc)
+        stats = {"sent": 0, "failed": 0}
+        for window in self.windows:
+            while True:
+                with db.engine.connect() as connection:
+                    due = find_due_notifications(window, now, self.batch_size, connection)
+                if not due:
+                    break
+                with db.engine.begin() as connection:
+                    claimed = claim_notifications(due, connection)
+
+                failed = self._deliver(claimed)
+                if failed:
+                    with db.engine.begin() as connection:
+                        release_claims(failed, connection)
+                stats["sent"] += len(claimed) - len(failed)
+                stats["failed"] += len(failed)
+
+                # A short batch means the window is drained; after a failure
+                # the released claims would only be found again right away
+                if len(due) < self.batch_size or failed:
+                    break
+        return stats
+
+    def _deliver(self, notifications: List[Notification]) -> List[Notification]:
+        """Hand a claimed batch to the sender; returns what wasn't delivered."""
+        if not notifications:
+            return []
+        try:
+            return self.sender.send(notifications)
+        except Exception as e:
+            logger.error(f"Notification sender failed for {len(notifications)} notifications: {e}")
+            return notifications
+
+    def seconds_until_next(self, now: datetime) -> Optional[float]:
+        """
+        Seconds until the next assignment enters one of the windows.
+
+        One indexed MIN(due_at) lookup per window; assignments that won't be
+        notified (unsubscribed, already done) may wake the engine early,
+        which only costs an empty tick.
+        """
+        soonest = None
+        with db.engine.connect() as connection:
+            for window in self.windows:
+                next_due = connection.execute(
+                    sqlalchemy.text("SELECT MIN(due_at) FROM user_assignments WHERE due_at > :end"),
+                    {"end": to_db(now + window.end)}
+                ).scalar()
+                if next_due is not None:
+                    enters_at = as_utc(next_due) - window.end
+                    if soonest is None or enters_at < soonest:
+                        soonest = enters_at
+        return None if soonest is None else (soonest - now).total_seconds()
+
+    def run(self, once: bool = False) -> Dict[str, int]:
+        """
+        Send due notifications every tick, forever or (once=True) just once.
+
+        Between ticks the engine sleeps until the next assignment enters a
+        window, or tick_seconds at most, so new and re-synced assignments
+        are still picked up.
+
+        Returns:
+            Dict with counts of sent and failed notifications
+        """
+        totals = {"sent": 0, "failed": 0}
+        while True:
+            now = datetime.now(timezone.utc)
+            stats = self.tick(now)
+            for key, count in stats.items():
+                totals[key] += count
+            if stats["sent"] or stats["failed"]:
+                logger.info(f"Sent {stats['sent']} notifications ({stats['failed']} failed)")
+            if once:
+                return totals
+
+            wait = self.tick_seconds
+            until_next = self.seconds_until_next(now)
+            if until_next is not None:
+                wait = min(wait, until_next)
+            time.sleep(max(wait, 1.0))
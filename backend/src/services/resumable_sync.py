@@ -0,0 +1,276 @@
+"""
+Time-budgeted, resumable assignment sync.
+
+Serverless runs can be killed at a hard time limit. Here each course is
+committed together with a checkpoint row as soon as it finishes, and the
+sync stops before starting a course it likely can't finish in the time
+left. It then returns a continuation token (the run id); passing that
+token back resumes with only the courses that aren't checkpointed yet.
+"""
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Set
+
+import sqlalchemy
+
+from src import database as db
+from src.services.canvas_credentials import CanvasCredentialsError
+from src.services.canvas_sync import (
+    CanvasAPIError,
+    CanvasSyncError,
+    CanvasUnavailableError,
+    fetch_assignments_for_course,
+    get_active_courses,
+    record_user_synced,
+    upsert_assignments,
+)
+from src.services.events import publish_sync_progress
+from src.utils.dates import as_utc
+from src.utils.metrics import collect_sync_timings, timing_course
+
+logger = logging.getLogger(__name__)
+
+# Finished/abandoned runs are cleaned up after this long
+SYNC_RUN_RETENTION = timedelta(days=7)
+
+
+class InvalidContinuationToken(Exception):
+    """Continuation token doesn't match a sync run for this user."""
+    pass
+
+
+def _start_run(canvas_user_id: int, total_courses: int) -> str:
+    run_id = uuid.uuid4().hex
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - SYNC_RUN_RETENTION
+    with db.engine.begin() as connection:
+        # SQLite doesn't enforce the cascade unless foreign keys are on
+        connection.execute(
+            sqlalchemy.text("""
+                DELETE FROM sync_checkpoints
+                WHERE run_id IN (
+                    SELECT run_id FROM sync_runs
+                    WHERE canvas_user_id = :user_id AND updated_at < :cutoff
+                )
+            """),
+            {"user_id": canvas_user_id, "cutoff": cutoff},
+        )
+        connection.execute(
+            sqlalchemy.text("""
+                DELETE FROM sync_runs
+                WHERE canvas_user_id = :user_id AND updated_at < :cutoff
+            """),
+            {"user_id": canvas_user_id, "cutoff": cutoff},
+        )
+        connection.execute(
+            sqlalchemy.text("""
+                INSERT INTO sync_runs (run_id, canvas_user_id, status, total_courses)
+                VALUES (:run_id, :user_id, 'in_progress', :total_courses)
+            """),
+            {"run_id": run_id, "user_id": canvas_user_id, "total_courses": total_courses},
+        )
+    return run_id
+
+
+def _completed_course_ids(canvas_user_id: int, run_id: str) -> Set[int]:
+    with db.engine.begin() as connection:
+        run = connection.execute(
+            sqlalchemy.text("""
+                SELECT status FROM sync_runs
+                WHERE run_id = :run_id AND canvas_user_id = :user_id
+            """),
+            {"run_id": run_id, "user_id": canvas_user_id},
+        ).first()
+        if run is None:
+            raise InvalidContinuationToken("Unknown continuation token")
+
+        return set(
+            connection.execute(
+                sqlalchemy.text("""
+                    SELECT canvas_course_id FROM sync_checkpoints
+                    WHERE run_id = :run_id
+                """),
+                {"run_id": run_id},
+            ).scalars()
+        )
+
+
+def get_sync_progress(canvas_user_id: int, run_id: str) -> Dict[str, Any]:
+    """
+    Report how far a (possibly partial) sync run got.
+
+    Raises:
+        InvalidContinuationToken: If the run doesn't exist for this user
+    """
+    with db.engine.begin() as connection:
+        run = connection.execute(
+            sqlalchemy.text("""
+                SELECT status, total_courses, started_at, updated_at
+                FROM sync_runs
+                WHERE run_id = :run_id AND canvas_user_id = :user_id
+            """),
+            {"run_id": run_id, "user_id": canvas_user_id},
+        ).first()
+        if run is None:
+            raise InvalidContinuationToken("Unknown continuation token")
+
+        checkpoints = connection.execute(
+            sqlalchemy.text("""
+                SELECT COUNT(*) AS courses_completed,
+                       COALESCE(SUM(assignments_synced), 0) AS assignments_synced,
+                       SUM(CASE WHEN error IS NOT NULL THEN 1 ELSE 0 END) AS courses_failed
+                FROM sync_checkpoints
+                WHERE run_id = :run_id
+            """),
+            {"run_id": run_id},
+        ).one()
+
+    return {
+        "continuation_token": run_id if run.status != "complete" else None,
+        "complete": run.status == "complete",
+        "courses_total": run.total_courses,
+        "courses_completed": checkpoints.courses_completed,
+        "courses_failed": checkpoints.courses_failed or 0,
+        "assignments_synced": checkpoints.assignments_synced,
+        "started_at": run.started_at,
+        "updated_at": run.updated_at,
+    }
+
+
+def sync_user_assignments_resumable(
+    canvas_user_id: int,
+    time_budget_seconds: Optional[float] = None,
+    continuation_token: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Sync assignments course by course, committing a checkpoint per course.
+
+    Args:
+        canvas_user_id: Canvas user ID
+        time_budget_seconds: Stop before starting a course that likely won't
+            finish within this many seconds (None = no limit)
+        continuation_token: Token from an earlier partial run to resume
+
+    Returns:
+        Dict with this call's synced count, completion flag, the
+        continuation token (None once complete), overall run progress and
+        the time this call spent per phase, overall and per course (timings;
+        courses run concurrently, so the summed phase times can exceed the
+        total)
+
+    Raises:
+        InvalidContinuationToken: If continuation_token is unknown
+        CanvasSyncError: If sync operation fails
+    """
+    with collect_sync_timings() as timings:
+        result = _sync_course_by_course(canvas_user_id, time_budget_seconds, continuation_token)
+    result["timings"] = timings.as_dict()
+    return result
+
+
+def _sync_course_by_course(
+    canvas_user_id: int,
+    time_budget_seconds: Optional[float],
+    continuation_token: Optional[str],
+) -> Dict[str, Any]:
+    started_at = time.monotonic()
+    try:
+        active_courses = get_active_courses(canvas_user_id)
+
+        if continuation_token:
+            run_id = continuation_token
+            completed = _completed_course_ids(canvas_user_id, run_id)
+        else:
+            run_id = _start_run(canvas_user_id, len(active_courses))
+            completed = set()
+
+        remaining = [c for c in active_courses if c.canvas_course_id not in completed]
+        synced_count = 0
+        courses_done = 0
+        out_of_time = False
+
+        for course in remaining:
+            if time_budget_seconds is not None and courses_done > 0:
+                elapsed = time.monotonic() - started_at
+                average_course_seconds = elapsed / courses_done
+                if elapsed + average_course_seconds > time_budget_seconds:
+                    out_of_time = True
+                    break
+
+            error = None
+            assignments = []
+            try:
+                with timing_course(course.canvas_course_id):
+                    assignments = fetch_assignments_for_course(
+                        canvas_user_id, course.canvas_course_id, course.course_name
+                    )
+            except CanvasUnavailableError:
+                # Leave the course uncheckpointed so a resume retries it
+                raise
+            except CanvasAPIError as e:
+                # Same as a full sync: skip the course, but checkpoint it so
+                # resumes don't retry it forever
+                logger.warning(f"Failed to fetch assignments for course {course.canvas_course_id}: {e}")
+                error = str(e)
+
+            with db.engine.begin() as connection, timing_course(course.canvas_course_id):
+                if error is None:
+                    # Even when empty, so assignments removed from the course are deleted
+                    synced_count += upsert_assignments(
+                        canvas_user_id, assignments, [course.canvas_course_id], connection
+                    )
+                connection.execute(
+                    sqlalchemy.text("""
+                        INSERT INTO sync_checkpoints (run_id, canvas_course_id, assignments_synced, error)
+                        VALUES (:run_id, :course_id, :assignments_synced, :error)
+                    """),
+                    {
+                        "run_id": run_id,
+                        "course_id": course.canvas_course_id,
+                        "assignments_synced": len(assignments),
+                        "error": error,
+                    },
+                )
+                connection.execute(
+                    sqlalchemy.text("""
+                        UPDATE sync_runs SET updated_at = CURRENT_TIMESTAMP
+                        WHERE run_id = :run_id
+                    """),
+                    {"run_id": run_id},
+                )
+            courses_done += 1
+            publish_sync_progress(
+                canvas_user_id, "assignments", course_id=course.canvas_course_id,
+                done=len(active_courses) - len(remaining) + courses_done, total=len(active_courses)
+            )
+
+        if not out_of_time:
+            with db.engine.begin() as connection:
+                run_started_at = connection.execute(
+                    sqlalchemy.text("""
+                        UPDATE sync_runs
+                        SET status = 'complete', updated_at = CURRENT_TIMESTAMP
+                        WHERE run_id = :run_id
+                        RETURNING started_at
+                    """),
+                    {"run_id": run_id},
+                ).scalar()
+            # Courses checkpointed by earlier calls hold Canvas data from as
+            # far back as the run's start, so that's as fresh as the user is
+            record_user_synced(canvas_user_id, as_utc(run_started_at))
+        else:
+            logger.info(f"Sync time budget reached for user {canvas_user_id}, run {run_id} is partial")
+
+        return {
+            "synced": synced_count,
+            "total": synced_count,
+            "complete": not out_of_time,
+            "continuation_token": run_id if out_of_time else None,
+            "progress": get_sync_progress(canvas_user_id, run_id),
+        }
+    except (InvalidContinuationToken, CanvasAPIError, CanvasSyncError, CanvasCredentialsError):
+        raise
+    except Exception as e:
+        logger.error(f"Resumable sync failed for user {canvas_user_id}: {e}")
+        raise CanvasSyncError("Sync failed")
@@ -0,0 +1,130 @@
+"""
+Full-text search over the assignments a user can see.
+
+assignment_search indexes each shared assignment's name, course name and
+cleaned description: an FTS5 table on SQLite, a weighted tsvector with a
+GIN index on Postgres. Sync keeps it current through
+update_search_index, which rewrites only the rows whose text changed, so
+the index is never rebuilt. Searches (canvas_sync.search_assignments) join
+the matches to the user's own assignments, so users only find assignments
+of their active courses.
+"""
+import re
+from typing import List, Optional
+
+import sqlalchemy
+from sqlalchemy.engine import Connection
+
+from src.services.sync_records import AssignmentRecord
+
+SEARCH_TERM = re.compile(r"\w+")
+# Longest query accepted, in terms; the rest are ignored
+MAX_SEARCH_TERMS = 16
+
+
+def update_search_index(connection: Connection, assignments: List[AssignmentRecord]) -> int:
+    """
+    Index these assignments' text, skipping rows already indexed with it.
+
+    Returns:
+        Number of index rows written
+    """
+    if not assignments:
+        return 0
+
+    latest = {
+        assignment.canvas_assignment_id: (
+            assignment.assignment_name, assignment.course_name, assignment.description
+        )
+        for assignment in assignments
+    }
+    sqlite = connection.dialect.name == "sqlite"
+    id_column = "rowid" if sqlite else "canvas_assignment_id"
+    rows = connection.execute(
+        sqlalchemy.text(f"""
+            SELECT {id_column} AS canvas_assignment_id, assignment_name, course_name, description
+            FROM assignment_search
+            WHERE {id_column} IN :assignment_ids
+        """).bindparams(sqlalchemy.bindparam("assignment_ids", expanding=True)),
+        {"assignment_ids": list(latest)}
+    ).all()
+    indexed = {row.canvas_assignment_id: tuple(row)[1:] for row in rows}
+
+    records = [
+        {
+            "canvas_assignment_id": assignment_id,
+            "assignment_name": text[0],
+            "course_name": text[1],
+            "description": text[2],
+        }
+        for assignment_id, text in latest.items()
+        if indexed.get(assignment_id) != text
+    ]
+    if not records:
+        return 0
+
+    if sqlite:
+        # FTS5 has no upsert; replace changed rows
+        connection.execute(
+            sqlalchemy.text("DELETE FROM assignment_search WHERE rowid = :canvas_assignment_id"),
+            [{"canvas_assignment_id": record["canvas_assignment_id"]} for record in records]
+        )
+        connection.execute(
+            sqlalchemy.text("""
+                INSERT INTO assignment_search (rowid, assignment_name, course_name, description)
+                VALUES (:canvas_assignment_id, :assignment_name, :course_name, :description)
+            """),
+            records
+        )
+    else:
+        connection.execute(
+            sqlalchemy.text("""
+                INSERT INTO assignment_search (canvas_assignment_id, assignment_name, course_name, description)
+                VALUES (:canvas_assignment_id, :assignment_name, :course_name, :description)
+                ON CONFLICT (canvas_assignment_id) DO UPDATE
+                SET assignment_name = excluded.assignment_name,
+                    course_name = excluded.course_name,
+                    description = excluded.description
+            """),
+            records
+        )
+    return len(records)
+
+
+def build_search_query(query: str, dialect: str) -> Optional[str]:
+    """
+    Turn user input into a match expression: every word must match, the
+    last one as a prefix so results show up while typing.
+
+    Only word characters are kept, so input can't inject FTS5 or tsquery
+    operators. Returns None if the input has no words.
+    """
+    terms = SEARCH_TERM.findall(query.lower())[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    if dialect == "sqlite":
+        *words, last = [f'"{term}"' for term in terms]
+        return " ".join(words + [f"{last}*"])
+    *words, last = terms
+    return " & ".join(words + [f"{last}:*"])
+
+
+def match_subquery(dialect: str) -> str:
+    """
+    SELECT of (canvas_assignment_id, score) for index rows matching :match,
+    where a higher score is a better match.
+
+    Names weigh more than course names, which weigh more than descriptions.
+    """
+    if dialect == "sqlite":
+        # bm25 is lower for better matches; negate it so both dialects sort descending
+        return """
+            SELECT rowid AS canvas_assignment_id, -bm25(assignment_search, 10.0, 4.0, 1.0) AS score
+            FROM assignment_search
+            WHERE assignment_search MATCH :match
+        """
+    return """
+        SELECT canvas_assignment_id, ts_rank(document, to_tsquery('english', :match)) AS score
+        FROM assignment_search
+        WHERE document @@ to_tsquery('english', :match)
+    """
@@ -0,0 +1,65 @@
+"""
+Compact records for the Canvas sync pipeline.
+
+Between decoding a Canvas page and writing it to the database, each
+assignment is carried as one slotted AssignmentRecord instead of pydantic
+Assignment and Submission models, which stay at the API boundary. Field
+names match the SQL bind parameters, so executemany parameters are read
+straight off the records.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass(slots=True)
+class AssignmentRecord:
+    """A user's view of an assignment, flattened together with their submission."""
+    canvas_assignment_id: int
+    canvas_course_id: int
+    course_name: str
+    assignment_name: str
+    graded: bool
+    html_url: str
+    description: Optional[str]
+    points_possible: Optional[float]
+    grading_type: Optional[str]
+    due_at: Optional[datetime]
+    canvas_submission_id: Optional[int]
+    workflow_state: str
+    score: Optional[float]
+    grade: Optional[str]
+    submitted_at: Optional[datetime]
+    late: bool
+    missing: bool
+
+
+# Record fields written to each table (canvas_user_id is bound per call)
+COURSE_ASSIGNMENT_FIELDS = (
+    "canvas_assignment_id", "canvas_course_id", "assignment_name", "graded",
+    "description", "html_url", "points_possible", "grading_type",
+)
+USER_ASSIGNMENT_FIELDS = ("canvas_assignment_id", "canvas_course_id", "course_name", "due_at")
+USER_SUBMISSION_FIELDS = (
+    "canvas_submission_id", "canvas_assignment_id", "workflow_state",
+    "score", "grade", "submitted_at", "late", "missing",
+)
+
+
+def bind_params(
+    records: Iterable[AssignmentRecord], fields: Tuple[str, ...], **constants: Any
+) -> List[Dict[str, Any]]:
+    """
+    Build executemany parameters from records.
+
+    Args:
+        records: Records to write
+        fields: Record fields to bind, named as in the SQL statement
+        **constants: Extra parameters bound to the same value for every row
+
+    Returns:
+        One parameter mapping per record
+    """
+    values = attrgetter(*fields)
+    return [dict(zip(fields, values(record)), **constants) for record in records]
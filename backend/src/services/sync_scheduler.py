@@ -0,0 +1,403 @@
+"""
+Adaptive per-course sync scheduler.
+
+Instead of syncing every course on one fixed cadence, each (user, course)
+gets its own refresh interval based on:
+
+- how soon its nearest assignment is due (work due tonight -> minutes,
+  nothing due for weeks -> a day),
+- how often recent syncs actually changed something (an exponential
+  moving average of "content hash changed"),
+- whether the user is subscribed to the course.
+
+Next-sync times live in the sync_schedule table and, while running, in a
+min-heap, so the scheduler only ever looks at the course due soonest.
+All Canvas traffic is drawn from one token-bucket budget shared by every
+user; when the budget runs dry, due courses wait their turn.
+
+Course lists themselves still come from sync_user_courses (POST
+/canvas/sync or the fleet worker); the scheduler picks up new active
+courses every time it reloads, and drops courses whose term has ended.
+
+Each course's last sync is kept in sync_schedule. A user's last_synced_at
+only moves once every one of their active courses has been synced, and
+then to the oldest of those syncs, so it never claims more freshness
+than their stalest course has.
+"""
+import hashlib
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import astuple, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import sqlalchemy
+
+from src import database as db
+from src.services.canvas_sync import (
+    bulk_upsert_assignments,
+    fetch_assignments_for_course,
+    get_last_synced_at,
+    record_user_synced,
+    refresh_course_activity,
+)
+from src.services.sync_records import AssignmentRecord
+from src.utils.dates import as_utc, to_db
+from src.utils.resilience import canvas_circuit, canvas_retry_budget
+
+logger = logging.getLogger(__name__)
+
+MIN_SYNC_INTERVAL = timedelta(minutes=10)
+MAX_SYNC_INTERVAL = timedelta(hours=48)
+# Recently-passed deadlines still count as "near": grades and late flags move then
+RECENT_DUE_WINDOW = timedelta(days=1)
+CHANGE_RATE_DECAY = 0.5
+
+
+def compute_sync_interval(
+    nearest_due_at: Optional[datetime],
+    now: datetime,
+    change_rate: float,
+    is_subscribed: bool,
+) -> timedelta:
+    """
+    How long to wait before syncing a course again.
+
+    Args:
+        nearest_due_at: Earliest upcoming (or just-passed) due date in the course
+        now: Current time
+        change_rate: 0..1 moving average of syncs that changed data
+        is_subscribed: Whether the user wants notifications for the course
+
+    Returns:
+        Interval clamped to [MIN_SYNC_INTERVAL, MAX_SYNC_INTERVAL]
+    """
+    if nearest_due_at is None:
+        interval = timedelta(hours=24)
+    else:
+        until_due = nearest_due_at - now
+        if until_due <= timedelta(hours=24):
+            interval = timedelta(minutes=15)
+        elif until_due <= timedelta(days=3):
+            interval = timedelta(hours=1)
+        elif until_due <= timedelta(days=14):
+            interval = timedelta(hours=6)
+        else:
+            interval = timedelta(hours=24)
+
+    # A course that changes on every sync refreshes up to 3x as often
+    interval = interval / (1 + 2 * min(max(change_rate, 0.0), 1.0))
+
+    if not is_subscribed:
+        interval = interval * 2
+
+    return min(max(interval, MIN_SYNC_INTERVAL), MAX_SYNC_INTERVAL)
+
+
+class RequestBudget:
+    """Token bucket of Canvas requests, refilled at a fixed rate per minute."""
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self._rate = per_minute / 60
+        self._capacity = burst if burst is not None else per_minute
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    def try_acquire(self, cost: float = 1.0) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens < cost:
+                return False
+            self._tokens -= cost
+            return True
+
+    def charge(self, cost: float) -> None:
+        """Charge requests that turned out to be needed after the fact (may go negative)."""
+        with self._lock:
+            self._refill()
+            self._tokens -= cost
+
+    def seconds_until(self, cost: float = 1.0) -> float:
+        with self._lock:
+            self._refill()
+            if self._tokens >= cost:
+                return 0.0
+            return (cost - self._tokens) / self._rate
+
+
+@dataclass
+class ScheduledCourse:
+    canvas_user_id: int
+    canvas_course_id: int
+    course_name: str
+    is_subscribed: bool
+    next_sync_at: datetime
+    change_rate: float = 0.0
+    content_hash: Optional[str] = None
+
+    @property
+    def key(self) -> Tuple[int, int]:
+        return (self.canvas_user_id, self.canvas_course_id)
+
+
+def _content_hash(assignments: List[AssignmentRecord]) -> str:
+    digest = hashlib.sha256()
+    for assignment in sorted(assignments, key=lambda a: a.canvas_assignment_id):
+        digest.update(repr(astuple(assignment)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class AdaptiveSyncScheduler:
+    def __init__(
+        self,
+        budget_per_minute: float = 60,
+        concurrency: int = 4,
+        reload_seconds: float = 600,
+    ):
+        self.budget = RequestBudget(budget_per_minute)
+        self.concurrency = concurrency
+        self.reload_seconds = reload_seconds
+        self._courses: Dict[Tuple[int, int], ScheduledCourse] = {}
+        self._heap: List[Tuple[datetime, int, Tuple[int, int]]] = []
+        self._sequence = itertools.count()
+
+    def load(self, exclude: Optional[set] = None) -> None:
+        """(Re)build the queue from active courses and their saved schedule."""
+        exclude = exclude or set()
+        ended = refresh_course_activity()
+        if ended:
+            logger.info(f"Scheduler deactivated {ended} courses whose term has ended")
+
+        now = datetime.now(timezone.utc)
+        with db.engine.begin() as connection:
+            rows = connection.execute(
+                sqlalchemy.text("""
+                    SELECT c.canvas_user_id, c.canvas_course_id, c.course_name, c.is_subscribed,
+                           s.next_sync_at, s.change_rate, s.content_hash
+                    FROM user_courses c
+                    LEFT JOIN sync_schedule s
+                        ON s.canvas_user_id = c.canvas_user_id
+                        AND s.canvas_course_id = c.canvas_course_id
+                    WHERE c.is_active = 1
+                """)
+            ).all()
+
+        self._courses = {}
+        self._heap = []
+        for row in rows:
+            key = (row.canvas_user_id, row.canvas_course_id)
+            if key in exclude:
+                continue
+            course = ScheduledCourse(
+                canvas_user_id=row.canvas_user_id,
+                canvas_course_id=row.canvas_course_id,
+                course_name=row.course_name,
+                is_subscribed=bool(row.is_subscribed),
+                # Never-synced courses are due now
+                next_sync_at=as_utc(row.next_sync_at) or now,
+                change_rate=row.change_rate or 0.0,
+                content_hash=row.content_hash,
+            )
+            self._push(course)
+
+        logger.info(f"Scheduler loaded {len(self._courses)} active courses")
+
+    def _push(self, course: ScheduledCourse) -> None:
+        self._courses[course.key] = course
+        heapq.heappush(self._heap, (course.next_sync_at, next(self._sequence), course.key))
+
+    def _peek_due(self, now: datetime) -> Optional[ScheduledCourse]:
+        while self._heap:
+            next_sync_at, _, key = self._heap[0]
+            course = self._courses.get(key)
+            if course is None or course.next_sync_at != next_sync_at:
+                heapq.heappop(self._heap)  # stale entry
+                continue
+            return course if next_sync_at <= now else None
+        return None
+
+    def _seconds_until_next(self, now: datetime) -> Optional[float]:
+        if not self._heap:
+            return None
+        return max(0.0, (self._heap[0][0] - now).total_seconds())
+
+    def sync_course(self, course: ScheduledCourse) -> Tuple[int, str]:
+        """Fetch and store one course's assignments. Returns (count, content hash)."""
+        with canvas_retry_budget() as retry_budget:
+            try:
+                assignments = fetch_assignments_for_course(
+                    course.canvas_user_id, course.canvas_course_id, course.course_name
+                )
+            finally:
+                # The first request was paid for up front; charge the rest
+                # (pages, submissions, retries, hedges), even if the fetch failed
+                if retry_budget.requests > 1:
+                    self.budget.charge(retry_budget.requests - 1)
+        # Even when empty, so assignments removed from the course are deleted
+        bulk_upsert_assignments(course.canvas_user_id, assignments, [course.canvas_course_id])
+
+        return len(assignments), _content_hash(assignments)
+
+    def _nearest_due_at(self, course: ScheduledCourse, now: datetime) -> Optional[datetime]:
+        with db.engine.begin() as connection:
+            nearest = connection.execute(
+                sqlalchemy.text("""
+                    SELECT MIN(due_at)
+                    FROM user_assignments
+                    WHERE canvas_user_id = :user_id
+                      AND canvas_course_id = :course_id
+                      AND due_at >= :since
+                """),
+                {
+                    "user_id": course.canvas_user_id,
+                    "course_id": course.canvas_course_id,
+                    "since": to_db(now - RECENT_DUE_WINDOW),
+                },
+            ).scalar()
+        return as_utc(nearest)
+
+    def reschedule(self, course: ScheduledCourse, content_hash: Optional[str]) -> None:
+        """Update change rate and next sync time after a sync (None hash = failed)."""
+        now = datetime.now(timezone.utc)
+        if content_hash is not None:
+            changed = 1.0 if content_hash != course.content_hash else 0.0
+            course.change_rate = CHANGE_RATE_DECAY * course.change_rate + (1 - CHANGE_RATE_DECAY) * changed
+            course.content_hash = content_hash
+            interval = compute_sync_interval(
+                self._nearest_due_at(course, now), now, course.change_rate, course.is_subscribed
+            )
+        else:
+            # Failed syncs retry soon, without spending the budget in a tight loop
+            interval = MIN_SYNC_INTERVAL
+
+        course.next_sync_at = now + interval
+        with db.engine.begin() as connection:
+            connection.execute(
+                sqlalchemy.text("""
+                    INSERT INTO sync_schedule
+                    (canvas_user_id, canvas_course_id, next_sync_at, last_synced_at, change_rate, content_hash)
+                    VALUES (:user_id, :course_id, :next_sync_at, :last_synced_at, :change_rate, :content_hash)
+                    ON CONFLICT (canvas_user_id, canvas_course_id) DO UPDATE
+                    SET next_sync_at = excluded.next_sync_at,
+                        last_synced_at = COALESCE(excluded.last_synced_at, sync_schedule.last_synced_at),
+                        change_rate = excluded.change_rate,
+                        content_hash = excluded.content_hash
+                """),
+                {
+                    "user_id": course.canvas_user_id,
+                    "course_id": course.canvas_course_id,
+                    "next_sync_at": to_db(course.next_sync_at),
+                    "last_synced_at": to_db(now) if content_hash is not None else None,
+                    "change_rate": course.change_rate,
+                    "content_hash": course.content_hash,
+                },
+            )
+        self._push(course)
+
+    def update_user_last_synced(self, canvas_user_id: int) -> None:
+        """Move the user's last_synced_at up to their stalest active course's last sync, once all have one."""
+        with db.engine.begin() as connection:
+            row = connection.execute(
+                sqlalchemy.text("""
+                    SELECT COUNT(*) AS courses,
+                           COUNT(s.last_synced_at) AS synced,
+                           MIN(s.last_synced_at) AS oldest
+                    FROM user_courses c
+                    LEFT JOIN sync_schedule s
+                        ON s.canvas_user_id = c.canvas_user_id
+                        AND s.canvas_course_id = c.canvas_course_id
+                    WHERE c.canvas_user_id = :user_id
+                      AND c.is_active = 1
+                """),
+                {"user_id": canvas_user_id},
+            ).one()
+            last_synced_at = get_last_synced_at(canvas_user_id, connection)
+
+        if not row.courses or row.synced < row.courses:
+            return
+        oldest = as_utc(row.oldest)
+        # A full sync since then already covers every course
+        if last_synced_at is None or oldest > last_synced_at:
+            record_user_synced(canvas_user_id, oldest)
+
+    def run(self, once: bool = False) -> Dict[str, int]:
+        """
+        Sync courses as they come due, forever or (once=True) until nothing
+        due is left or the budget is spent.
+
+        Returns:
+            Dict with counts of synced and failed course syncs
+        """
+        self.load()
+        stats = {"synced": 0, "failed": 0}
+        in_flight: Dict[Future, ScheduledCourse] = {}
+        next_reload = time.monotonic() + self.reload_seconds
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="scheduler") as pool:
+            while True:
+                now = datetime.now(timezone.utc)
+                budget_exhausted = False
+                # While Canvas is down, due courses wait instead of failing one by one
+                circuit_open = canvas_circuit.state == "open"
+                while len(in_flight) < self.concurrency and not circuit_open:
+                    course = self._peek_due(now)
+                    if course is None:
+                        break
+                    if not self.budget.try_acquire():
+                        budget_exhausted = True
+                        break
+                    heapq.heappop(self._heap)
+                    del self._courses[course.key]
+                    in_flight[pool.submit(self.sync_course, course)] = course
+
+                if once and not in_flight and (
+                    budget_exhausted or circuit_open or self._peek_due(now) is None
+                ):
+                    break
+
+                waits = [self.reload_seconds]
+                until_next = self._seconds_until_next(now)
+                # Courses already due can't start until budget/circuit allow it
+                if until_next is not None and not (budget_exhausted or circuit_open):
+                    waits.append(until_next)
+                if budget_exhausted:
+                    waits.append(self.budget.seconds_until())
+                if circuit_open:
+                    waits.append(canvas_circuit.seconds_until_retry())
+                timeout = min(max(min(waits), 0.05), 60)
+
+                if in_flight:
+                    done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                else:
+                    done = set()
+                    time.sleep(timeout)
+
+                for future in done:
+                    course = in_flight.pop(future)
+                    try:
+                        count, content_hash = future.result()
+                        stats["synced"] += 1
+                        logger.info(f"Scheduler synced {count} assignments for user {course.canvas_user_id} course {course.canvas_course_id}")
+                    except Exception as e:
+                        content_hash = None
+                        stats["failed"] += 1
+                        logger.error(f"Scheduler sync failed for user {course.canvas_user_id} course {course.canvas_course_id}: {e}")
+                    self.reschedule(course, content_hash)
+                    if content_hash is not None:
+                        self.update_user_last_synced(course.canvas_user_id)
+
+                if not once and time.monotonic() >= next_reload:
+                    self.load(exclude={course.key for course in in_flight.values()})
+                    next_reload = time.monotonic() + self.reload_seconds
+
+        return stats
@@ -1,11 +1,100 @@
-import requests 
+"""
+Per-user pool of keep-alive Canvas HTTP sessions.
+
+Each user gets their own requests.Session authenticated with their own
+Canvas token, so users don't share one token's rate-limit budget. Sessions
+are created on first use, reused across syncs (keeping TLS connections
+alive), and closed once idle for CANVAS_SESSION_IDLE_SECONDS.
+"""
+import threading
+import time
+from typing import Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
 from src.config import get_settings
+from src.services.canvas_credentials import get_canvas_token
 
 # Initialize env variables
 settings = get_settings()
 
-session = requests.Session()
-session.headers.update({
-    "Authorization": f"Bearer {settings.CANVAS_PAT}",
-    "Content-Type": "application/json",
-})
\ No newline at end of file
+
+class CanvasSessionPool:
+    def __init__(self, pool_size: int, idle_seconds: float):
+        self._pool_size = pool_size
+        self._idle_seconds = idle_seconds
+        # canvas_user_id -> (session, last used monotonic time)
+        self._sessions: Dict[int, Tuple[requests.Session, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, canvas_user_id: int) -> requests.Session:
+        """
+        Get the session for a user, creating it if needed.
+
+        Raises:
+            CanvasCredentialsError: If the user has no usable Canvas token
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._sessions.get(canvas_user_id)
+            if entry is not None:
+                self._sessions[canvas_user_id] = (entry[0], now)
+                return entry[0]
+
+        # Token lookup hits the database, so do it outside the lock
+        session = self._create_session(get_canvas_token(canvas_user_id))
+
+        with self._lock:
+            entry = self._sessions.get(canvas_user_id)
+            if entry is not None:
+                # Another thread created one first; keep theirs
+                session.close()
+                session = entry[0]
+            self._sessions[canvas_user_id] = (session, now)
+            return session
+
+    def evict(self, canvas_user_id: int) -> None:
+        """Close a user's session, e.g. after their token changes."""
+        with self._lock:
+            entry = self._sessions.pop(canvas_user_id, None)
+        if entry is not None:
+            entry[0].close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            entries = list(self._sessions.values())
+            self._sessions.clear()
+        for session, _ in entries:
+            session.close()
+
+    def _evict_idle(self, now: float) -> None:
+        idle = [
+            user_id
+            for user_id, (_, last_used) in self._sessions.items()
+            if now - last_used > self._idle_seconds
+        ]
+        for user_id in idle:
+            session, _ = self._sessions.pop(user_id)
+            session.close()
+
+    def _create_session(self, token: str) -> requests.Session:
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        })
+        # One host (Canvas), with up to CANVAS_FETCH_CONCURRENCY requests in flight
+        # (twice that when hedged requests may duplicate every one of them)
+        pool_size = self._pool_size * 2 if settings.CANVAS_HEDGE_REQUESTS else self._pool_size
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+
+canvas_sessions = CanvasSessionPool(
+    pool_size=settings.CANVAS_FETCH_CONCURRENCY,
+    idle_seconds=settings.CANVAS_SESSION_IDLE_SECONDS,
+)
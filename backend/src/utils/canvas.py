@@ -1,21 +1,31 @@
-from typing import Dict, List, Optional, Tuple, Any
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from fastapi import HTTPException
-import requests
-from src.session import session
+from src.utils import canvas_async
+from src.session import canvas_sessions
 from src.config import get_settings
+from src.utils.metrics import record_canvas_page, record_canvas_pages, record_phase
+from src.utils.resilience import RetryBudget, current_retry_budget, resilient_get
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
 def fetch_canvas_paginated(
+    canvas_user_id: int,
     endpoint: str,
     include_params: Optional[List[str]],
+    decode: Optional[Callable[[bytes], List[Any]]] = None,
     **extra_params: Any     
 ) -> Tuple[List[dict], int]:
+    session = canvas_sessions.get(canvas_user_id)
+    # Outside a sync's shared budget, each paginated fetch gets its own
+    budget = current_retry_budget() or RetryBudget(settings.CANVAS_RETRY_BUDGET)
     all_items = []
     page = 1
     per_page = 100
     final_status_code = 200
+    fetch_seconds = parse_seconds = 0.0
 
     while True:
         params: Dict[str, Any] = {
@@ -28,16 +38,27 @@ def fetch_canvas_paginated(
         
         params.update(extra_params)
         
+        started_at = time.perf_counter()
         try:
-            response = session.get(
-                f"{settings.CANVAS_BASE_URL}{endpoint}",
-                params=params,
-                timeout=10
-            )
+            try:
+                response = resilient_get(
+                    session,
+                    f"{settings.CANVAS_BASE_URL}{endpoint}",
+                    params=params,
+                    budget=budget
+                )
+            except Exception:
+                record_canvas_page(endpoint, None, time.perf_counter() - started_at)
+                raise
+            elapsed = time.perf_counter() - started_at
+            fetch_seconds += elapsed
+            record_canvas_page(endpoint, response, elapsed)
             response.raise_for_status()
             final_status_code = response.status_code
             
-            items_page = response.json()
+            started_at = time.perf_counter()
+            items_page = decode(response.content) if decode else response.json()
+            parse_seconds += time.perf_counter() - started_at
             if not items_page:
                 break
 
@@ -51,14 +72,21 @@ def fetch_canvas_paginated(
         except Exception as e:
             print(e)
             raise
-    
+
+    record_phase("fetch", fetch_seconds)
+    record_phase("parse", parse_seconds)
+    record_canvas_pages(endpoint, page)
     return all_items, final_status_code
 
-def fetch_canvas_assignments_for_class(course_id: int) -> Tuple[List[dict], int]:
+def fetch_canvas_assignments_for_class(
+    canvas_user_id: int, course_id: int, decode: Optional[Callable[[bytes], List[Any]]] = None
+) -> Tuple[List[Any], int]:
     try:
         assignments, status_code = fetch_canvas_paginated(
+            canvas_user_id,
             endpoint=f"/api/v1/courses/{course_id}/assignments",
             include_params=["submission"],
+            decode=decode,
             order_by="due_at"
         )
         return assignments, status_code
@@ -66,35 +94,46 @@ def fetch_canvas_assignments_for_class(course_id: int) -> Tuple[List[dict], int]
         print(f"Error fetching canvas assignments for course {course_id}: {e}")
         raise
 
-def fetch_canvas_courses() -> Tuple[List[dict], int]:
+def fetch_canvas_submissions_for_class(
+    canvas_user_id: int, course_id: int, decode: Optional[Callable[[bytes], List[Any]]] = None
+) -> Tuple[List[Any], int]:
+    """
+    Gets the user's own submissions in a course, without the assignment bodies.\n
+    Each submission's cached_due_date is the due date that applies to this user.
+    """
+    try:
+        submissions, status_code = fetch_canvas_paginated(
+            canvas_user_id,
+            endpoint=f"/api/v1/courses/{course_id}/students/submissions",
+            include_params=None,
+            decode=decode
+        )
+        return submissions, status_code
+    except Exception as e:
+        logger.error(f"Error fetching canvas submissions for course {course_id}: {e}")
+        raise
+
+def fetch_canvas_courses(canvas_user_id: int, enrollment_state: Optional[str] = "active") -> Tuple[List[dict], int]:
     """
-    Gets user's entire collection of canvas courses.\n
+    Gets user's canvas courses, filtered by Canvas to the given enrollment state
+    (None for the entire course history).\n
     Returns a list of courses and the HTTP response status code
     """
+    extra_params: Dict[str, Any] = {}
+    if enrollment_state:
+        extra_params["enrollment_state"] = enrollment_state
     try:
         all_courses, status_code = fetch_canvas_paginated(
+            canvas_user_id,
             endpoint="/api/v1/courses", 
-            include_params=["term"]
+            include_params=["term"],
+            **extra_params
         )
         return all_courses, status_code
     except Exception as e:
         print(f"Error fetching Canvas courses: {e}")
         raise
 
-async def get_current_canvas_user() -> dict:
-    """Get the user associated with the current PAT"""
-    try:
-        response = session.get(f"{settings.CANVAS_BASE_URL}/api/v1/users/self")
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 401:
-            raise HTTPException(status_code=401, detail="Invalid Canvas API token")
-        elif e.response.status_code == 403:
-            raise HTTPException(status_code=403, detail="Access denied to Canvas API")
-        else:
-            raise HTTPException(status_code=500, detail=f"Canvas API error: {e}")
-    except Exception as e:
-        print(e)
-        raise HTTPException(status_code=500, detail=f"Failed to get current user: {str(e)}")
-    
+async def get_current_canvas_user(canvas_user_id: int) -> dict:
+    """Get the Canvas user that owns this user's token (async client, so it doesn't block the event loop)"""
+    return await canvas_async.run_in_canvas_loop_async(canvas_async.get_current_canvas_user(canvas_user_id))
@@ -0,0 +1,347 @@
+"""
+Async Canvas client on httpx with HTTP/2.
+
+Mirrors the functions in src.utils.canvas as coroutines with the same
+arguments, return values and exceptions (httpx errors are re-raised as
+their requests equivalents), so callers can move over one at a time.
+
+Each user gets one AsyncClient with their own token. Over HTTP/2 a single
+connection multiplexes all of a user's concurrent page and course fetches
+instead of queueing them on a connection pool or opening new TLS
+connections. Clients, and their keep-alive connections, are reused across
+syncs and closed after CANVAS_SESSION_IDLE_SECONDS of inactivity.
+
+Sync code (the sync services run in threadpool workers) runs its Canvas
+coroutines on one long-lived background event loop with
+run_in_canvas_loop, so clients outlive any single sync.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import threading
+import time
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple, TypeVar
+
+import httpx
+import requests
+from fastapi import HTTPException
+
+from src.config import get_settings
+from src.services.canvas_credentials import get_canvas_token
+from src.utils.metrics import record_canvas_page, record_canvas_pages, record_phase
+from src.utils.resilience import RetryBudget, current_retry_budget, resilient_get_async
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+
+class AsyncCanvasClientPool:
+    def __init__(self, max_connections: int, idle_seconds: float, http2: bool):
+        self._max_connections = max_connections
+        self._idle_seconds = idle_seconds
+        self._http2 = http2
+        # Replaces the network for new clients (e.g. httpx.MockTransport in benchmarks)
+        self.transport: Optional[httpx.AsyncBaseTransport] = None
+        # canvas_user_id -> (client, event loop it belongs to, last used monotonic time)
+        self._clients: Dict[int, Tuple[httpx.AsyncClient, asyncio.AbstractEventLoop, float]] = {}
+        self._lock = threading.Lock()
+
+    async def get(self, canvas_user_id: int) -> httpx.AsyncClient:
+        """
+        Get the client for a user, creating it if needed.
+
+        Clients are tied to the event loop that created them; a client from
+        another (or a closed) loop is replaced.
+
+        Raises:
+            CanvasCredentialsError: If the user has no usable Canvas token
+        """
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        with self._lock:
+            idle = self._pop_idle(now)
+            entry = self._clients.get(canvas_user_id)
+            if entry is not None and entry[1] is loop:
+                self._clients[canvas_user_id] = (entry[0], loop, now)
+                client = entry[0]
+            else:
+                client = None
+        await self._close_clients(idle, loop)
+        if client is not None:
+            return client
+
+        # Token lookup hits the database, so keep it off the event loop
+        token = await asyncio.to_thread(get_canvas_token, canvas_user_id)
+        client = self._create_client(token)
+
+        with self._lock:
+            entry = self._clients.get(canvas_user_id)
+            if entry is not None and entry[1] is loop:
+                # Another task created one first; keep theirs
+                stale, client = client, entry[0]
+            else:
+                stale = None
+            self._clients[canvas_user_id] = (client, loop, now)
+        if stale is not None:
+            await stale.aclose()
+        return client
+
+    def evict(self, canvas_user_id: int) -> None:
+        """
+        Drop a user's client, e.g. after their token changes.
+
+        Safe to call from sync code; the client is closed on its own loop.
+        """
+        with self._lock:
+            entry = self._clients.pop(canvas_user_id, None)
+        if entry is not None:
+            client, loop, _ = entry
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(lambda: loop.create_task(client.aclose()))
+
+    async def close_all(self) -> None:
+        with self._lock:
+            entries = list(self._clients.values())
+            self._clients.clear()
+        await self._close_clients(entries, asyncio.get_running_loop())
+
+    def _pop_idle(self, now: float) -> List[Tuple[httpx.AsyncClient, asyncio.AbstractEventLoop, float]]:
+        idle_user_ids = [
+            user_id
+            for user_id, (_, loop, last_used) in self._clients.items()
+            if now - last_used > self._idle_seconds or loop.is_closed()
+        ]
+        return [self._clients.pop(user_id) for user_id in idle_user_ids]
+
+    @staticmethod
+    async def _close_clients(entries, loop: asyncio.AbstractEventLoop) -> None:
+        for client, client_loop, _ in entries:
+            # Connections of a client from another loop die with that loop
+            if client_loop is loop:
+                await client.aclose()
+
+    def _create_client(self, token: str) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            # Settings won't load without it
+            base_url=settings.CANVAS_BASE_URL or "",
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+            },
+            http2=self._http2,
+            limits=httpx.Limits(
+                max_connections=self._max_connections,
+                max_keepalive_connections=self._max_connections,
+                keepalive_expiry=self._idle_seconds,
+            ),
+            timeout=settings.CANVAS_REQUEST_TIMEOUT_SECONDS,
+            transport=self.transport,
+        )
+
+
+async_canvas_clients = AsyncCanvasClientPool(
+    max_connections=settings.CANVAS_MAX_CONNECTIONS,
+    idle_seconds=settings.CANVAS_SESSION_IDLE_SECONDS,
+    http2=settings.CANVAS_HTTP2,
+)
+
+_canvas_loop: Optional[asyncio.AbstractEventLoop] = None
+_canvas_loop_lock = threading.Lock()
+
+
+def _get_canvas_loop() -> asyncio.AbstractEventLoop:
+    global _canvas_loop
+    with _canvas_loop_lock:
+        if _canvas_loop is None or _canvas_loop.is_closed():
+            _canvas_loop = asyncio.new_event_loop()
+            threading.Thread(target=_canvas_loop.run_forever, name="canvas-loop", daemon=True).start()
+        return _canvas_loop
+
+
+def _submit(coroutine: Coroutine[Any, Any, T]) -> "concurrent.futures.Future[T]":
+    """Start coroutine on the Canvas loop, in a copy of the caller's context."""
+    loop = _get_canvas_loop()
+    # The copy carries the caller's retry budget and sync timings over
+    context = contextvars.copy_context()
+    result: "concurrent.futures.Future[T]" = concurrent.futures.Future()
+
+    def finish(task: "asyncio.Task[T]") -> None:
+        if task.cancelled():
+            result.cancel()
+        elif task.exception() is not None:
+            result.set_exception(task.exception())
+        else:
+            result.set_result(task.result())
+
+    def start() -> None:
+        loop.create_task(coroutine, context=context).add_done_callback(finish)
+
+    loop.call_soon_threadsafe(start)
+    return result
+
+
+def run_in_canvas_loop(coroutine: Coroutine[Any, Any, T]) -> T:
+    """Run a Canvas coroutine from sync code and wait for its result (or exception)."""
+    return _submit(coroutine).result()
+
+
+async def run_in_canvas_loop_async(coroutine: Coroutine[Any, Any, T]) -> T:
+    """Await a Canvas coroutine from another event loop (e.g. the API's)."""
+    return await asyncio.wrap_future(_submit(coroutine))
+
+
+def close_canvas_loop() -> None:
+    """Close every client on the Canvas loop and stop it (at shutdown)."""
+    global _canvas_loop
+    with _canvas_loop_lock:
+        loop, _canvas_loop = _canvas_loop, None
+    if loop is None or loop.is_closed():
+        return
+    asyncio.run_coroutine_threadsafe(async_canvas_clients.close_all(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def _as_requests_error(e: httpx.HTTPError) -> requests.exceptions.RequestException:
+    """Translate an httpx error so callers' requests-based handling still applies."""
+    if isinstance(e, httpx.HTTPStatusError):
+        response = requests.Response()
+        response.status_code = e.response.status_code
+        response.url = str(e.request.url)
+        return requests.exceptions.HTTPError(str(e), response=response)
+    if isinstance(e, httpx.TimeoutException):
+        return requests.exceptions.Timeout(str(e))
+    if isinstance(e, httpx.TransportError):
+        return requests.exceptions.ConnectionError(str(e))
+    return requests.exceptions.RequestException(str(e))
+
+
+async def fetch_canvas_paginated(
+    canvas_user_id: int,
+    endpoint: str,
+    include_params: Optional[List[str]],
+    decode: Optional[Callable[[bytes], List[Any]]] = None,
+    **extra_params: Any
+) -> Tuple[List[dict], int]:
+    client = await async_canvas_clients.get(canvas_user_id)
+    budget = current_retry_budget() or RetryBudget(settings.CANVAS_RETRY_BUDGET)
+    all_items = []
+    page = 1
+    per_page = 100
+    final_status_code = 200
+    fetch_seconds = parse_seconds = 0.0
+
+    while True:
+        params: Dict[str, Any] = {
+            "page": page,
+            "per_page": per_page
+        }
+
+        if include_params:
+            params["include[]"] = include_params
+
+        params.update(extra_params)
+
+        started_at = time.perf_counter()
+        try:
+            try:
+                response = await resilient_get_async(client, endpoint, params=params, budget=budget)
+            except Exception:
+                record_canvas_page(endpoint, None, time.perf_counter() - started_at)
+                raise
+            elapsed = time.perf_counter() - started_at
+            fetch_seconds += elapsed
+            record_canvas_page(endpoint, response, elapsed)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"Canvas request to {endpoint} failed: {e}")
+            raise _as_requests_error(e) from e
+        final_status_code = response.status_code
+
+        started_at = time.perf_counter()
+        items_page = decode(response.content) if decode else response.json()
+        parse_seconds += time.perf_counter() - started_at
+        if not items_page:
+            break
+
+        all_items.extend(items_page)
+
+        link_header = response.headers.get('Link', '')
+        if 'rel="next"' not in link_header:
+            break
+
+        page += 1
+
+    record_phase("fetch", fetch_seconds)
+    record_phase("parse", parse_seconds)
+    record_canvas_pages(endpoint, page)
+    return all_items, final_status_code
+
+
+async def fetch_canvas_assignments_for_class(
+    canvas_user_id: int, course_id: int, decode: Optional[Callable[[bytes], List[Any]]] = None
+) -> Tuple[List[Any], int]:
+    try:
+        return await fetch_canvas_paginated(
+            canvas_user_id,
+            endpoint=f"/api/v1/courses/{course_id}/assignments",
+            include_params=["submission"],
+            decode=decode,
+            order_by="due_at"
+        )
+    except Exception as e:
+        logger.error(f"Error fetching canvas assignments for course {course_id}: {e}")
+        raise
+
+
+async def fetch_canvas_submissions_for_class(
+    canvas_user_id: int, course_id: int, decode: Optional[Callable[[bytes], List[Any]]] = None
+) -> Tuple[List[Any], int]:
+    try:
+        return await fetch_canvas_paginated(
+            canvas_user_id,
+            endpoint=f"/api/v1/courses/{course_id}/students/submissions",
+            include_params=None,
+            decode=decode
+        )
+    except Exception as e:
+        logger.error(f"Error fetching canvas submissions for course {course_id}: {e}")
+        raise
+
+
+async def fetch_canvas_courses(canvas_user_id: int, enrollment_state: Optional[str] = "active") -> Tuple[List[dict], int]:
+    extra_params: Dict[str, Any] = {}
+    if enrollment_state:
+        extra_params["enrollment_state"] = enrollment_state
+    try:
+        return await fetch_canvas_paginated(
+            canvas_user_id,
+            endpoint="/api/v1/courses",
+            include_params=["term"],
+            **extra_params
+        )
+    except Exception as e:
+        logger.error(f"Error fetching Canvas courses: {e}")
+        raise
+
+
+async def get_current_canvas_user(canvas_user_id: int) -> dict:
+    """Get the Canvas user that owns this user's token"""
+    try:
+        client = await async_canvas_clients.get(canvas_user_id)
+        response = await resilient_get_async(client, "/api/v1/users/self", params={})
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 401:
+            raise HTTPException(status_code=401, detail="Invalid Canvas API token")
+        elif e.response.status_code == 403:
+            raise HTTPException(status_code=403, detail="Access denied to Canvas API")
+        else:
+            logger.error(f"Canvas API error getting user {canvas_user_id}: {e}")
+            raise HTTPException(status_code=500, detail="Canvas API error")
+    except Exception as e:
+        logger.error(f"Failed to get Canvas user for {canvas_user_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get current user")
@@ -0,0 +1,26 @@
+from datetime import datetime, timezone
+from typing import Optional, overload
+
+
+@overload
+def as_utc(value: None) -> None: ...
+
+
+@overload
+def as_utc(value: datetime | str) -> datetime: ...
+
+
+def as_utc(value: Optional[datetime | str]) -> Optional[datetime]:
+    """Normalize a DB datetime (a string on SQLite) to an aware UTC datetime."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def to_db(value: datetime) -> datetime:
+    """Convert to naive UTC, which is how the schema stores timestamps."""
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,77 @@
+"""
+Helpers for sparse fieldsets (the ``?fields=`` query parameter).
+
+List endpoints map each public field name to the SQL columns it needs, so a
+request for a handful of fields only selects and serializes those columns.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from pydantic import BaseModel, TypeAdapter
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated ``fields`` value.
+
+    Args:
+        fields: Raw query parameter value (e.g. "id,name,due_at")
+        allowed: Field names the endpoint can return
+
+    Returns:
+        Requested field names in request order, or None if no fields were requested
+
+    Raises:
+        ValueError: If a requested field is not allowed
+    """
+    if fields is None:
+        return None
+
+    requested = []
+    for name in fields.split(","):
+        name = name.strip()
+        if name and name not in requested:
+            requested.append(name)
+
+    if not requested:
+        return None
+
+    allowed = list(allowed)
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+
+    return requested
+
+
+def select_columns(fields: List[str], field_columns: Dict[str, List[str]]) -> str:
+    """Build a SELECT list for the requested fields, without duplicate columns."""
+    columns: List[str] = []
+    for name in fields:
+        for column in field_columns[name]:
+            if column not in columns:
+                columns.append(column)
+    return ",\n".join(columns)
+
+
+@lru_cache(maxsize=None)
+def _field_adapter(model: Type[BaseModel], name: str) -> TypeAdapter:
+    if name in model.model_fields:
+        return TypeAdapter(model.model_fields[name].rebuild_annotation())
+    return TypeAdapter(model.model_computed_fields[name].return_type)
+
+
+def dump_fields(model: Type[BaseModel], values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate and JSON-serialize a subset of a model's fields.
+
+    Each value goes through the same type the full model uses, so sparse
+    responses format dates, booleans, etc. exactly like full responses.
+    """
+    result = {}
+    for name, value in values.items():
+        adapter = _field_adapter(model, name)
+        result[name] = adapter.dump_python(adapter.validate_python(value), mode="json")
+    return result
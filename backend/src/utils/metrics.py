@@ -0,0 +1,221 @@
+"""
+Prometheus metrics for the API and the sync hot path, served at GET /metrics.
+
+Under several uvicorn (or gunicorn) workers each process only sees its
+own samples. Set PROMETHEUS_MULTIPROC_DIR to an empty, writable
+directory before the workers start (and empty it on every deploy):
+metrics are then kept in per-process files there and /metrics combines
+all of them, whichever worker answers the scrape. Without it, metrics
+live in process memory as usual.
+
+Labels stay low-cardinality: routes and Canvas endpoints are reported
+as templates (/courses/{course_id}, /api/v1/courses/:id/assignments),
+never with user or course IDs.
+
+The same phase timings also feed the per-sync breakdown that sync
+results carry: inside collect_sync_timings() every phase is added up,
+overall and for the course named by timing_course(). Courses are synced
+concurrently, so these are summed work times, not wall-clock slices of
+the sync: together they can exceed its total.
+"""
+import contextvars
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+MULTIPROCESS_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "API request latency by route",
+    ["method", "route", "status"],
+)
+CANVAS_REQUEST_LATENCY = Histogram(
+    "canvas_request_duration_seconds",
+    "Canvas API request latency per page, retries included",
+    ["endpoint", "status"],
+)
+CANVAS_REQUEST_COST = Histogram(
+    "canvas_request_cost",
+    "Canvas rate-limit cost per page (X-Request-Cost)",
+    ["endpoint"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100),
+)
+CANVAS_PAGES = Histogram(
+    "canvas_pages_per_fetch",
+    "Pages per paginated Canvas fetch (one course's assignments or submissions)",
+    ["endpoint"],
+    buckets=(1, 2, 3, 5, 8, 13, 21),
+)
+SYNC_PHASE_DURATION = Histogram(
+    "sync_phase_duration_seconds",
+    "Time spent in each sync phase, per course or batch",
+    ["phase"],
+)
+SYNC_ROWS = Counter(
+    "sync_rows",
+    "Rows written by syncs, by table and outcome",
+    ["table", "outcome"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests",
+    "Cache lookups by cache and result (hit or miss)",
+    ["cache", "result"],
+)
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def canvas_endpoint_label(endpoint: str) -> str:
+    """A Canvas endpoint path with IDs replaced by :id."""
+    return _ID_SEGMENT.sub("/:id", endpoint)
+
+
+@contextmanager
+def observe_phase(phase: str) -> Iterator[None]:
+    """Time the block as one occurrence of a sync phase."""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - started_at)
+
+
+def record_phase(phase: str, seconds: float) -> None:
+    SYNC_PHASE_DURATION.labels(phase).observe(seconds)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(phase, seconds, _current_course.get())
+
+
+class SyncTimings:
+    """Seconds per sync phase, overall and per course, for one sync."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.courses: Dict[int, Dict[str, float]] = {}
+        # Courses are fetched concurrently, with their DB work in worker threads
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float, course_id: Optional[int] = None) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+            if course_id is not None:
+                course = self.courses.setdefault(course_id, {})
+                course[phase] = course.get(phase, 0.0) + seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        The breakdown for a sync result, in milliseconds.
+
+        total_ms is wall-clock time. summed_phases_ms adds up each phase
+        across every course and thread working concurrently, so its values
+        can sum to more than total_ms; it shows where the work went, not
+        how the wall-clock time divides.
+        """
+        total = time.perf_counter() - self.started_at
+        return {
+            "total_ms": round(total * 1000, 1),
+            "summed_phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in self.phases.items()},
+            "courses_ms": {
+                str(course_id): {phase: round(seconds * 1000, 1) for phase, seconds in course.items()}
+                for course_id, course in self.courses.items()
+            },
+        }
+
+
+_current_timings: contextvars.ContextVar[Optional[SyncTimings]] = contextvars.ContextVar(
+    "sync_timings", default=None
+)
+_current_course: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "sync_timing_course", default=None
+)
+
+
+@contextmanager
+def collect_sync_timings() -> Iterator[SyncTimings]:
+    """Add up the phases timed in this block (in this thread or task) into a SyncTimings."""
+    timings = SyncTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextmanager
+def timing_course(course_id: int) -> Iterator[None]:
+    """Attribute the phases timed in this block to a course as well."""
+    token = _current_course.set(course_id)
+    try:
+        yield
+    finally:
+        _current_course.reset(token)
+
+
+def record_canvas_page(endpoint: str, response: Optional[Any], seconds: float) -> None:
+    """
+    Record one Canvas page request.
+
+    Args:
+        response: The requests or httpx response, or None if the request failed
+    """
+    label = canvas_endpoint_label(endpoint)
+    status = str(response.status_code) if response is not None else "error"
+    CANVAS_REQUEST_LATENCY.labels(label, status).observe(seconds)
+    cost = response.headers.get("X-Request-Cost") if response is not None else None
+    if cost:
+        try:
+            CANVAS_REQUEST_COST.labels(label).observe(float(cost))
+        except ValueError:
+            pass
+
+
+def record_canvas_pages(endpoint: str, pages: int) -> None:
+    CANVAS_PAGES.labels(canvas_endpoint_label(endpoint)).observe(pages)
+
+
+def record_upsert(table: str, total: int, existing: int, written: int) -> None:
+    """
+    Count an upsert's rows as inserted, updated or unchanged.
+
+    Args:
+        total: Rows sent
+        existing: How many of them were already stored
+        written: Rows the upsert inserted or changed (its rowcount)
+    """
+    inserted = total - existing
+    updated = max(0, written - inserted)
+    SYNC_ROWS.labels(table, "inserted").inc(inserted)
+    SYNC_ROWS.labels(table, "updated").inc(updated)
+    SYNC_ROWS.labels(table, "unchanged").inc(max(0, existing - updated))
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def is_multiprocess() -> bool:
+    return bool(os.environ.get(MULTIPROCESS_DIR_ENV))
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """The current metrics in the Prometheus text format, and its content type."""
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,448 @@
+"""
+Resilience layer for Canvas HTTP requests.
+
+- Retries on 429/5xx and connection errors, with exponential backoff and
+  full jitter (Retry-After is honored on 429).
+- Retries come out of a per-sync retry budget, so a struggling Canvas
+  sees a bounded number of extra requests instead of every page retrying
+  several times.
+- Optional hedged requests: when a page takes longer than the observed
+  p95 latency, a duplicate GET is sent and whichever response arrives
+  first wins. Hedges are paid for from the same retry budget.
+- Page latencies are tracked in a sliding window for p50/p95/p99.
+- A circuit breaker opens after CANVAS_CIRCUIT_FAILURE_THRESHOLD failed
+  requests (5xx or connection errors) in a row. A 429 isn't a failure:
+  rate limits are per token, and the breaker is shared by every user. While open, requests fail immediately with
+  CircuitOpenError; after CANVAS_CIRCUIT_RESET_SECONDS one probe request
+  is let through, and its outcome closes or re-opens the circuit. A probe
+  that ends without an outcome (cancelled, or an unexpected error) is
+  released, so the next request probes instead.
+
+resilient_get serves the requests client and resilient_get_async the
+httpx one, with the same rules and shared breaker/latency state.
+
+A sync opts into a shared budget with ``canvas_retry_budget()``; requests
+made outside one get a fresh budget per paginated fetch. The budget also
+counts every request sent on its behalf (attempts, retries and hedges),
+for callers that pay for Canvas traffic by the request.
+"""
+import asyncio
+import contextvars
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import httpx
+import requests
+
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    httpx.TransportError,
+)
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 8.0
+# Don't hedge until the latency window says something about the p95
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY_SECONDS = 0.05
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Canvas requests are failing fast because the circuit breaker is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Canvas circuit open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half_open -> closed)."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self._failure_threshold = failure_threshold
+        self._reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at < self._reset_seconds:
+            return "open"
+        return "half_open"
+
+    def seconds_until_retry(self) -> float:
+        """Seconds until an open circuit lets a probe through (0 if not open)."""
+        with self._lock:
+            return self._seconds_until_retry(time.monotonic())
+
+    def _seconds_until_retry(self, now: float) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._reset_seconds - (now - self._opened_at))
+
+    def before_request(self) -> bool:
+        """
+        Returns:
+            True if the request is the half-open probe; the caller must call
+            release_probe once it's done, whatever the outcome
+
+        Raises:
+            CircuitOpenError: If the request must not be sent right now
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            if state == "closed":
+                return False
+            if state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            retry_after = self._seconds_until_retry(now)
+        raise CircuitOpenError(retry_after)
+
+    def release_probe(self) -> None:
+        """Let another request probe if this probe ended without recording an outcome."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Canvas circuit closed")
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probe_in_flight or (
+                self._opened_at is None and self._failures >= self._failure_threshold
+            ):
+                logger.warning(f"Canvas circuit opened after {self._failures} consecutive failures")
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+
+class RetryBudget:
+    """Counter of retries (and hedges) one sync may still spend, and of the requests it sent."""
+
+    def __init__(self, max_retries: int):
+        self._remaining = max_retries
+        self.spent = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._remaining <= 0:
+                return False
+            self._remaining -= 1
+            self.spent += 1
+            return True
+
+    @property
+    def remaining(self) -> int:
+        return self._remaining
+
+
+class LatencyTracker:
+    """Sliding window of request latencies with percentile lookups."""
+
+    def __init__(self, window: int = 1000):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, round(pct / 100 * len(samples)) - 1))
+        return samples[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "samples": len(self),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+canvas_latency = LatencyTracker()
+canvas_circuit = CircuitBreaker(
+    failure_threshold=settings.CANVAS_CIRCUIT_FAILURE_THRESHOLD,
+    reset_seconds=settings.CANVAS_CIRCUIT_RESET_SECONDS,
+)
+
+_current_budget: contextvars.ContextVar[Optional[RetryBudget]] = contextvars.ContextVar(
+    "canvas_retry_budget", default=None
+)
+
+_hedge_pool = ThreadPoolExecutor(
+    max_workers=settings.CANVAS_FETCH_CONCURRENCY * 2, thread_name_prefix="canvas-hedge"
+)
+
+
+@contextmanager
+def canvas_retry_budget(max_retries: Optional[int] = None) -> Iterator[RetryBudget]:
+    """
+    Share one retry budget across every Canvas request in this block.
+
+    Args:
+        max_retries: Retries (and hedges) allowed (default: CANVAS_RETRY_BUDGET)
+    """
+    budget = RetryBudget(settings.CANVAS_RETRY_BUDGET if max_retries is None else max_retries)
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+
+def run_with_retry_budget(budget: RetryBudget, fn: Callable, *args: Any) -> Any:
+    """Call fn with budget as the current retry budget (for worker threads)."""
+    token = _current_budget.set(budget)
+    try:
+        return fn(*args)
+    finally:
+        _current_budget.reset(token)
+
+
+def current_retry_budget() -> Optional[RetryBudget]:
+    return _current_budget.get()
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Full-jitter exponential backoff; a numeric Retry-After takes precedence."""
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_CAP_SECONDS)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def _close_when_done(future: Future) -> None:
+    def close(done: Future) -> None:
+        if done.exception() is None:
+            done.result().close()
+    future.add_done_callback(close)
+
+
+def _hedged_get(
+    session: requests.Session, url: str, params: Dict[str, Any], timeout: float, budget: RetryBudget
+) -> requests.Response:
+    hedge_after = canvas_latency.percentile(95) if len(canvas_latency) >= HEDGE_MIN_SAMPLES else None
+    if not settings.CANVAS_HEDGE_REQUESTS or hedge_after is None:
+        return session.get(url, params=params, timeout=timeout)
+
+    primary = _hedge_pool.submit(session.get, url, params=params, timeout=timeout)
+    done, _ = wait([primary], timeout=max(hedge_after, HEDGE_MIN_DELAY_SECONDS))
+    if done or not budget.try_spend():
+        return primary.result()
+
+    budget.count_request()
+    hedge = _hedge_pool.submit(session.get, url, params=params, timeout=timeout)
+    pending = {primary, hedge}
+    while True:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for loser in pending:
+                    _close_when_done(loser)
+                return future.result()
+        if not pending:
+            # Both failed; surface the primary's error
+            return primary.result()
+
+
+def _after_attempt(
+    url: str,
+    attempt: int,
+    budget: RetryBudget,
+    started_at: float,
+    status_code: Optional[int] = None,
+    retry_after: Optional[str] = None,
+    error: Optional[Exception] = None,
+) -> Optional[float]:
+    """
+    Report one attempt to the circuit breaker and latency window.
+
+    A 429 is backed off and retried but not counted by the breaker.
+
+    Returns:
+        Seconds to back off before retrying, or None if the outcome is final
+    """
+    if error is None and status_code not in RETRYABLE_STATUS_CODES:
+        canvas_circuit.record_success()
+        canvas_latency.record(time.perf_counter() - started_at)
+        return None
+
+    if status_code != 429:
+        # One user's rate limit says nothing about Canvas's health for the others
+        canvas_circuit.record_failure()
+    if error is not None and not isinstance(error, RETRYABLE_ERRORS):
+        return None
+    if attempt >= settings.CANVAS_MAX_RETRIES or not budget.try_spend():
+        return None
+
+    delay = backoff_delay(attempt, retry_after)
+    reason = f"failed ({error})" if error is not None else f"returned {status_code}"
+    logger.warning(f"Canvas request to {url} {reason}, retrying in {delay:.2f}s")
+    return delay
+
+
+def resilient_get(
+    session: requests.Session,
+    url: str,
+    params: Dict[str, Any],
+    timeout: Optional[float] = None,
+    budget: Optional[RetryBudget] = None,
+) -> requests.Response:
+    """
+    GET with retries, backoff, optional hedging and latency tracking.
+
+    Retryable failures stop being retried after CANVAS_MAX_RETRIES or once
+    the retry budget is spent; the last response (or error) is returned
+    (or raised) for the caller to handle as before. Every attempt is
+    reported to the circuit breaker.
+
+    Raises:
+        CircuitOpenError: If the circuit breaker is open
+        requests.exceptions.RequestException: If the request can't be completed
+    """
+    timeout = settings.CANVAS_REQUEST_TIMEOUT_SECONDS if timeout is None else timeout
+    budget = budget or current_retry_budget() or RetryBudget(settings.CANVAS_RETRY_BUDGET)
+
+    attempt = 0
+    while True:
+        probe = canvas_circuit.before_request()
+        started_at = time.perf_counter()
+        budget.count_request()
+        try:
+            response = _hedged_get(session, url, params, timeout, budget)
+        except requests.exceptions.RequestException as e:
+            delay = _after_attempt(url, attempt, budget, started_at, error=e)
+            if delay is None:
+                raise
+        else:
+            delay = _after_attempt(
+                url, attempt, budget, started_at,
+                status_code=response.status_code,
+                retry_after=response.headers.get("Retry-After"),
+            )
+            if delay is None:
+                return response
+            response.close()
+        finally:
+            # Outcomes recorded above clear the probe already; this covers the rest
+            if probe:
+                canvas_circuit.release_probe()
+
+        time.sleep(delay)
+        attempt += 1
+
+
+async def _hedged_get_async(
+    client: httpx.AsyncClient, url: str, params: Dict[str, Any], timeout: float, budget: RetryBudget
+) -> httpx.Response:
+    hedge_after = canvas_latency.percentile(95) if len(canvas_latency) >= HEDGE_MIN_SAMPLES else None
+    if not settings.CANVAS_HEDGE_REQUESTS or hedge_after is None:
+        return await client.get(url, params=params, timeout=timeout)
+
+    primary = asyncio.ensure_future(client.get(url, params=params, timeout=timeout))
+    done, _ = await asyncio.wait({primary}, timeout=max(hedge_after, HEDGE_MIN_DELAY_SECONDS))
+    if done or not budget.try_spend():
+        return await primary
+
+    # Over HTTP/2 the hedge is another stream on the same connection
+    budget.count_request()
+    hedge = asyncio.ensure_future(client.get(url, params=params, timeout=timeout))
+    pending = {primary, hedge}
+    while True:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                for loser in pending:
+                    loser.cancel()
+                return task.result()
+        if not pending:
+            # Both failed; surface the primary's error
+            return await primary
+
+
+async def resilient_get_async(
+    client: httpx.AsyncClient,
+    url: str,
+    params: Dict[str, Any],
+    timeout: Optional[float] = None,
+    budget: Optional[RetryBudget] = None,
+) -> httpx.Response:
+    """
+    Async resilient_get for httpx clients; same retry, budget, hedging and
+    circuit breaker rules.
+
+    Raises:
+        CircuitOpenError: If the circuit breaker is open
+        httpx.HTTPError: If the request can't be completed
+    """
+    timeout = settings.CANVAS_REQUEST_TIMEOUT_SECONDS if timeout is None else timeout
+    budget = budget or current_retry_budget() or RetryBudget(settings.CANVAS_RETRY_BUDGET)
+
+    attempt = 0
+    while True:
+        probe = canvas_circuit.before_request()
+        started_at = time.perf_counter()
+        budget.count_request()
+        try:
+            response = await _hedged_get_async(client, url, params, timeout, budget)
+        except httpx.HTTPError as e:
+            delay = _after_attempt(url, attempt, budget, started_at, error=e)
+            if delay is None:
+                raise
+        else:
+            delay = _after_attempt(
+                url, attempt, budget, started_at,
+                status_code=response.status_code,
+                retry_after=response.headers.get("Retry-After"),
+            )
+            if delay is None:
+                return response
+        finally:
+            if probe:
+                canvas_circuit.release_probe()
+
+        await asyncio.sleep(delay)
+        attempt += 1